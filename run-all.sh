@@ -1,9 +1,19 @@
 #!/bin/bash
 
-# Script to run all Python holiday crawler scripts in src/
-# Usage: ./run-all.sh [COUNTRY_CODE]
-#   If COUNTRY_CODE is provided (3 characters), runs only that script
-#   If no argument, runs all scripts
+# Script to run the holiday crawlers in src/
+# Usage: ./run-all.sh [COUNTRY_CODE ...] [--jobs N] [--deadline SECONDS] [--country-budget SECONDS]
+#   If COUNTRY_CODEs are provided (alpha-2 or alpha-3, e.g. GB or GBR), runs only those crawlers
+#   If no code is given, runs all crawlers concurrently in a single Python process
+#   --jobs limits how many crawlers run at the same time; --deadline and --country-budget
+#   lower the time limits below (raise them with the environment variables instead, which
+#   the timeout backstop follows). Any other src/crawl.py option is passed through too.
+#
+# This is a thin wrapper around src/crawl.py, which prints the success/failure
+# summary and exits non-zero if any crawler failed.
+#
+# The run is bounded: it stops after HOLIDAYS_RUN_DEADLINE seconds (default: 1800),
+# and any one country after HOLIDAYS_COUNTRY_BUDGET seconds (default: 600). A country
+# that runs out of time keeps its previous data/<code>.json and is reported as stale.
 
 set -e  # Exit on error
 
@@ -16,92 +26,12 @@ if [ ! -d "$SRC_DIR" ]; then
   exit 1
 fi
 
-# Change to src directory
-cd "$SRC_DIR"
+RUN_DEADLINE="${HOLIDAYS_RUN_DEADLINE:-1800}"
+COUNTRY_BUDGET="${HOLIDAYS_COUNTRY_BUDGET:-600}"
+CRAWL=(python3 "${SRC_DIR}/crawl.py" --deadline "$RUN_DEADLINE" --country-budget "$COUNTRY_BUDGET" "$@")
 
-# If country code argument is provided
-if [ $# -gt 0 ]; then
-  country_code="$1"
-  
-  # Validate country code is 3 characters
-  if [ ${#country_code} -ne 3 ]; then
-    echo "Error: Country code must be exactly 3 characters (e.g., USA, GBR, CHN)"
-    exit 1
-  fi
-  
-  # Convert to lowercase and construct script filename
-  script_name=$(echo "$country_code" | tr '[:upper:]' '[:lower:]').py
-  
-  # Check if script exists
-  if [ ! -f "$script_name" ]; then
-    echo "Error: Script '$script_name' not found in src/ directory"
-    echo "Available scripts:"
-    ls -1 *.py 2>/dev/null | grep -v "^test.py$" | grep -v "^functions.py$" | grep -v "\.disabled$" | sed 's/^/  - /' || echo "  (none found)"
-    exit 1
-  fi
-  
-  # Skip if it's test.py, functions.py, or disabled
-  if [ "$script_name" = "test.py" ] || [ "$script_name" = "functions.py" ] || [[ "$script_name" == *.disabled ]]; then
-    echo "Error: Cannot run '$script_name' (test/utility/disabled script)"
-    exit 1
-  fi
-  
-  # Run the specific script
-  echo "Running $script_name..."
-  echo "======================================"
-  echo ""
-  
-  if python3 "$script_name"; then
-    echo ""
-    echo "✓ $script_name completed successfully"
-    exit 0
-  else
-    echo ""
-    echo "✗ $script_name failed with error"
-    exit 1
-  fi
+# Last resort, should the crawler itself not stop after its deadline
+if command -v timeout >/dev/null 2>&1; then
+  exec timeout --kill-after=30 "$((RUN_DEADLINE + 120))" "${CRAWL[@]}"
 fi
-
-# No argument provided - run all scripts
-echo "Running all holiday crawler scripts..."
-echo "======================================"
-echo ""
-
-# Counter for tracking
-success_count=0
-error_count=0
-
-# Find all Python scripts except test.py, functions.py, and disabled files
-for script in *.py; do
-  # Skip if file doesn't exist (e.g., if no .py files match)
-  [ ! -f "$script" ] && continue
-  
-  # Skip test.py, functions.py, and any .disabled files
-  if [ "$script" = "test.py" ] || [ "$script" = "functions.py" ] || [[ "$script" == *.disabled ]]; then
-    continue
-  fi
-  
-  echo "Running $script..."
-  echo "--------------------------------------"
-  
-  if python3 "$script"; then
-    echo "✓ $script completed successfully"
-    ((success_count++))
-  else
-    echo "✗ $script failed with error"
-    ((error_count++))
-  fi
-  
-  echo ""
-done
-
-echo "======================================"
-echo "Summary:"
-echo "  Successful: $success_count"
-echo "  Failed: $error_count"
-echo ""
-
-if [ $error_count -gt 0 ]; then
-  exit 1
-fi
-
+exec "${CRAWL[@]}"
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import time
+import tracemalloc
+
+
+def measure(func, *args, repeat: int = 5, trace_memory: bool = True, **kwargs) -> dict:
+  """
+  Times a function and measures its peak Python memory allocation.
+  Anything the function prints is discarded.
+
+  The timed runs and the memory run are separate, so tracemalloc overhead
+  does not distort the timings.
+
+  Args:
+    func: Function to benchmark
+    *args: Positional arguments for func
+    repeat: Number of timed runs
+    trace_memory: False to skip the (slow) memory run; 'peak_bytes' is then None
+    **kwargs: Keyword arguments for func
+
+  Returns:
+    Dictionary with 'result' (of the last run), 'best' and 'mean' seconds per run,
+    and 'peak_bytes'
+  """
+  timings = []
+  result = None
+  with contextlib.redirect_stdout(io.StringIO()):
+    for _ in range(max(1, repeat)):
+      started = time.perf_counter()
+      result = func(*args, **kwargs)
+      timings.append(time.perf_counter() - started)
+
+    peak = None
+    if trace_memory:
+      tracemalloc.start()
+      try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+      finally:
+        tracemalloc.stop()
+
+  return {
+    "result": result,
+    "best": min(timings),
+    "mean": sum(timings) / len(timings),
+    "peak_bytes": peak
+  }
+
+
+def printTable(headers: list, rows: list) -> None:
+  """
+  Prints rows as a left-aligned plain text table.
+
+  Args:
+    headers: Column titles
+    rows: List of rows, each a list of cell values
+  """
+  cells = [[str(value) for value in row] for row in [headers] + rows]
+  widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+  for index, row in enumerate(cells):
+    print("  ".join(value.ljust(widths[i]) for i, value in enumerate(row)).rstrip())
+    if index == 0:
+      print("  ".join("-" * width for width in widths))
+
+
+def formatBytes(size: int) -> str:
+  for unit in ("B", "KB", "MB"):
+    if size < 1024:
+      return f"{size:.0f} {unit}"
+    size /= 1024
+  return f"{size:.1f} GB"
@@ -0,0 +1,105 @@
+"""
+Benchmark of the vectorised business-day functions against a pure-Python loop
+over the same data/*.json holidays.
+
+  cd src
+  python -m benchmark.business_days [--rows N]
+"""
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmark import measure, printTable
+from business_days import BusinessCalendars
+from holiday_index import loadHolidayResults
+
+
+def pythonIsBusinessDay(holidays: set, dates: list) -> list:
+  return [day.weekday() < 5 and day not in holidays for day in dates]
+
+
+def pythonAddBusinessDays(holidays: set, dates: list, offset: int) -> list:
+  results = []
+  for day in dates:
+    # Roll forward to a business day first, like numpy's roll="following"
+    while day.weekday() >= 5 or day in holidays:
+      day += timedelta(days=1)
+    remaining = offset
+    while remaining > 0:
+      day += timedelta(days=1)
+      if day.weekday() < 5 and day not in holidays:
+        remaining -= 1
+    results.append(day)
+  return results
+
+
+def pythonBusinessDaysBetween(holidays: set, starts: list, ends: list) -> list:
+  counts = []
+  for start, end in zip(starts, ends):
+    count = 0
+    day = start
+    while day < end:
+      if day.weekday() < 5 and day not in holidays:
+        count += 1
+      day += timedelta(days=1)
+    counts.append(count)
+  return counts
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Compare vectorised and pure-Python business-day arithmetic.")
+  argParser.add_argument("--rows", type=int, default=100000, help="dates per country (default: 100000)")
+  argParser.add_argument("--offset", type=int, default=10, help="business days to add (default: 10)")
+  argParser.add_argument("--repeat", type=int, default=3, help="timed runs (default: 3)")
+  args = argParser.parse_args(argv)
+
+  results = loadHolidayResults()
+  calendars = BusinessCalendars(results)
+
+  rng = np.random.default_rng(0)
+  base = np.datetime64('2020-01-01')
+  starts = base + rng.integers(0, 365 * 8, size=args.rows).astype('timedelta64[D]')
+  ends = starts + rng.integers(0, 60, size=args.rows).astype('timedelta64[D]')
+  pyStarts = starts.astype(date).tolist()
+  pyEnds = ends.astype(date).tolist()
+
+  rows = []
+  for result in results:
+    code = result['countryAlpha3Code']
+    holidays = {date.fromisoformat(holiday['date']) for holiday in result['holidays']}
+
+    operations = (
+      ("isBusinessDay",
+        lambda: calendars.isBusinessDay(code, starts),
+        lambda: pythonIsBusinessDay(holidays, pyStarts)),
+      ("addBusinessDays",
+        lambda: calendars.addBusinessDays(code, starts, args.offset),
+        lambda: pythonAddBusinessDays(holidays, pyStarts, args.offset)),
+      ("businessDaysBetween",
+        lambda: calendars.businessDaysBetween(code, starts, ends),
+        lambda: pythonBusinessDaysBetween(holidays, pyStarts, pyEnds))
+    )
+
+    for name, vectorised, loop in operations:
+      fast = measure(vectorised, repeat=args.repeat, trace_memory=False)
+      slow = measure(loop, repeat=1, trace_memory=False)
+
+      expected = np.array(slow["result"], dtype=fast["result"].dtype)
+      if not np.array_equal(fast["result"], expected):
+        raise SystemExit(f"{code} {name}: vectorised and pure-Python results differ")
+
+      rows.append([
+        code,
+        name,
+        f"{fast['best'] * 1000:.1f} ms",
+        f"{slow['best'] * 1000:.1f} ms",
+        f"{slow['best'] / fast['best']:.0f}x"
+      ])
+
+  print(f"{args.rows} dates per country\n")
+  printTable(["country", "operation", "numpy", "python loop", "speedup"], rows)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,125 @@
+"""
+Benchmark of the cross-country DateIndex against one linear scan per country over the
+'holidays' lists, on every data/*.json country projected over a synthetic range of years.
+
+  cd src
+  python -m benchmark.date_index [--years N] [--queries N]
+"""
+import argparse
+from datetime import date, timedelta
+import random
+import time
+
+from benchmark import measure, printTable
+from date_index import DateIndex
+from holiday_index import loadHolidayResults
+
+
+def syntheticResults(results: list, first_year: int, years: int) -> list:
+  # Repeats every country's holidays (by month and day) over the given years
+  synthetic = []
+  for result in results:
+    days = sorted({(holiday['date'][5:], holiday['holiday'], tuple(holiday.get('region') or ())) for holiday in result['holidays']})
+    holidays = []
+    for year in range(first_year, first_year + years):
+      for monthDay, name, region in days:
+        try:
+          day = date.fromisoformat(f"{year}-{monthDay}")
+        except ValueError:
+          continue
+        holiday = {"date": day.isoformat(), "holiday": name}
+        if region:
+          holiday["region"] = list(region)
+        holidays.append(holiday)
+    synthetic.append({**result, "holidays": holidays})
+  return synthetic
+
+
+def linearClosedOn(results: list, codes: list, day: date) -> list:
+  iso = day.isoformat()
+  return [result['countryAlpha3Code'] for result in results if result['countryAlpha3Code'] in codes and any(holiday['date'] == iso for holiday in result['holidays'])]
+
+
+def linearHolidaysInAny(results: list, codes: list, start: date, end: date) -> list:
+  first, last = start.isoformat(), end.isoformat()
+  closed = {}
+  for result in results:
+    if result['countryAlpha3Code'] in codes:
+      for holiday in result['holidays']:
+        if first <= holiday['date'] <= last:
+          closed.setdefault(holiday['date'], set()).add(result['countryAlpha3Code'])
+  return [(date.fromisoformat(iso), sorted(closed[iso])) for iso in sorted(closed)]
+
+
+def linearHolidaysInAll(results: list, codes: list, start: date, end: date) -> list:
+  return [day for day, closed in linearHolidaysInAny(results, codes, start, end) if len(closed) == len(codes)]
+
+
+def linearNextBusinessDays(results: list, codes: list, start: date, count: int) -> list:
+  days = []
+  day = start
+  while len(days) < count:
+    if day.weekday() < 5 and not linearClosedOn(results, codes, day):
+      days.append(day)
+    day += timedelta(days=1)
+  return days
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Compare the cross-country date index with linear scans per country.")
+  argParser.add_argument("--years", type=int, default=50, help="years of synthetic holidays (default: 50)")
+  argParser.add_argument("--first-year", type=int, default=2000, help="first synthetic year (default: 2000)")
+  argParser.add_argument("--queries", type=int, default=200, help="queries per operation (default: 200)")
+  argParser.add_argument("--repeat", type=int, default=3, help="timed runs (default: 3)")
+  args = argParser.parse_args(argv)
+
+  results = syntheticResults(loadHolidayResults(), args.first_year, args.years)
+  codes = sorted(result['countryAlpha3Code'] for result in results)
+
+  started = time.perf_counter()
+  index = DateIndex(results)
+  buildSeconds = time.perf_counter() - started
+
+  rng = random.Random(0)
+  span = args.years * 365 - 400
+  origin = date(args.first_year, 1, 1)
+  starts = [origin + timedelta(days=rng.randrange(span)) for _ in range(args.queries)]
+  selections = [rng.sample(codes, rng.randint(2, len(codes))) for _ in range(args.queries)]
+
+  operations = (
+    ("closedOn (1 day)",
+      lambda: [index.closedOn(day, codes) for day in starts],
+      lambda: [linearClosedOn(results, codes, day) for day in starts]),
+    ("holidaysInAny (1 year)",
+      lambda: [index.holidaysInAny(selection, day, day + timedelta(days=364)) for selection, day in zip(selections, starts)],
+      lambda: [linearHolidaysInAny(results, selection, day, day + timedelta(days=364)) for selection, day in zip(selections, starts)]),
+    ("holidaysInAll (1 year)",
+      lambda: [index.holidaysInAll(selection, day, day + timedelta(days=364)) for selection, day in zip(selections, starts)],
+      lambda: [linearHolidaysInAll(results, selection, day, day + timedelta(days=364)) for selection, day in zip(selections, starts)]),
+    ("nextBusinessDays (20)",
+      lambda: [index.nextBusinessDays(selection, day, 20) for selection, day in zip(selections, starts)],
+      lambda: [linearNextBusinessDays(results, selection, day, 20) for selection, day in zip(selections, starts)])
+  )
+
+  rows = []
+  for name, indexed, linear in operations:
+    fast = measure(indexed, repeat=args.repeat, trace_memory=False)
+    slow = measure(linear, repeat=1, trace_memory=False)
+
+    if fast["result"] != slow["result"]:
+      raise SystemExit(f"{name}: index and linear scan results differ")
+
+    rows.append([
+      name,
+      f"{fast['best'] / args.queries * 1e6:.1f} us",
+      f"{slow['best'] / args.queries * 1e6:.1f} us",
+      f"{slow['best'] / fast['best']:.0f}x"
+    ])
+
+  holidays = sum(len(result['holidays']) for result in results)
+  print(f"{len(codes)} countries, {args.years} years, {holidays} holidays; index built in {buildSeconds * 1000:.0f} ms\n")
+  printTable(["query", "index", "linear scan", "speedup"], rows)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of the holidays-calendar.net extraction against the original approach,
+which dropped every <br> and ran the 'details' selector twice.
+
+  cd src
+  python -m benchmark.extract [--repeat N]
+"""
+import argparse
+import os
+
+from lxml import html
+
+from benchmark import formatBytes, measure, printTable
+from parser.holidays_calendar import iterHolidayRows
+
+TEST_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'test', 'test.html')
+
+
+def legacyExtract(content: bytes) -> list:
+  tree = html.fromstring(content)
+
+  for br in tree.xpath("//br"):
+    br.drop_tag()
+
+  selector = "//div[ contains(@class, 'details') and not(.//span/span[contains(text(), 'Regional')]) ]"
+  holidays = tree.xpath(selector + "/div/span/span[1]/text()")
+  holidayText = tree.xpath(selector + "/div/span/span[2]/text()")
+
+  return [(holidays[i].strip(), holidayText[i].strip()) for i in range(len(holidays))]
+
+
+def singlePassExtract(content: bytes) -> list:
+  return list(iterHolidayRows(html.fromstring(content)))
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Compare holiday row extraction strategies on test/test.html.")
+  argParser.add_argument("--repeat", type=int, default=200, help="timed runs per strategy (default: 200)")
+  args = argParser.parse_args(argv)
+
+  with open(TEST_HTML, 'rb') as f:
+    content = f.read()
+
+  parseOnly = measure(html.fromstring, content, repeat=args.repeat)
+  legacy = measure(legacyExtract, content, repeat=args.repeat)
+  singlePass = measure(singlePassExtract, content, repeat=args.repeat)
+
+  if legacy["result"] != singlePass["result"]:
+    raise SystemExit("Extraction results differ between strategies")
+
+  rows = []
+  for name, result in (("two queries + <br> rewrite", legacy), ("precompiled single pass", singlePass)):
+    extractSeconds = result["best"] - parseOnly["best"]
+    rows.append([
+      name,
+      len(result["result"]),
+      f"{result['best'] * 1000:.3f} ms",
+      f"{extractSeconds * 1000:.3f} ms",
+      formatBytes(result["peak_bytes"])
+    ])
+
+  print(f"{os.path.normpath(TEST_HTML)}: {len(content)} bytes, html.fromstring {parseOnly['best'] * 1000:.3f} ms\n")
+  printTable(["strategy", "rows", "parse + extract", "extract", "peak memory"], rows)
+  speedup = (legacy["best"] - parseOnly["best"]) / max(singlePass["best"] - parseOnly["best"], 1e-9)
+  print(f"\nExtraction speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+  main()
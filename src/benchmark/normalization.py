@@ -0,0 +1,118 @@
+"""
+Benchmark of normalize.normalizeHolidays against the per-entry steps it replaced
+(strip loop, strptime per 'day' field, separate dedupe and sort), on a synthetic
+calendar: shuffled, padded with whitespace, with repeated entries and regions.
+
+  cd src
+  python -m benchmark.normalization [--rows N] [--years N]
+"""
+import argparse
+from datetime import datetime
+import random
+import time
+import tracemalloc
+
+from benchmark import formatBytes, printTable
+from normalize import dayName, normalizeHolidays
+
+NAMES = ["New Year's Day", "Good Friday", "Labour Day", "National Day", "Christmas Day", "Boxing Day"]
+REGIONS = [None, ["All"], ["Scotland"], ["England and Wales", "Northern Ireland"]]
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def syntheticCalendar(rows: int, years: int, seed: int = 0) -> list:
+  rng = random.Random(seed)
+  first = datetime(2026 - years, 1, 1).toordinal()
+  last = datetime(2025, 12, 31).toordinal()
+
+  calendar = []
+  while len(calendar) < rows:
+    # About 1 in 20 entries repeats an earlier one
+    if calendar and rng.random() < 0.05:
+      calendar.append(dict(rng.choice(calendar)))
+      continue
+    holiday = {
+      "date": datetime.fromordinal(rng.randint(first, last)).strftime("%Y-%m-%d"),
+      "holiday": " " * rng.randint(0, 1) + rng.choice(NAMES) + " " * rng.randint(0, 1)
+    }
+    region = rng.choice(REGIONS)
+    if region:
+      holiday["region"] = list(region)
+    calendar.append(holiday)
+  return calendar
+
+
+def legacyNormalize(holidays: list) -> list:
+  # Strip loop of the Singapore crawler
+  for item in holidays:
+    for field in ("date", "day", "holiday"):
+      if field in item:
+        item[field] = item[field].strip()
+
+  # Dedupe and stable sort, as separate passes
+  seen = set()
+  datas = []
+  for item in holidays:
+    key = (item["date"], item["holiday"], tuple(item.get("region") or ()))
+    if key not in seen:
+      seen.add(key)
+      datas.append(item)
+  datas.sort(key=lambda r: r["date"])
+
+  # Former 'day' field step: strptime for every entry
+  for item in datas:
+    if "day" not in item:
+      item["day"] = DAY_NAMES[datetime.strptime(item["date"], "%Y-%m-%d").weekday()]
+  return datas
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Compare batch normalisation with the per-entry steps it replaced.")
+  argParser.add_argument("--rows", type=int, default=100000, help="holiday entries (default: 100000)")
+  argParser.add_argument("--years", type=int, default=50, help="years spanned by the calendar (default: 50)")
+  argParser.add_argument("--repeat", type=int, default=3, help="timed runs (default: 3)")
+  args = argParser.parse_args(argv)
+
+  calendar = syntheticCalendar(args.rows, args.years)
+
+  # Both steps work in place, so every run gets its own copy, made outside the timings
+  copyRows = lambda: [{**row, "region": list(row["region"])} if "region" in row else dict(row) for row in calendar]
+
+  rows = []
+  results = {}
+  for name, func in (("per-entry steps", legacyNormalize), ("normalizeHolidays", normalizeHolidays)):
+    timings = []
+    for _ in range(max(1, args.repeat)):
+      # Weekday memoisation is part of what is measured, so it starts cold
+      dayName.cache_clear()
+      holidays = copyRows()
+      started = time.perf_counter()
+      results[name] = func(holidays)
+      timings.append(time.perf_counter() - started)
+
+    holidays = copyRows()
+    tracemalloc.start()
+    try:
+      func(holidays)
+      _, peak = tracemalloc.get_traced_memory()
+    finally:
+      tracemalloc.stop()
+
+    seconds = min(timings)
+    rows.append([
+      name,
+      len(results[name]),
+      f"{seconds * 1000:.1f} ms",
+      f"{args.rows / seconds / 1e6:.2f} M/s",
+      formatBytes(peak)
+    ])
+
+  if results["per-entry steps"] != results["normalizeHolidays"]:
+    raise SystemExit("normalizeHolidays and the per-entry steps give different results")
+
+  print(f"{args.rows} entries over {args.years} years\n")
+  printTable(["normalisation", "entries kept", "time", "entries/sec", "peak memory"], rows)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,140 @@
+"""
+Offline benchmark of the parsers against recorded HTTP responses.
+
+Record the fixtures once with network access, then benchmark without it:
+
+  cd src
+  python crawl.py --record            # saves every response into test/fixtures
+  python -m benchmark.parsers         # replays them
+
+When no fixtures have been recorded, the China page in test/test.html is used.
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import http_replay
+import pipeline
+from benchmark import formatBytes, measure, printTable
+from functions import createHolidayResult
+from normalize import normalizeHolidays
+
+TEST_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'test', 'test.html')
+TEST_HTML_URL = "https://holidays-calendar.net/calendar_en/china_en.html"
+
+
+def _holidaysCalendarSuite(urls: list):
+  from parser.holidays_calendar import getHolidayData
+  pages = [url for url in urls if "holidays-calendar.net" in url]
+  return pages, lambda: [row for url in pages for row in getHolidayData(url)]
+
+
+def _govUkSuite(urls: list):
+  from parser.gov_uk import getGovUkBankHolidays
+  pages = [url for url in urls if "gov.uk/bank-holidays" in url]
+  return pages, lambda: [row for url in pages for row in getGovUkBankHolidays(url)]
+
+
+def _officeHolidaysSuite(urls: list):
+  from parser.officeholidays import getHolidayData
+  pages = [url for url in urls if re.search(r"officeholidays\.com/countries/[^/]+/\d{4}$", url)]
+  return pages, lambda: [row for url in pages for row in getHolidayData(*url.rsplit("/", 1))]
+
+
+def _dataGovSgSuite(urls: list):
+  from countries import getCountry
+  from parser.data_gov_sg import getCollectionHolidays
+  collectionUrl = getCountry("SGP")["source"]
+  pages = [url for url in urls if "data.gov.sg" in url]
+  if collectionUrl not in urls:
+    return [], None
+  return pages, lambda: getCollectionHolidays(collectionUrl)
+
+
+def _copyRows(rows: list) -> list:
+  # normalizeHolidays works in place, so every run gets its own copy of the parsed rows
+  return [{**row, "region": list(row["region"])} if "region" in row else dict(row) for row in rows]
+
+
+SUITES = {
+  "holidays_calendar.getHolidayData": _holidaysCalendarSuite,
+  "gov_uk.getGovUkBankHolidays": _govUkSuite,
+  "officeholidays.getHolidayData": _officeHolidaysSuite,
+  "data_gov_sg pipeline": _dataGovSgSuite
+}
+
+
+def runBenchmarks(fixtures_dir: str, repeat: int) -> list:
+  """
+  Replays the fixtures through every parser that has recorded pages.
+
+  Args:
+    fixtures_dir: Directory of responses saved with crawl.py --record
+    repeat: Number of timed runs per parser
+
+  Returns:
+    Table rows: suite, pages, fetch, parse, normalize, pages/sec, records, peak memory
+  """
+  http_replay.configure("replay", fixtures_dir)
+  urls = http_replay.listRecordedUrls(fixtures_dir)
+
+  # Parse in this process: the parse pool would add pickling and process round trips to
+  # the timings, and tracemalloc does not see the memory of its processes
+  pipeline.configure(0)
+
+  rows = []
+  for name, suite in SUITES.items():
+    pages, run = suite(urls)
+    if not pages or run is None:
+      print(f"Skipping {name}: no recorded pages")
+      continue
+
+    # Fixture loading stands in for the network stage
+    started = time.perf_counter()
+    for url in pages:
+      http_replay.load(url)
+    fetchSeconds = time.perf_counter() - started
+
+    parsed = measure(run, repeat=repeat)
+    parseSeconds = max(parsed["best"] - fetchSeconds, 1e-9)
+
+    # The same steps as countries.crawlCountry
+    normalizeRun = lambda: createHolidayResult("", "", "", "", normalizeHolidays(_copyRows(parsed["result"])))
+    normalized = measure(normalizeRun, repeat=repeat)
+
+    rows.append([
+      name,
+      len(pages),
+      f"{fetchSeconds * 1000:.2f} ms",
+      f"{parseSeconds * 1000:.2f} ms",
+      f"{normalized['best'] * 1000:.2f} ms",
+      f"{len(pages) / parseSeconds:.1f}",
+      len(parsed["result"]),
+      formatBytes(max(parsed["peak_bytes"], normalized["peak_bytes"]))
+    ])
+  return rows
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Benchmark the parsers against recorded HTTP responses.")
+  argParser.add_argument("--fixtures", default=http_replay.FIXTURES_DIR, help="fixtures directory (default: test/fixtures)")
+  argParser.add_argument("--repeat", type=int, default=5, help="timed runs per parser (default: 5)")
+  args = argParser.parse_args(argv)
+
+  fixtures = args.fixtures
+  if not http_replay.listRecordedUrls(fixtures):
+    print(f"No fixtures in {os.path.normpath(fixtures)}, using {os.path.normpath(TEST_HTML)} as {TEST_HTML_URL}")
+    fixtures = tempfile.mkdtemp(prefix="holiday-fixtures-")
+    http_replay.configure(directory=fixtures)
+    with open(TEST_HTML, 'rb') as f:
+      http_replay.save(TEST_HTML_URL, f.read(), {"Content-Type": "text/html; charset=utf-8"})
+
+  rows = runBenchmarks(fixtures, args.repeat)
+  print("")
+  printTable(["parser", "pages", "fetch", "parse", "normalize", "pages/sec", "records", "peak memory"], rows)
+
+
+if __name__ == "__main__":
+  main()
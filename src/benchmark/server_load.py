@@ -0,0 +1,163 @@
+"""
+Load test of the holiday server (server.py) over keep-alive connections.
+
+  cd src
+  python -m benchmark.server_load                          # starts a local server on a free port
+  python -m benchmark.server_load --url http://127.0.0.1:8080 --connections 100 --duration 10
+
+A share of the requests repeats the ETag of an earlier response in If-None-Match,
+like a polling client, and should be answered with 304.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+from benchmark import printTable
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def _freePort() -> int:
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    return sock.getsockname()[1]
+
+
+async def _request(reader, writer, host: str, target: str, etag: str = None) -> tuple:
+  # Sends one GET and reads the response; returns (status, headers, body)
+  request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\n"
+  if etag:
+    request += f"If-None-Match: {etag}\r\n"
+  writer.write((request + "\r\n").encode('latin-1'))
+
+  head = await reader.readuntil(b"\r\n\r\n")
+  lines = head.decode('latin-1').split("\r\n")
+  status = int(lines[0].split(" ")[1])
+  headers = {}
+  for line in lines[1:]:
+    name, _, value = line.partition(":")
+    if name:
+      headers[name.strip().lower()] = value.strip()
+  body = await reader.readexactly(int(headers.get("content-length", 0)))
+  return status, headers, body
+
+
+async def _buildTargets(host: str, port: int) -> list:
+  reader, writer = await asyncio.open_connection(host, port)
+  try:
+    _, _, body = await _request(reader, writer, host, "/countries")
+  finally:
+    writer.close()
+
+  countries = json.loads(body)
+  codes = [country['countryAlpha3Code'] for country in countries]
+  targets = ["/countries", f"/holidays?countries={','.join(codes)}&from=2025-01-01&to=2025-12-31"]
+  for country in countries:
+    code = country['countryAlpha3Code']
+    targets.append(f"/holidays/{code}")
+    targets.append(f"/holidays/{code}?from=2025-01-01&to=2025-06-30")
+    for region in country['regions']:
+      targets.append(f"/holidays/{code}?region={quote(region)}")
+  return targets
+
+
+async def _worker(host: str, port: int, targets: list, deadline: float, conditional: float, seed: int, stats: dict) -> None:
+  rng = random.Random(seed)
+  etags = {}
+  reader, writer = await asyncio.open_connection(host, port)
+  try:
+    while time.perf_counter() < deadline:
+      target = rng.choice(targets)
+      etag = etags.get(target) if rng.random() < conditional else None
+
+      started = time.perf_counter()
+      status, headers, _ = await _request(reader, writer, host, target, etag)
+      stats["latencies"].append(time.perf_counter() - started)
+      stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+      if "etag" in headers:
+        etags[target] = headers["etag"]
+  finally:
+    writer.close()
+
+
+async def _run(host: str, port: int, connections: int, duration: float, conditional: float) -> dict:
+  targets = await _buildTargets(host, port)
+  stats = {"latencies": [], "statuses": {}}
+
+  started = time.perf_counter()
+  deadline = started + duration
+  await asyncio.gather(*(
+    _worker(host, port, targets, deadline, conditional, seed, stats) for seed in range(connections)
+  ))
+  stats["elapsed"] = time.perf_counter() - started
+  stats["targets"] = len(targets)
+  return stats
+
+
+def _startServer(port: int) -> subprocess.Popen:
+  process = subprocess.Popen(
+    [sys.executable, "server.py", "--port", str(port)],
+    cwd=SRC_DIR,
+    stdout=subprocess.DEVNULL
+  )
+  for _ in range(100):
+    try:
+      socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+      return process
+    except OSError:
+      time.sleep(0.1)
+  process.kill()
+  raise SystemExit("Server did not start")
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Load test the holiday server.")
+  argParser.add_argument("--url", help="base URL of a running server (default: start one locally)")
+  argParser.add_argument("--connections", type=int, default=50, help="concurrent keep-alive connections (default: 50)")
+  argParser.add_argument("--duration", type=float, default=5.0, help="seconds to run (default: 5)")
+  argParser.add_argument("--conditional", type=float, default=0.5, help="share of requests sent with If-None-Match (default: 0.5)")
+  args = argParser.parse_args(argv)
+
+  process = None
+  if args.url:
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+  else:
+    host, port = "127.0.0.1", _freePort()
+    process = _startServer(port)
+
+  try:
+    stats = asyncio.run(_run(host, port, args.connections, args.duration, args.conditional))
+  finally:
+    if process is not None:
+      process.terminate()
+      process.wait()
+
+  latencies = sorted(stats["latencies"])
+  count = len(latencies)
+
+  def percentile(p: float) -> str:
+    return f"{latencies[min(count - 1, int(count * p))] * 1000:.2f} ms"
+
+  print(f"{args.connections} connections, {args.duration:g}s, {stats['targets']} distinct URLs\n")
+  printTable(["requests", "req/s", "p50", "p90", "p99", "max"], [[
+    count,
+    f"{count / stats['elapsed']:.0f}",
+    percentile(0.5),
+    percentile(0.9),
+    percentile(0.99),
+    f"{latencies[-1] * 1000:.2f} ms"
+  ]])
+  print()
+  printTable(["status", "responses"], [[status, total] for status, total in sorted(stats["statuses"].items())])
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,96 @@
+"""
+Benchmark of buffered against streaming parsing of a holidays-calendar.net page.
+
+The page is delivered in chunks with a delay between them, standing in for a
+download. The buffered parser starts once the whole body is in; the streaming
+parser runs as chunks arrive. Reported per mode: time from the last chunk to the
+parsed result, and peak Python memory (without delays).
+
+  cd src
+  python -m benchmark.streaming [--scale N] [--chunk-size BYTES] [--delay MS]
+
+--scale repeats the holiday blocks of test/test.html to build a larger page.
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from benchmark import formatBytes, measure, printTable
+from parser.holidays_calendar import parseHolidayData, parseHolidayDataStream
+
+TEST_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'test', 'test.html')
+
+
+def scalePage(content: bytes, scale: int) -> bytes:
+  # Repeats everything from the first to the last 'details' block
+  start = content.index(b'<div class="details">')
+  end = content.rindex(b'<div class="details">')
+  end = content.index(b'</div>', content.index(b'</div>', end) + 1) + len(b'</div>')
+  return content[:start] + content[start:end] * scale + content[end:]
+
+
+def trickle(content: bytes, chunk_size: int, delay: float, marks: dict):
+  # Yields the page in chunks, recording when the last one was handed out
+  for offset in range(0, len(content), chunk_size):
+    if delay:
+      time.sleep(delay)
+    marks["last"] = time.perf_counter()
+    yield content[offset:offset + chunk_size]
+
+
+def buffered(content: bytes, chunk_size: int, delay: float = 0, marks: dict = None) -> list:
+  return parseHolidayData(b"".join(trickle(content, chunk_size, delay, marks if marks is not None else {})))
+
+
+def streaming(content: bytes, chunk_size: int, delay: float = 0, marks: dict = None) -> list:
+  return parseHolidayDataStream(trickle(content, chunk_size, delay, marks if marks is not None else {}))
+
+
+def latencyAfterLastByte(func, content: bytes, chunk_size: int, delay: float, repeat: int) -> float:
+  best = None
+  with contextlib.redirect_stdout(io.StringIO()):
+    for _ in range(max(1, repeat)):
+      marks = {}
+      func(content, chunk_size, delay, marks)
+      latency = time.perf_counter() - marks["last"]
+      best = latency if best is None else min(best, latency)
+  return best
+
+
+def main(argv: list = None) -> None:
+  argParser = argparse.ArgumentParser(description="Compare buffered and streaming parsing of test/test.html.")
+  argParser.add_argument("--scale", type=int, default=1, help="repeat the holiday blocks N times (default: 1)")
+  argParser.add_argument("--chunk-size", type=int, default=16 * 1024, help="bytes per chunk (default: 16384)")
+  argParser.add_argument("--delay", type=float, default=2.0, help="milliseconds between chunks (default: 2)")
+  argParser.add_argument("--repeat", type=int, default=20, help="timed runs per mode (default: 20)")
+  args = argParser.parse_args(argv)
+
+  with open(TEST_HTML, 'rb') as f:
+    content = scalePage(f.read(), max(1, args.scale))
+
+  rows = []
+  expected = None
+  for name, func in (("buffered", buffered), ("streaming", streaming)):
+    parsed = measure(func, content, args.chunk_size, repeat=args.repeat)
+    if expected is None:
+      expected = parsed["result"]
+    elif parsed["result"] != expected:
+      raise AssertionError(f"{name} parse differs from the buffered parse")
+
+    latency = latencyAfterLastByte(func, content, args.chunk_size, args.delay / 1000, max(1, args.repeat // 4))
+    rows.append([
+      name,
+      len(parsed["result"]),
+      f"{parsed['best'] * 1000:.2f} ms",
+      f"{latency * 1000:.2f} ms",
+      formatBytes(parsed["peak_bytes"])
+    ])
+
+  print(f"Page: {formatBytes(len(content))} in {args.chunk_size} byte chunks, {args.delay} ms apart\n")
+  printTable(["mode", "records", "parse (no delay)", "after last byte", "peak memory"], rows)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+import contextvars
+import time
+
+
+class BudgetExceeded(Exception):
+  """
+  Raised inside a crawl once its time budget is used up.
+  """
+
+
+# Deadline of the current crawl, as a time.monotonic() value. Worker threads started with
+# functions.mapConcurrently or pipeline.fetchAndParse see the deadline of their crawl.
+_deadline = contextvars.ContextVar('budget_deadline', default=None)
+
+
+@contextmanager
+def limit(seconds: float, name: str = None):
+  """
+  Gives the code inside the block a time budget. Cancellation is cooperative: HTTP
+  requests, scheduler waits and the parse pipeline call checkBudget(), and request
+  timeouts are shortened to the time left, so a crawl stops soon after its budget
+  runs out, with BudgetExceeded.
+
+  Nested budgets keep the earliest deadline.
+
+  Args:
+    seconds: Time budget in seconds, or None for no limit
+    name: Name used in the error message (Eg, the country code)
+  """
+  deadline = _deadline.get()
+  if seconds is not None:
+    ends = time.monotonic() + seconds
+    deadline = ends if deadline is None else min(deadline, ends)
+
+  token = _deadline.set(deadline)
+  try:
+    yield
+  except BudgetExceeded as e:
+    if name and not e.args:
+      raise BudgetExceeded(f"{name} ran out of time") from None
+    raise
+  finally:
+    _deadline.reset(token)
+
+
+def remaining() -> float:
+  """
+  Returns the seconds left in the current budget (negative once exceeded), or None without a budget.
+  """
+  deadline = _deadline.get()
+  return None if deadline is None else deadline - time.monotonic()
+
+
+def checkBudget() -> None:
+  """
+  Raises:
+    BudgetExceeded: If the current budget is used up
+  """
+  left = remaining()
+  if left is not None and left <= 0:
+    raise BudgetExceeded()
+
+
+def clampTimeout(timeout: tuple) -> tuple:
+  """
+  Shortens a (connect, read) request timeout to the time left in the current budget.
+
+  Raises:
+    BudgetExceeded: If the current budget is used up
+  """
+  left = remaining()
+  if left is None:
+    return timeout
+  if left <= 0:
+    raise BudgetExceeded()
+  return tuple(min(value, left) for value in timeout)
@@ -0,0 +1,145 @@
+import threading
+
+import numpy as np
+
+from holiday_index import DATA_DIR, appliesToRegion, getRegions, loadHolidayResults
+from weekmasks import DEFAULT_WEEKMASK, WEEKMASKS
+
+
+class BusinessCalendars:
+  """
+  numpy.busdaycalendar objects built from the crawled holidays, one per country and
+  per region. Calendars are immutable, so an instance can be shared between threads.
+
+  Regions follow the data files: a holiday tagged "All" is a holiday in every region.
+  Without a region, a date is a holiday if it is one in any region.
+  """
+
+  def __init__(self, results: list, weekmasks: dict = None):
+    """
+    Args:
+      results: List of result dictionaries (see functions.createHolidayResult)
+      weekmasks: Optional weekmask overrides by alpha-3 code, e.g. {"ARE": "1111001"}
+    """
+    weekmasks = {**WEEKMASKS, **(weekmasks or {})}
+    self._calendars = {}
+    self._codes = {}
+
+    for result in results:
+      code = result['countryAlpha3Code'].upper()
+      self._codes[code] = code
+      if result.get('countryAlpha2Code'):
+        self._codes[result['countryAlpha2Code'].upper()] = code
+
+      weekmask = weekmasks.get(code, DEFAULT_WEEKMASK)
+      holidays = result['holidays']
+
+      calendars = {None: self._build(weekmask, [holiday['date'] for holiday in holidays])}
+      for region in getRegions(result):
+        calendars[region] = self._build(weekmask, [holiday['date'] for holiday in holidays if appliesToRegion(holiday, region)])
+      self._calendars[code] = calendars
+
+  @staticmethod
+  def _build(weekmask: str, dates: list) -> np.busdaycalendar:
+    return np.busdaycalendar(weekmask=weekmask, holidays=np.array(sorted(set(dates)), dtype='datetime64[D]'))
+
+  @classmethod
+  def fromDirectory(cls, data_dir: str = DATA_DIR, weekmasks: dict = None) -> 'BusinessCalendars':
+    return cls(loadHolidayResults(data_dir), weekmasks)
+
+  def calendar(self, country: str, region: str = None) -> np.busdaycalendar:
+    """
+    Returns the numpy.busdaycalendar of a country, or of one of its regions.
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      region: Optional region name (e.g. "Scotland")
+    """
+    try:
+      calendars = self._calendars[self._codes[country.upper()]]
+    except KeyError:
+      raise KeyError(f"Unknown country '{country}'") from None
+    try:
+      return calendars[region]
+    except KeyError:
+      raise KeyError(f"Unknown region '{region}' for country '{country}'") from None
+
+  def isBusinessDay(self, country: str, dates, region: str = None) -> np.ndarray:
+    """
+    Checks which dates are business days.
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      dates: Array-like of datetime64[D] (or 'YYYY-MM-DD' strings)
+      region: Optional region name
+
+    Returns:
+      Boolean array with the shape of dates
+    """
+    return np.is_busday(toDatetime64(dates), busdaycal=self.calendar(country, region))
+
+  def addBusinessDays(self, country: str, dates, offsets, region: str = None, roll: str = "following") -> np.ndarray:
+    """
+    Moves dates by a number of business days.
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      dates: Array-like of datetime64[D] (or 'YYYY-MM-DD' strings)
+      offsets: Number of business days to add, scalar or array broadcastable with dates
+      region: Optional region name
+      roll: How to treat dates that are not business days themselves (see numpy.busday_offset)
+
+    Returns:
+      datetime64[D] array
+    """
+    return np.busday_offset(toDatetime64(dates), offsets, roll=roll, busdaycal=self.calendar(country, region))
+
+  def businessDaysBetween(self, country: str, start, end, region: str = None) -> np.ndarray:
+    """
+    Counts business days in [start, end), like numpy.busday_count.
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      start: Array-like of datetime64[D] (or 'YYYY-MM-DD' strings)
+      end: Array-like of datetime64[D], broadcastable with start
+      region: Optional region name
+
+    Returns:
+      Integer array; negative where end is before start
+    """
+    return np.busday_count(toDatetime64(start), toDatetime64(end), busdaycal=self.calendar(country, region))
+
+
+def toDatetime64(dates) -> np.ndarray:
+  """
+  Converts dates to a datetime64[D] array without copying when they already are one.
+  """
+  return np.asarray(dates, dtype='datetime64[D]')
+
+
+_default_calendars = None
+_default_calendars_lock = threading.Lock()
+
+
+def getBusinessCalendars() -> BusinessCalendars:
+  """
+  Returns the shared calendars of the files in DATA_DIR, building them on first use.
+  """
+  global _default_calendars
+  if _default_calendars is None:
+    with _default_calendars_lock:
+      if _default_calendars is None:
+        _default_calendars = BusinessCalendars.fromDirectory()
+  return _default_calendars
+
+
+def isBusinessDay(country: str, dates, region: str = None) -> np.ndarray:
+  return getBusinessCalendars().isBusinessDay(country, dates, region)
+
+
+def addBusinessDays(country: str, dates, offsets, region: str = None, roll: str = "following") -> np.ndarray:
+  return getBusinessCalendars().addBusinessDays(country, dates, offsets, region, roll)
+
+
+def businessDaysBetween(country: str, start, end, region: str = None) -> np.ndarray:
+  return getBusinessCalendars().businessDaysBetween(country, start, end, region)
@@ -0,0 +1,177 @@
+from datetime import datetime
+import importlib
+
+from budget import checkBudget
+from crawl_state import deferUpdates
+from functions import createHolidayResult, getOutputPath, writeJsonIfChanged
+from normalize import normalizeHolidays
+
+# Parser modules by name. Each one exposes crawlHolidays(country), which takes a
+# registry entry and returns its list of holiday dictionaries. Modules are only
+# imported when a country using them is crawled.
+PARSERS = {
+  "holidays_calendar": "parser.holidays_calendar",
+  "gov_uk": "parser.gov_uk",
+  "officeholidays": "parser.officeholidays",
+  "data_gov_sg": "parser.data_gov_sg"
+}
+
+# Supported countries. Adding a country only takes a new entry here, as long as one
+# of the PARSERS handles its source.
+COUNTRIES = [
+  {
+    "countryAlpha3Code": "CHN",
+    "countryAlpha2Code": "CN",
+    "country": "China",
+    "source": "https://holidays-calendar.net/calendar_en/china_en.html",
+    "parser": "holidays_calendar",
+    "yearsBack": 1,
+    "yearsAhead": 1
+  },
+  {
+    "countryAlpha3Code": "FRA",
+    "countryAlpha2Code": "FR",
+    "country": "France",
+    "source": "https://holidays-calendar.net/calendar_en/france_en.html",
+    "parser": "holidays_calendar",
+    "yearsBack": 1,
+    "yearsAhead": 1
+  },
+  {
+    "countryAlpha3Code": "GBR",
+    "countryAlpha2Code": "GB",
+    "country": "United Kingdom",
+    "source": "https://www.gov.uk/bank-holidays",
+    "parser": "gov_uk",
+    "countryRegions": ["All", "Scotland", "England and Wales", "Northern Ireland"]
+  },
+  {
+    "countryAlpha3Code": "MYR",
+    "countryAlpha2Code": "MY",
+    "country": "Malaysia",
+    "source": "https://www.officeholidays.com/countries/malaysia",
+    "parser": "officeholidays",
+    "yearsBack": 5,
+    "yearsAhead": 2,
+    "includeRegional": False
+  },
+  {
+    "countryAlpha3Code": "SGP",
+    "countryAlpha2Code": "SG",
+    "country": "Singapore",
+    "source": "https://api-production.data.gov.sg/v2/public/api/collections/691/metadata",
+    "parser": "data_gov_sg"
+  },
+  {
+    "countryAlpha3Code": "USA",
+    "countryAlpha2Code": "US",
+    "country": "United States",
+    "source": "https://holidays-calendar.net/calendar_en/usa_en.html",
+    "parser": "holidays_calendar",
+    "yearsBack": 1,
+    "yearsAhead": 1
+  },
+  {
+    "countryAlpha3Code": "VNM",
+    "countryAlpha2Code": "VN",
+    "country": "Vietnam",
+    "source": "https://holidays-calendar.net/calendar_en/vietnam_en.html",
+    "parser": "holidays_calendar",
+    "yearsBack": 1,
+    "yearsAhead": 1
+  }
+]
+
+_countries = {country["countryAlpha3Code"]: country for country in COUNTRIES}
+_codes = {
+  code: country["countryAlpha3Code"]
+  for country in COUNTRIES
+  for code in (country["countryAlpha3Code"], country["countryAlpha2Code"])
+}
+
+
+def getCountryCodes() -> list:
+  """
+  Returns the sorted alpha-3 codes of every registered country.
+  """
+  return sorted(_countries)
+
+
+def getCountry(country_code: str) -> dict:
+  """
+  Looks up a registered country.
+
+  Args:
+    country_code: Alpha-2 or alpha-3 code, case-insensitive
+
+  Returns:
+    Registry entry
+
+  Raises:
+    KeyError: If the country is not registered
+  """
+  try:
+    return _countries[_codes[country_code.upper()]]
+  except KeyError:
+    raise KeyError(f"Unknown country '{country_code}'") from None
+
+
+def crawlScope(country_code: str) -> dict:
+  """
+  Describes what a crawl of a country covers, for http_cache.sourcesUnchanged(): its
+  registry entry and the current year, from which parsers derive their year windows.
+  A new year, or a registry change, makes the next crawl fetch every page again.
+
+  Args:
+    country_code: Alpha-2 or alpha-3 code
+
+  Returns:
+    JSON-serialisable dictionary
+  """
+  return {"year": datetime.now().year, "country": getCountry(country_code)}
+
+
+def loadParser(name: str):
+  """
+  Imports a parser module on first use and returns its crawlHolidays function.
+
+  Args:
+    name: Key of PARSERS
+
+  Returns:
+    crawlHolidays(country) function
+  """
+  return importlib.import_module(PARSERS[name]).crawlHolidays
+
+
+def crawlCountry(country_code: str) -> None:
+  """
+  Crawls one registered country and writes its JSON file if the holidays changed.
+
+  Args:
+    country_code: Alpha-2 or alpha-3 code
+  """
+  country = getCountry(country_code)
+  code = country["countryAlpha3Code"]
+
+  # The crawl state the parser records only describes what the output file holds once
+  # it is written, so it is applied after the write
+  with deferUpdates():
+    # Every parser's output goes through the same normalisation (trim, day field, dedupe, sort)
+    datas = normalizeHolidays(loadParser(country["parser"])(country))
+
+    # Create standardised result dictionary
+    result = createHolidayResult(
+      source_url=country["source"],
+      country=country["country"],
+      country_alpha2_code=country["countryAlpha2Code"],
+      country_alpha3_code=code,
+      holidays_data=datas,
+      country_regions=country.get("countryRegions")
+    )
+
+    # A crawl that ran out of time keeps the existing file, even if it got this far
+    checkBudget()
+
+    # Write JSON file only if data has changed
+    writeJsonIfChanged(result, getOutputPath(code))
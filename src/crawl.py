@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from datetime import datetime
+
+import budget
+import crawl_state
+import daemon
+import host_scheduler
+import http_cache
+import http_replay
+import metrics
+import pipeline
+from countries import crawlCountry, crawlScope, getCountry, getCountryCodes
+from functions import getOutputPath
+from holiday_index import DATA_DIR, loadHolidayResults
+from holiday_store import writeHolidayStore
+from http_client import fetch
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds the runner waits past the run deadline for crawlers to notice it before giving up on them
+STOP_GRACE = 10
+
+
+def runCrawler(country_alpha3_code: str, profile_dir: str = None, time_budget: float = None, deadline: float = None) -> dict:
+  """
+  Crawls a registered country (see countries.crawlCountry).
+
+  The crawl is skipped when the output file exists and every page fetched by the
+  previous crawl answers 304 Not Modified, as long as that crawl had the same scope
+  (see countries.crawlScope), so a new year's pages are never missed.
+
+  Args:
+    country_alpha3_code: ISO 3166-1 alpha-3 country code (e.g., "SGP", "FRA")
+    profile_dir: Directory for the cProfile output, when enabled with HOLIDAYS_PROFILE
+    time_budget: Optional seconds the crawl may take, see budget.limit()
+    deadline: Optional time.monotonic() value by which the crawl must end, whatever its budget
+
+  Returns:
+    Dictionary with 'code', 'success', 'unchanged', 'timed_out', 'elapsed', 'error' and 'metrics' fields
+  """
+  started = time.monotonic()
+  if deadline is not None:
+    time_budget = min(time_budget, deadline - started) if time_budget is not None else deadline - started
+
+  error = None
+  unchanged = False
+  timedOut = False
+  with metrics.collect(country_alpha3_code) as crawlMetrics:
+    try:
+      with metrics.profile(country_alpha3_code, profile_dir or metrics.METRICS_DIR), budget.limit(time_budget, country_alpha3_code):
+        # Crawlers queued behind others may start with no time left
+        budget.checkBudget()
+        scope = crawlScope(country_alpha3_code)
+        if os.path.exists(getOutputPath(country_alpha3_code)) and http_cache.sourcesUnchanged(country_alpha3_code, fetch, scope):
+          unchanged = True
+        else:
+          with http_cache.trackDependencies(country_alpha3_code, scope):
+            crawlCountry(country_alpha3_code)
+    except budget.BudgetExceeded as e:
+      error = repr(e)
+      timedOut = True
+    except (Exception, SystemExit) as e:
+      # Parsers raise exceptions on malformed pages. SystemExit is caught too, defensively,
+      # so that no crawler can take down the others
+      error = repr(e)
+
+  return {
+    "code": country_alpha3_code,
+    "success": error is None,
+    "unchanged": unchanged,
+    "timed_out": timedOut,
+    "elapsed": time.monotonic() - started,
+    "error": error,
+    "metrics": crawlMetrics.toDict()
+  }
+
+
+def runCrawlers(country_codes: list, jobs: int, profile_dir: str = None, time_budget: float = None, deadline: float = None) -> list:
+  """
+  Runs several country crawlers concurrently on a thread pool.
+
+  With a deadline, crawlers still running STOP_GRACE seconds after it are given up on
+  and reported with 'abandoned' set; their threads are left running, so the caller
+  should exit the process without waiting for them.
+
+  Args:
+    country_codes: List of alpha-3 country codes to crawl
+    jobs: Maximum number of crawlers running at the same time
+    profile_dir: Directory for the cProfile output, see runCrawler()
+    time_budget: Optional seconds each crawler may take
+    deadline: Optional time.monotonic() value by which every crawler must end
+
+  Returns:
+    List of runCrawler() results, in the order the crawlers finished
+  """
+  results = []
+  abandoned = False
+  executor = ThreadPoolExecutor(max_workers=max(1, jobs))
+  futures = {executor.submit(runCrawler, code, profile_dir, time_budget, deadline): code for code in country_codes}
+  try:
+    for future in as_completed(futures, timeout=deadline + STOP_GRACE - time.monotonic() if deadline is not None else None):
+      result = future.result()
+      if result["unchanged"]:
+        print(f"✓ {result['code']} sources not modified, keeping existing file ({result['elapsed']:.1f}s)")
+      elif result["success"]:
+        print(f"✓ {result['code']} completed successfully ({result['elapsed']:.1f}s)")
+      else:
+        print(f"✗ {result['code']} failed with error: {result['error']}")
+      results.append(result)
+  except FutureTimeoutError:
+    abandoned = True
+    for future, code in futures.items():
+      if not future.done():
+        print(f"✗ {code} did not stop by the run deadline, giving up on it")
+        results.append({
+          "code": code,
+          "success": False,
+          "unchanged": False,
+          "timed_out": True,
+          "abandoned": True,
+          "elapsed": None,
+          "error": "Did not stop by the run deadline",
+          "metrics": None
+        })
+  finally:
+    executor.shutdown(wait=not abandoned, cancel_futures=True)
+  return results
+
+
+def staleData(country_alpha3_code: str) -> dict:
+  """
+  Describes the data kept for a country whose crawl failed, for the run report.
+
+  Returns:
+    Dictionary with 'stale' (whether a previous file is kept) and its 'data_updated_on'
+  """
+  try:
+    with open(getOutputPath(country_alpha3_code), 'r', encoding='utf-8') as f:
+      return {"stale": True, "data_updated_on": json.load(f).get('updated_on')}
+  except (OSError, ValueError):
+    return {"stale": False, "data_updated_on": None}
+
+
+def runCheck(country_codes: list, jobs: int, time_budget: float = None, deadline: float = None) -> list:
+  """
+  Runs the crawlers of several countries once (see runCrawlers), notes the data kept
+  for those that failed, and writes the run metrics to their own metrics directory.
+
+  Args:
+    country_codes: List of alpha-3 country codes to crawl
+    jobs: Maximum number of crawlers running at the same time
+    time_budget: Optional seconds each crawler may take
+    deadline: Optional seconds the whole run may take, from now
+
+  Returns:
+    List of runCrawler() results, with staleData() fields added to the failed ones
+  """
+  started = time.monotonic()
+  startedOn = datetime.now().replace(microsecond=0)
+  runDir = metrics.runDirectory(startedOn)
+  tracing = metrics.startTracemalloc()
+
+  results = runCrawlers(country_codes, jobs, runDir, time_budget, started + deadline if deadline is not None else None)
+  for result in results:
+    if not result["success"]:
+      result.update(staleData(result["code"]))
+
+  success_count = sum(1 for result in results if result["success"])
+  report = {
+    "started_on": startedOn.isoformat(),
+    "elapsed": round(time.monotonic() - started, 3),
+    "peak_rss_bytes": metrics.peakRss(),
+    "successful": success_count,
+    "failed": len(results) - success_count,
+    "stale": sorted(result["code"] for result in results if result.get("stale")),
+    "countries": {
+      result["code"]: {key: value for key, value in result.items() if key != "code"}
+      for result in sorted(results, key=lambda result: result["code"])
+    }
+  }
+  if tracing:
+    report["tracemalloc"] = metrics.stopTracemalloc()
+  metricsPath = os.path.join(runDir, "metrics.json")
+  metrics.writeRunMetrics(report, metricsPath)
+  print(f"Run metrics written to {os.path.normpath(metricsPath)}")
+
+  return results
+
+
+def main(argv: list = None) -> int:
+  argParser = argparse.ArgumentParser(description="Crawl public holidays for one or more countries.")
+  argParser.add_argument("country_codes", nargs="*", metavar="COUNTRY_CODE", help="alpha-3 or alpha-2 code(s) of the countries to crawl (e.g. USA GBR)")
+  argParser.add_argument("--all", action="store_true", help="crawl every available country (default when no code is given)")
+  argParser.add_argument("--list", action="store_true", help="list the available countries and exit")
+  argParser.add_argument("--jobs", "-j", type=int, default=None, help="number of crawlers to run at the same time (default: all of them)")
+  argParser.add_argument("--no-cache", action="store_true", help="ignore the on-disk HTTP cache and always download and parse every page")
+  argParser.add_argument("--parse-processes", type=int, default=None, metavar="N", help="number of processes parsing downloaded pages, 0 to parse on the crawler threads (default: number of CPUs)")
+  argParser.add_argument("--stream-parse", action="store_true", help="parse pages on the crawler threads while they download, where the parser supports it, instead of in the parser processes")
+  argParser.add_argument("--host-rate", type=float, default=None, metavar="N", help=f"requests per second to any one site, shared by every crawler (default: {host_scheduler.HOST_RATE:g})")
+  argParser.add_argument("--host-concurrency", type=int, default=None, metavar="N", help=f"requests in progress to any one site (default: {host_scheduler.HOST_CONCURRENCY})")
+  argParser.add_argument("--deadline", type=float, default=None, metavar="SECONDS", help="stop every crawler this many seconds after the start (with --daemon, of each round of checks), keeping the previous data of unfinished countries (default: no limit)")
+  argParser.add_argument("--country-budget", type=float, default=None, metavar="SECONDS", help="stop any one crawler after this many seconds, keeping its previous data (default: no limit)")
+  argParser.add_argument("--daemon", action="store_true", help="keep running and re-check each country on an adaptive interval, until interrupted")
+  argParser.add_argument("--min-interval", type=float, default=None, metavar="MINUTES", help="with --daemon, shortest interval between checks of a country (default: 15)")
+  argParser.add_argument("--max-interval", type=float, default=None, metavar="MINUTES", help="with --daemon, longest interval between checks of a country (default: 1440)")
+  httpMode = argParser.add_mutually_exclusive_group()
+  httpMode.add_argument("--record", nargs="?", const=http_replay.FIXTURES_DIR, metavar="DIR", help="save every HTTP response into a fixtures directory (default: test/fixtures)")
+  httpMode.add_argument("--replay", nargs="?", const=http_replay.FIXTURES_DIR, metavar="DIR", help="serve HTTP responses from a fixtures directory, without network access")
+  args = argParser.parse_args(argv)
+
+  if args.no_cache:
+    http_cache.configure(enabled=False)
+  if args.parse_processes is not None or args.stream_parse:
+    pipeline.configure(args.parse_processes, stream=args.stream_parse or None)
+  if args.host_rate is not None or args.host_concurrency is not None:
+    host_scheduler.configure(rate=args.host_rate, concurrency=args.host_concurrency)
+  if args.record:
+    http_replay.configure("record", os.path.abspath(args.record))
+  elif args.replay:
+    http_replay.configure("replay", os.path.abspath(args.replay))
+  if args.daemon and http_replay.getMode():
+    argParser.error("--daemon cannot record or replay HTTP responses")
+
+  available = getCountryCodes()
+
+  if args.list:
+    for code in available:
+      country = getCountry(code)
+      print(f"{code}  {country['countryAlpha2Code']}  {country['country']:<16}  {country['parser']:<18}  {country['source']}")
+    return 0
+
+  if args.all or not args.country_codes:
+    selected = available
+  else:
+    selected = []
+    for code in args.country_codes:
+      try:
+        code = getCountry(code)["countryAlpha3Code"]
+      except KeyError:
+        print(f"Error: Unknown country '{code}'")
+        print("Available countries:")
+        for availableCode in available:
+          print(f"  - {availableCode}")
+        return 1
+      if code not in selected:
+        selected.append(code)
+
+  # Crawlers write to '../data', relative to the working directory
+  workDir, dataDir = SRC_DIR, DATA_DIR
+  if http_replay.getMode() == "replay":
+    # Fixtures may be older than the published data, so a replay run writes its data,
+    # delta logs, crawl state and cache dependencies under a scratch directory instead
+    scratch = tempfile.mkdtemp(prefix="holidays-replay-")
+    workDir, dataDir = os.path.join(scratch, 'src'), os.path.join(scratch, 'data')
+    os.makedirs(workDir)
+    os.makedirs(dataDir)
+    crawl_state.configure(os.path.join(scratch, 'state', 'crawl-state.json'))
+    http_cache.configure(directory=os.path.join(scratch, '.cache', 'http'))
+    print(f"Replaying recorded responses, writing the output under {scratch}")
+  os.chdir(workDir)
+
+  print(f"Running {len(selected)} holiday crawler(s): {', '.join(selected)}")
+  print("======================================")
+  print("")
+
+  if args.daemon:
+    return daemon.runDaemon(
+      selected,
+      args.jobs or len(selected),
+      runCheck,
+      args.min_interval * 60 if args.min_interval else daemon.MIN_INTERVAL,
+      args.max_interval * 60 if args.max_interval else daemon.MAX_INTERVAL,
+      args.country_budget,
+      args.deadline
+    )
+
+  started = time.monotonic()
+  results = runCheck(selected, args.jobs or len(selected), args.country_budget, args.deadline)
+  stale = sorted(result["code"] for result in results if result.get("stale"))
+
+  # Rebuild the binary store from every JSON file, including countries not crawled this time
+  storePath = os.path.join(dataDir, 'holidays.bin')
+  writeHolidayStore(loadHolidayResults(dataDir), storePath)
+  print(f"Binary holiday store written to {os.path.normpath(storePath)}")
+
+  success_count = sum(1 for result in results if result["success"])
+  error_count = len(results) - success_count
+
+  print("")
+  print("======================================")
+  print("Summary:")
+  print(f"  Successful: {success_count}")
+  print(f"  Failed: {error_count}")
+  if stale:
+    print(f"  Stale (previous data kept): {', '.join(stale)}")
+  print(f"  Total time: {time.monotonic() - started:.1f}s")
+  print("")
+
+  exitCode = 1 if error_count > 0 else 0
+  if any(result.get("abandoned") for result in results):
+    # Threads of abandoned crawlers may never end, and would keep the interpreter from exiting
+    sys.stdout.flush()
+    os._exit(exitCode)
+  return exitCode
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,259 @@
+from contextlib import contextmanager
+from datetime import datetime
+import contextvars
+import json
+import os
+import tempfile
+import threading
+
+from functions import getHolidaysDigest
+from normalize import normalizeHolidays
+
+STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'state', 'crawl-state.json')
+
+# Fields that make up a holiday's content; 'day' is derived from the date
+DIGEST_FIELDS = ('date', 'holiday', 'region')
+
+_lock = threading.Lock()
+
+# Updates held back by deferUpdates(), None outside it
+_deferred = contextvars.ContextVar("crawl_state_deferred", default=None)
+
+
+def configure(path: str = None) -> None:
+  """
+  Moves the manifest for the current process (Eg, out of the published tree for a replay run).
+
+  Args:
+    path: Manifest path
+  """
+  global STATE_PATH
+  if path is not None:
+    STATE_PATH = path
+
+
+def sourceDigest(holidays: list) -> str:
+  """
+  Computes the digest of the holidays a source returned, with functions.getHolidaysDigest
+  over their DIGEST_FIELDS only. It differs from the 'holidaysDigest' of the output file,
+  which covers whole entries, because it compares a source's holidays with their copy in
+  the output file: 'day' may only be added to that copy, and entries of the same date may
+  sit in another order there, so they are put in a canonical order first.
+
+  Args:
+    holidays: List of holiday dictionaries
+
+  Returns:
+    Hex SHA-256 digest
+  """
+  projected = [{field: holiday[field] for field in DIGEST_FIELDS if field in holiday} for holiday in holidays]
+  projected.sort(key=lambda holiday: json.dumps(holiday, sort_keys=True, ensure_ascii=False))
+  return getHolidaysDigest(projected)
+
+
+def yearOf(holiday: dict) -> int:
+  return int(holiday['date'][:4])
+
+
+def groupByYear(holidays: list) -> dict:
+  years = {}
+  for holiday in holidays:
+    years.setdefault(yearOf(holiday), []).append(holiday)
+  return years
+
+
+def loadCrawlState(path: str = None) -> dict:
+  """
+  Loads the crawl-state manifest.
+
+  Returns:
+    Dictionary mapping alpha-3 codes to country state, empty if there is no manifest yet
+  """
+  try:
+    with open(path or STATE_PATH, 'r', encoding='utf-8') as f:
+      return json.load(f)
+  except (OSError, json.JSONDecodeError):
+    return {}
+
+
+def getCountryState(country_alpha3_code: str, path: str = None) -> dict:
+  """
+  Returns the state of one country: {"sources": {key: entry}, ...}.
+  """
+  return loadCrawlState(path).get(country_alpha3_code.upper(), {"sources": {}})
+
+
+def updateCountryState(country_alpha3_code: str, sources: dict, extra: dict = None, path: str = None) -> None:
+  """
+  Records freshly fetched sources of a country in the manifest, or once the enclosing
+  deferUpdates() block completes. Safe to call from concurrently running crawlers.
+
+  Args:
+    country_alpha3_code: ISO 3166-1 alpha-3 country code
+    sources: Source entries by key (a year such as "2025", or a dataset id), see sourceEntry()
+    extra: Optional other country-level fields to store
+    path: Manifest path, defaults to STATE_PATH
+  """
+  deferred = _deferred.get()
+  if deferred is not None:
+    deferred.append((country_alpha3_code, sources, extra, path))
+    return
+
+  path = path or STATE_PATH
+  with _lock:
+    state = loadCrawlState(path)
+    country = state.setdefault(country_alpha3_code.upper(), {"sources": {}})
+    country.setdefault("sources", {}).update(sources)
+    if extra:
+      country.update(extra)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+      with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=4, sort_keys=True)
+      os.chmod(tmpPath, 0o644)
+      os.replace(tmpPath, path)
+    except BaseException:
+      os.unlink(tmpPath)
+      raise
+
+
+@contextmanager
+def deferUpdates():
+  """
+  Holds back the updateCountryState() calls made in the block, and applies them when
+  the block completes. A crawl that fails before its output file is written leaves the
+  manifest as it was, instead of describing holidays that were never stored.
+  """
+  updates = []
+  token = _deferred.set(updates)
+  try:
+    yield
+  finally:
+    _deferred.reset(token)
+  for update in updates:
+    updateCountryState(*update)
+
+
+def sourceEntry(holidays: list, **fields) -> dict:
+  """
+  Builds the manifest entry of a fetched source.
+
+  Args:
+    holidays: Holidays the source returned
+    **fields: Any other fields to store with the entry
+
+  Returns:
+    Dictionary with 'years', 'digest' and 'fetched_on' fields
+  """
+  return {
+    "years": sorted(groupByYear(holidays)),
+    "digest": sourceDigest(holidays),
+    "fetched_on": datetime.now().replace(microsecond=0).isoformat(),
+    **fields
+  }
+
+
+def loadStoredHolidays(output_path: str) -> list:
+  """
+  Loads the holidays of an existing output file.
+
+  Returns:
+    List of holiday dictionaries, empty if the file is missing or unreadable
+  """
+  try:
+    with open(output_path, 'r', encoding='utf-8') as f:
+      return json.load(f).get('holidays', [])
+  except (OSError, json.JSONDecodeError, AttributeError):
+    return []
+
+
+def reusableSources(country_alpha3_code: str, stored_holidays: list, current_year: int = None) -> dict:
+  """
+  Finds the sources that do not need to be fetched again: those that only cover past
+  years and whose holidays are still in the output file exactly as they were fetched.
+
+  Args:
+    country_alpha3_code: ISO 3166-1 alpha-3 country code
+    stored_holidays: Holidays of the existing output file
+    current_year: Defaults to this year
+
+  Returns:
+    Manifest entries by source key
+  """
+  current_year = current_year or datetime.now().year
+  storedByYear = groupByYear(stored_holidays)
+
+  reusable = {}
+  for key, entry in getCountryState(country_alpha3_code).get("sources", {}).items():
+    years = entry.get("years") or []
+    if not years or max(years) >= current_year:
+      continue
+    stored = [holiday for year in years for holiday in storedByYear.get(year, [])]
+    if sourceDigest(stored) == entry.get("digest"):
+      reusable[key] = entry
+  return reusable
+
+
+def inYearRange(year: int, from_year: int = None, to_year: int = None) -> bool:
+  return (from_year is None or year >= from_year) and (to_year is None or year <= to_year)
+
+
+def mergeWithStored(stored_holidays: list, fresh_holidays: list, reused_sources: dict, from_year: int = None, to_year: int = None) -> list:
+  """
+  Combines freshly fetched holidays with the stored holidays of the sources that were
+  not fetched again.
+
+  Args:
+    stored_holidays: Holidays of the existing output file
+    fresh_holidays: Holidays fetched by this run
+    reused_sources: Manifest entries of the sources not fetched again, see reusableSources().
+      Only the stored holidays of the years they cover are kept
+    from_year: Optional first year to keep (inclusive)
+    to_year: Optional last year to keep (inclusive)
+
+  Returns:
+    List of holidays sorted by date
+  """
+  reusedYears = {year for entry in reused_sources.values() for year in entry.get("years") or []}
+
+  merged = [holiday for holiday in stored_holidays if yearOf(holiday) in reusedYears]
+  merged.extend(fresh_holidays)
+  merged = [holiday for holiday in merged if inYearRange(yearOf(holiday), from_year, to_year)]
+  merged.sort(key=lambda row: row['date'])
+  return merged
+
+
+def crawlYearsIncrementally(country_alpha3_code: str, output_path: str, fetch_years, from_year: int = None, to_year: int = None) -> list:
+  """
+  Runs a per-year crawl that skips past years already stored unchanged in the output file.
+
+  Args:
+    country_alpha3_code: ISO 3166-1 alpha-3 country code
+    output_path: Path of the country's JSON file
+    fetch_years: Function taking the set of years to skip and returning the holidays
+      of the years it fetched (dates as 'YYYY-MM-DD' strings)
+    from_year: Optional first year of the crawl (inclusive); stored years before it are dropped
+    to_year: Optional last year of the crawl (inclusive); stored years after it are dropped
+
+  Returns:
+    Holidays of the fetched years merged with the stored past years, sorted by date
+  """
+  stored = loadStoredHolidays(output_path)
+  reusable = {
+    key: entry for key, entry in reusableSources(country_alpha3_code, stored).items()
+    if inYearRange(int(key), from_year, to_year)
+  }
+  skipYears = {int(key) for key in reusable}
+  if skipYears:
+    print(f"{country_alpha3_code}: reusing stored holidays for {', '.join(str(year) for year in sorted(skipYears))}")
+
+  # Digests are taken of the holidays as the output file will hold them (trimmed and
+  # deduplicated), or reusableSources() would never find them unchanged
+  fresh = normalizeHolidays(fetch_years(skipYears), add_day=False)
+
+  updateCountryState(country_alpha3_code, {
+    str(year): sourceEntry(holidays) for year, holidays in groupByYear(fresh).items()
+  })
+  return mergeWithStored(stored, fresh, reusable, from_year, to_year)
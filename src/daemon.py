@@ -0,0 +1,152 @@
+import heapq
+import os
+import random
+import signal
+import threading
+import time
+
+from functions import getOutputPath, readHolidaysDigest
+from holiday_index import loadHolidayResults
+from holiday_store import STORE_PATH, writeHolidayStore
+
+# Re-check intervals in seconds. A country is checked again after MIN_INTERVAL when its
+# holidays just changed, or when its check failed; every check without a change
+# multiplies its interval by INTERVAL_GROWTH, up to MAX_INTERVAL.
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = 24 * 60 * 60
+INITIAL_INTERVAL = 60 * 60
+INTERVAL_GROWTH = 2
+
+# Random spread of each interval, so countries on the same site do not stay in step
+INTERVAL_JITTER = 0.1
+
+
+class RefreshSchedule:
+  """
+  When each country is due for its next check, on an interval that shortens when its
+  holidays changed recently and lengthens while they stay the same.
+  """
+
+  def __init__(self, country_codes: list, now: float, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL, seed: int = None):
+    """
+    Args:
+      country_codes: Alpha-3 codes of the countries to schedule, all due at `now`
+      now: Current time, in seconds of the daemon's clock
+      min_interval: Shortest interval, in seconds
+      max_interval: Longest interval, in seconds
+      seed: Optional seed of the interval jitter
+    """
+    self.min_interval = min_interval
+    self.max_interval = max(min_interval, max_interval)
+    self.intervals = {code: min(max(INITIAL_INTERVAL, min_interval), self.max_interval) for code in country_codes}
+    self._queue = [(now, code) for code in country_codes]
+    heapq.heapify(self._queue)
+    self._random = random.Random(seed)
+
+  def nextDue(self) -> float:
+    """
+    Returns the time of the next check, or None if no country is scheduled.
+    """
+    return self._queue[0][0] if self._queue else None
+
+  def popDue(self, now: float) -> list:
+    """
+    Removes and returns the codes of the countries due at `now`, earliest first.
+    """
+    due = []
+    while self._queue and self._queue[0][0] <= now:
+      due.append(heapq.heappop(self._queue)[1])
+    return due
+
+  def reschedule(self, country_code: str, changed: bool, now: float, failed: bool = False) -> float:
+    """
+    Schedules the next check of a country after one that just finished.
+
+    Args:
+      country_code: Alpha-3 code
+      changed: Whether the check changed the country's holidays
+      now: Current time, in seconds of the daemon's clock
+      failed: Whether the check failed (Eg, a network error or its budget ran out)
+
+    Returns:
+      Interval until the next check, in seconds
+    """
+    if failed:
+      # Retried soon, so an outage does not delay the next update by up to a day; the
+      # interval reached so far is kept for once the source answers again
+      interval = self.min_interval
+    elif changed:
+      interval = self.intervals[country_code] = self.min_interval
+    else:
+      interval = self.intervals[country_code] = min(self.intervals[country_code] * INTERVAL_GROWTH, self.max_interval)
+
+    delay = interval * (1 + self._random.uniform(-INTERVAL_JITTER, INTERVAL_JITTER))
+    heapq.heappush(self._queue, (now + delay, country_code))
+    return delay
+
+
+def _storedDigest(country_code: str) -> str:
+  path = getOutputPath(country_code)
+  try:
+    return readHolidaysDigest(path) if os.path.exists(path) else None
+  except (OSError, ValueError):
+    return None
+
+
+def runDaemon(country_codes: list, jobs: int, run_check, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL, time_budget: float = None, deadline: float = None, stop: threading.Event = None) -> int:
+  """
+  Keeps crawling countries until stopped, each on its own adaptive interval (see RefreshSchedule).
+
+  Parsers, the HTTP session and its connections, the HTTP cache and the parse process
+  pool stay loaded between checks, and a check whose pages all answer 304 Not Modified
+  ends without parsing anything. Changed holidays are written through
+  functions.writeJsonIfChanged, like a normal run, and the binary store is rebuilt.
+  Every check writes its own run metrics.
+
+  Args:
+    country_codes: Alpha-3 codes of the countries to crawl
+    jobs: Maximum number of crawlers running at the same time
+    run_check: crawl.runCheck, passed in by crawl.main() so that checks run in the
+      module it configured, even when crawl.py runs as a script (as __main__)
+    min_interval: Shortest interval between checks of a country, in seconds
+    max_interval: Longest interval between checks of a country, in seconds
+    time_budget: Optional seconds each country's check may take, see crawl.runCrawler()
+    deadline: Optional seconds each round of checks may take, from its start
+    stop: Event ending the daemon once set; SIGINT and SIGTERM set it when None
+
+  Returns:
+    Exit code, 0 once stopped
+  """
+  if stop is None:
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+      signal.signal(signum, lambda *_: stop.set())
+
+  schedule = RefreshSchedule(country_codes, time.monotonic(), min_interval, max_interval)
+  print(f"Daemon started: re-checking every {min_interval / 60:g} to {max_interval / 60:g} minutes")
+
+  while not stop.is_set():
+    due = schedule.popDue(time.monotonic())
+    if not due:
+      stop.wait(max(0.0, schedule.nextDue() - time.monotonic()))
+      continue
+
+    digests = {code: _storedDigest(code) for code in due}
+    results = run_check(due, jobs, time_budget, deadline)
+
+    now = time.monotonic()
+    changed = []
+    for result in results:
+      code = result["code"]
+      updated = result["success"] and not result["unchanged"] and _storedDigest(code) != digests[code]
+      if updated:
+        changed.append(code)
+      delay = schedule.reschedule(code, updated, now, failed=not result["success"])
+      print(f"  {code} next check in {delay / 60:.1f} min")
+
+    if changed:
+      writeHolidayStore(loadHolidayResults())
+      print(f"Binary holiday store written to {os.path.normpath(STORE_PATH)} ({', '.join(sorted(changed))} changed)")
+
+  print("Daemon stopped")
+  return 0
@@ -0,0 +1,247 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+import threading
+
+from holiday_index import DATA_DIR, HolidayIndex, loadHolidayResults, toDate
+from weekmasks import DEFAULT_WEEKMASK, WEEKMASKS
+
+# Separates the country code from the region in calendar names (Eg, "GBR:Scotland")
+REGION_SEPARATOR = ":"
+
+
+class DateIndex:
+  """
+  Inverted index from dates to the countries and regions with a holiday on them, for
+  queries across several markets at once.
+
+  Every country, and every region of a country, is a calendar with its own bit, and
+  each date maps to the bitmask of the calendars having a holiday on it. Calendars are
+  named by alpha-2 or alpha-3 code (Eg, "SGP"), or by code and region (Eg,
+  "GBR:Scotland"). As in HolidayIndex, a country named without a region has a holiday
+  when any of its regions does.
+
+  The index is built once and never modified afterwards, so a single instance can be
+  shared by any number of threads.
+  """
+
+  def __init__(self, results: list, weekmasks: dict = None):
+    """
+    Args:
+      results: List of result dictionaries (see functions.createHolidayResult)
+      weekmasks: Optional weekmask overrides by alpha-3 code (see weekmasks.WEEKMASKS)
+    """
+    weekmasks = {**WEEKMASKS, **(weekmasks or {})}
+    self._index = HolidayIndex(results)
+    self._bits = {}
+    self._names = []
+    self._ordinals = []
+    self._masks = {}
+    # Bitmask of the calendars not working on each weekday (0 = Monday)
+    self._weekends = [0] * 7
+    self._countries = 0
+
+    for code in self._index.countries():
+      weekmask = weekmasks.get(code, DEFAULT_WEEKMASK)
+      for region in [None] + self._index.regions(code):
+        bit = 1 << len(self._names)
+        self._bits[(code, region)] = bit
+        self._names.append(code if region is None else code + REGION_SEPARATOR + region)
+        self._ordinals.append(self._index.ordinals(code, region))
+        if region is None:
+          self._countries |= bit
+
+        for ordinal in self._ordinals[-1]:
+          self._masks[ordinal] = self._masks.get(ordinal, 0) | bit
+        for weekday, working in enumerate(weekmask):
+          if working == "0":
+            self._weekends[weekday] |= bit
+
+  @classmethod
+  def fromDirectory(cls, data_dir: str = DATA_DIR, weekmasks: dict = None) -> 'DateIndex':
+    return cls(loadHolidayResults(data_dir), weekmasks)
+
+  def calendars(self) -> list:
+    """
+    Returns the names of every calendar: each country, then each of its regions.
+    """
+    return list(self._names)
+
+  def _selection(self, calendars) -> int:
+    # Bitmask of the named calendars; every country when calendars is None
+    if calendars is None:
+      return self._countries
+
+    selection = 0
+    for name in calendars:
+      country, _, region = name.partition(REGION_SEPARATOR)
+      code = self._index.countryCode(country)
+      try:
+        selection |= self._bits[(code, region or None)]
+      except KeyError:
+        raise KeyError(f"Unknown region '{region}' for country '{country}'") from None
+
+    if not selection:
+      raise ValueError("No calendars selected")
+    return selection
+
+  def _namesOf(self, mask: int) -> list:
+    # Names of the calendars whose bits are set, in time proportional to their number
+    names = []
+    while mask:
+      lowest = mask & -mask
+      names.append(self._names[lowest.bit_length() - 1])
+      mask ^= lowest
+    return names
+
+  def _range(self, bit: int, first: int, last: int) -> tuple:
+    # Positions of a calendar's holidays between two ordinals (both inclusive)
+    ordinals = self._ordinals[bit.bit_length() - 1]
+    return ordinals, bisect_left(ordinals, first), bisect_right(ordinals, last)
+
+  def closedOn(self, day, calendars: list = None, weekends: bool = False) -> list:
+    """
+    Lists the calendars with a holiday on a date, in time proportional to the answer.
+
+    Args:
+      day: date, datetime or 'YYYY-MM-DD' string
+      calendars: Calendar names to check (default: every country)
+      weekends: Whether a calendar is also closed on its weekend days
+
+    Returns:
+      Names of the closed calendars, in index order
+    """
+    ordinal = toDate(day).toordinal()
+    closed = self._masks.get(ordinal, 0)
+    if weekends:
+      closed |= self._weekends[(ordinal - 1) % 7]
+    return self._namesOf(closed & self._selection(calendars))
+
+  def holidaysInAny(self, calendars: list, start, end) -> list:
+    """
+    Union: the dates between start and end (both inclusive) that are a holiday in at least
+    one of the calendars, in O(k log n + a log a) for k calendars and a answer entries.
+
+    Args:
+      calendars: Calendar names (Eg, ["SGP", "MYR", "GBR:Scotland"])
+      start: First date, as date, datetime or 'YYYY-MM-DD' string
+      end: Last date, as date, datetime or 'YYYY-MM-DD' string
+
+    Returns:
+      List of (date, names of the calendars with a holiday) tuples, sorted by date
+    """
+    selection = self._selection(calendars)
+    first = toDate(start).toordinal()
+    last = toDate(end).toordinal()
+
+    # Each holiday in the range is visited once; the calendars closed on a date come from its bitmask
+    ordinals = set()
+    remaining = selection
+    while remaining:
+      bit = remaining & -remaining
+      calendarOrdinals, low, high = self._range(bit, first, last)
+      ordinals.update(calendarOrdinals[low:high])
+      remaining ^= bit
+
+    masks = self._masks
+    return [(date.fromordinal(ordinal), self._namesOf(masks[ordinal] & selection)) for ordinal in sorted(ordinals)]
+
+  def holidaysInAll(self, calendars: list, start, end) -> list:
+    """
+    Intersection: the dates between start and end (both inclusive) that are a holiday in
+    every one of the calendars. Only the holidays of the calendar with the fewest in the
+    range are visited, each checked against the others in O(1).
+
+    Args:
+      calendars: Calendar names
+      start: First date, as date, datetime or 'YYYY-MM-DD' string
+      end: Last date, as date, datetime or 'YYYY-MM-DD' string
+
+    Returns:
+      List of dates, sorted
+    """
+    selection = self._selection(calendars)
+    first = toDate(start).toordinal()
+    last = toDate(end).toordinal()
+
+    sparsest = None
+    remaining = selection
+    while remaining:
+      bit = remaining & -remaining
+      candidate = self._range(bit, first, last)
+      if sparsest is None or candidate[2] - candidate[1] < sparsest[2] - sparsest[1]:
+        sparsest = candidate
+      remaining ^= bit
+
+    ordinals, low, high = sparsest
+    results = []
+    previous = None
+    for position in range(low, high):
+      ordinal = ordinals[position]
+      if ordinal != previous and self._masks[ordinal] & selection == selection:
+        results.append(date.fromordinal(ordinal))
+      previous = ordinal
+    return results
+
+  def nextBusinessDays(self, calendars: list, start, count: int, inclusive: bool = True) -> list:
+    """
+    Finds the next dates that are business days (a working weekday without a holiday) in
+    every one of the calendars. Each date visited is either returned or closed in one of
+    them, so the time grows with count plus the closed days skipped.
+
+    Args:
+      calendars: Calendar names
+      start: date, datetime or 'YYYY-MM-DD' string to search from
+      count: Number of dates to return
+      inclusive: Whether start itself can be returned
+
+    Returns:
+      List of count dates, sorted
+
+    Raises:
+      ValueError: If the calendars have no working weekday in common
+    """
+    selection = self._selection(calendars)
+    if all(weekend & selection for weekend in self._weekends):
+      raise ValueError("The calendars have no working weekday in common")
+
+    ordinal = toDate(start).toordinal() + (0 if inclusive else 1)
+    masks = self._masks
+    weekends = self._weekends
+    days = []
+    while len(days) < count:
+      if not (masks.get(ordinal, 0) | weekends[(ordinal - 1) % 7]) & selection:
+        days.append(date.fromordinal(ordinal))
+      ordinal += 1
+    return days
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def getDateIndex() -> DateIndex:
+  """
+  Returns the shared date index of the files in DATA_DIR, building it on first use.
+  """
+  global _default_index
+  if _default_index is None:
+    with _default_index_lock:
+      if _default_index is None:
+        _default_index = DateIndex.fromDirectory()
+  return _default_index
+
+
+def closedOn(day, calendars: list = None, weekends: bool = False) -> list:
+  return getDateIndex().closedOn(day, calendars, weekends)
+
+
+def holidaysInAny(calendars: list, start, end) -> list:
+  return getDateIndex().holidaysInAny(calendars, start, end)
+
+
+def holidaysInAll(calendars: list, start, end) -> list:
+  return getDateIndex().holidaysInAll(calendars, start, end)
+
+
+def nextBusinessDays(calendars: list, start, count: int, inclusive: bool = True) -> list:
+  return getDateIndex().nextBusinessDays(calendars, start, count, inclusive)
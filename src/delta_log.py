@@ -0,0 +1,180 @@
+from collections import defaultdict, deque
+import json
+import os
+import threading
+
+from holiday_index import DATA_DIR
+
+# Each country's log is 'deltas/{code}.jsonl', next to the 'data/' directory
+DELTAS_DIRNAME = 'deltas'
+
+_lock = threading.Lock()
+
+
+def getDeltasDir(data_dir: str = DATA_DIR) -> str:
+  return os.path.join(os.path.dirname(os.path.abspath(data_dir)), DELTAS_DIRNAME)
+
+
+def getDeltaLogPath(json_file_path: str) -> str:
+  """
+  Returns the delta log of a country file (Eg, '../data/chn.json' -> '../deltas/chn.jsonl').
+  """
+  name = os.path.splitext(os.path.basename(json_file_path))[0]
+  return os.path.join(getDeltasDir(os.path.dirname(os.path.abspath(json_file_path))), name + '.jsonl')
+
+
+def holidayKey(holiday: dict) -> tuple:
+  # Identity of a holiday entry: date, name and region; other fields (Eg, 'day') follow from these
+  region = holiday.get('region')
+  return holiday.get('date'), holiday.get('holiday'), tuple(region) if isinstance(region, list) else region
+
+
+def diffHolidays(old: list, new: list) -> dict:
+  """
+  Computes the structural difference between two holiday lists, keyed on date, holiday and region.
+
+  An entry that disappears while another appears on the same date and region is reported
+  as renamed rather than as a removal and an addition.
+
+  Args:
+    old: Previous holiday dictionaries
+    new: Current holiday dictionaries
+
+  Returns:
+    Dictionary with 'added' and 'removed' lists of holiday dictionaries, and a 'renamed'
+    list of {"from": old entry, "to": new entry}, each in the order of the input lists
+  """
+  oldByKey = {holidayKey(holiday): holiday for holiday in old}
+  newByKey = {holidayKey(holiday): holiday for holiday in new}
+
+  removedBySlot = defaultdict(deque)
+  for key, holiday in oldByKey.items():
+    if key not in newByKey:
+      removedBySlot[(key[0], key[2])].append(holiday)
+
+  added = []
+  renamed = []
+  for key, holiday in newByKey.items():
+    if key in oldByKey:
+      continue
+    slot = removedBySlot.get((key[0], key[2]))
+    if slot:
+      renamed.append({"from": slot.popleft(), "to": holiday})
+    else:
+      added.append(holiday)
+
+  renamedFrom = {id(change["from"]) for change in renamed}
+  removed = [holiday for key, holiday in oldByKey.items() if key not in newByKey and id(holiday) not in renamedFrom]
+
+  return {"added": added, "removed": removed, "renamed": renamed}
+
+
+def readDeltas(log_path: str) -> list:
+  """
+  Reads every record of a delta log, in sequence order. A partially written last line is ignored.
+
+  Args:
+    log_path: Path to a '.jsonl' delta log
+
+  Returns:
+    List of delta records (see appendDelta), empty if the log does not exist
+  """
+  try:
+    with open(log_path, 'r', encoding='utf-8') as f:
+      lines = f.read().splitlines()
+  except FileNotFoundError:
+    return []
+
+  records = []
+  for line in lines:
+    if not line.strip():
+      continue
+    try:
+      records.append(json.loads(line))
+    except json.JSONDecodeError:
+      print(f"Warning: Skipping unreadable line in {log_path}")
+  return records
+
+
+def appendDelta(log_path: str, changes: dict, holidays_digest: str, previous_digest: str, updated_on: str) -> int:
+  """
+  Appends a change record to a delta log and returns its sequence number.
+
+  Sequence numbers start at 1 and increase by one per record. If the last record already
+  describes the same transition (previous and new digests), it was written by a run that
+  failed before replacing the data file, and its sequence number is returned instead.
+  If the last record does not end at the previous digest, a reset record is written.
+
+  Args:
+    log_path: Path to a '.jsonl' delta log, created if missing
+    changes: Result of diffHolidays(), or {"reset": True} when the previous holidays are unknown
+    holidays_digest: Digest of the new holidays
+    previous_digest: Digest of the previous holidays, or None for a new file
+    updated_on: Timestamp of the new data
+
+  Returns:
+    Sequence number of the record
+  """
+  with _lock:
+    records = readDeltas(log_path)
+    if records:
+      last = records[-1]
+      if last.get('holidaysDigest') == holidays_digest and last.get('previousDigest') == previous_digest:
+        return last['sequence']
+      if last.get('holidaysDigest') != previous_digest:
+        # The log does not end at the previous data (Eg, the file was edited or deleted by hand)
+        changes = {"reset": True}
+
+    record = {
+      "sequence": records[-1]['sequence'] + 1 if records else 1,
+      "updated_on": updated_on,
+      "previousDigest": previous_digest,
+      "holidaysDigest": holidays_digest,
+      **changes
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+    with open(log_path, 'a+b') as f:
+      # Start on a new line if a previous append was cut short
+      f.seek(0, os.SEEK_END)
+      if f.tell() > 0:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b'\n':
+          f.write(b'\n')
+      f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+
+    return record['sequence']
+
+
+def changesSince(country_code: str, since: int, deltas_dir: str = None) -> dict:
+  """
+  Lists the changes of a country after a sequence number.
+
+  A client that loaded 'data/{code}.json' at 'deltaSequence' N (0 when the file has no
+  such field) stays current by applying, in order, the records returned for N: remove
+  'removed', replace every 'renamed' 'from' entry with its 'to' entry, then add 'added'.
+  When 'reset' is true, the changes cannot be replayed and the client reloads the file.
+
+  Args:
+    country_code: Alpha-3 code
+    since: Last sequence number the client has applied
+    deltas_dir: Delta log directory (default: deltas/ next to data/)
+
+  Returns:
+    Dictionary with 'countryAlpha3Code', the latest 'sequence', 'reset' and the 'changes' records
+  """
+  if since < 0:
+    raise ValueError(f"Invalid sequence number {since}")
+
+  path = os.path.join(deltas_dir or getDeltasDir(), country_code.lower() + '.jsonl')
+  records = readDeltas(path)
+  latest = records[-1]['sequence'] if records else 0
+  changes = [record for record in records if record['sequence'] > since]
+
+  return {
+    "countryAlpha3Code": country_code.upper(),
+    "sequence": latest,
+    # A client ahead of the log, or behind a reset, has to reload
+    "reset": since > latest or any(record.get('reset') for record in changes),
+    "changes": changes
+  }
@@ -1,8 +1,18 @@
-
-
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import contextvars
+import hashlib
 import json
 import os
+import re
+import tempfile
+
+from delta_log import appendDelta, diffHolidays, getDeltaLogPath
+import metrics
+
+# The digest is written before the holidays, so it is found in the first bytes of a file
+DIGEST_HEAD_BYTES = 4096
+DIGEST_PATTERN = re.compile(rb'"holidaysDigest":\s*"([0-9a-f]{64})"')
 
 
 def getOutputPath(country_alpha3_code: str) -> str:
@@ -54,79 +64,157 @@ def createHolidayResult(source_url: str, country: str, country_alpha2_code: str,
 
 
 
-def addMissingDayField(data: dict) -> dict:
+def mapConcurrently(func, items: list, max_workers: int = 4) -> list:
   """
-  Adds missing 'day' field to holiday entries by calculating the day of the week from the date.
+  Applies a function to every item on a thread pool.
+  Each call runs in a copy of the caller's context, so context variables
+  (e.g. the HTTP cache dependency tracker) are visible to the worker threads.
   
   Args:
-    data: Dictionary containing holiday data with 'holidays' array
+    func: Function taking a single item
+    items: Items to process
+    max_workers: Maximum number of calls running at the same time
     
   Returns:
-    Updated dictionary with 'day' fields added where missing
+    List of results, in the same order as items
   """
-  if 'holidays' not in data:
-    return data
+  with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+    futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def getHolidaysDigest(holidays: list) -> str:
+  """
+  Computes the SHA-256 digest of a canonical serialization of holidays:
+  entries sorted by date (stable), keys sorted, no whitespace, UTF-8.
+  Two lists with the same digest compare equal after sorting by date.
   
-  day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+  Args:
+    holidays: List of holiday dictionaries
+    
+  Returns:
+    Hex digest string
+  """
+  canonical = json.dumps(
+    sorted(holidays, key=lambda h: h.get('date', '')),
+    sort_keys=True,
+    ensure_ascii=False,
+    separators=(',', ':')
+  )
+  return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def readHolidaysDigest(json_file_path: str) -> str:
+  """
+  Reads the stored holidays digest from the head of a JSON file, without parsing the file.
+  Files written before digests were stored are parsed and hashed instead.
   
-  for holiday in data['holidays']:
-    if 'date' in holiday and 'day' not in holiday:
-      try:
-        # Parse the date string (format: YYYY-MM-DD)
-        date_obj = datetime.strptime(holiday['date'], '%Y-%m-%d')
-        # Get day of week (0 = Monday, 6 = Sunday)
-        day_index = date_obj.weekday()
-        holiday['day'] = day_names[day_index]
-      except (ValueError, KeyError) as e:
-        print(f"Warning: Could not parse date '{holiday.get('date', 'N/A')}': {e}")
-        continue
+  Args:
+    json_file_path: Path to an existing JSON file
+    
+  Returns:
+    Hex digest string
+  """
+  with open(json_file_path, 'rb') as f:
+    head = f.read(DIGEST_HEAD_BYTES)
   
-  return data
+  match = DIGEST_PATTERN.search(head)
+  if match and head.find(b'"holidays"', 0, match.start()) == -1:
+    return match.group(1).decode('ascii')
+  
+  with open(json_file_path, 'r', encoding='utf-8') as f:
+    return getHolidaysDigest(json.load(f).get('holidays', []))
+
+
+def withHolidaysDigest(result: dict) -> dict:
+  """
+  Returns a copy of result with a 'holidaysDigest' field placed just before 'holidays'.
+  """
+  output = {}
+  for key, value in result.items():
+    if key == 'holidaysDigest':
+      continue
+    if key == 'holidays':
+      output['holidaysDigest'] = getHolidaysDigest(value)
+    output[key] = value
+  return output
 
 
+def writeJsonAtomic(data: dict, json_file_path: str) -> None:
+  """
+  Writes a JSON file through a temporary file in the same directory and os.replace,
+  so readers see either the old or the new file, never a partial one.
+  
+  Args:
+    data: Dictionary to serialise
+    json_file_path: Path to the JSON file to write
+  """
+  fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(json_file_path)), prefix='.tmp-')
+  try:
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+      json.dump(data, f, indent=4)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, json_file_path)
+  except BaseException:
+    os.unlink(tmp_path)
+    raise
+
+
+def _withDeltaSequence(output: dict, sequence: int) -> dict:
+  # Places 'deltaSequence' just before 'holidaysDigest'
+  result = {}
+  for key, value in output.items():
+    if key == 'holidaysDigest':
+      result['deltaSequence'] = sequence
+    if key != 'deltaSequence':
+      result[key] = value
+  return result
+
+
+def _writeWithDelta(output: dict, json_file_path: str, previous_holidays: list, previous_digest: str) -> None:
+  # Appends the change to the country's delta log first, so a failed write is retried
+  # under the same sequence number, then writes the file with that sequence number
+  changes = diffHolidays(previous_holidays, output['holidays']) if previous_holidays is not None else {"reset": True}
+  sequence = appendDelta(getDeltaLogPath(json_file_path), changes, output['holidaysDigest'], previous_digest, output.get('updated_on'))
+  writeJsonAtomic(_withDeltaSequence(output, sequence), json_file_path)
+
+
+@metrics.timed("write")
 def writeJsonIfChanged(result: dict, json_file_path: str) -> None:
   """
   Writes JSON file only if the holidays data has changed compared to existing file.
+  Changes are detected by comparing the holidays digest with the one stored in the
+  existing file, so an unchanged file is not parsed.
+
+  Every write also appends the added, removed and renamed holidays to the country's
+  delta log (see delta_log), and stores the record's sequence number in the file.
   
   Args:
     result: Dictionary containing holiday data with 'holidays' array
     json_file_path: Path to the JSON file to write (relative to script location)
   """
-  file_exists = os.path.exists(json_file_path)
+  output = withHolidaysDigest(result)
   
-  if file_exists:
-    try:
-      with open(json_file_path, 'r', encoding='utf-8') as f:
-        existing_data = json.load(f)
-      
-      # Compare entire holiday objects (full payload comparison)
-      existing_holidays_list = existing_data.get('holidays', [])
-      new_holidays_list = result.get('holidays', [])
-      
-      # Sort both lists by date for comparison
-      def sort_by_date(holidays):
-        return sorted(holidays, key=lambda h: h.get('date', ''))
-      
-      existing_sorted = sort_by_date(existing_holidays_list)
-      new_sorted = sort_by_date(new_holidays_list)
-      
-      # Compare the full holiday objects
-      if existing_sorted == new_sorted:
-        print("No changes detected. Keeping existing file.")
-        print(f"Existing file last updated: {existing_data.get('updated_on', 'N/A')}")
-      else:
-        print("Changes detected. Updating file.")
-        with open(json_file_path, 'w', encoding='utf-8') as f:
-          json.dump(result, f, indent=4)
-        print(f"File updated: {result['updated_on']}")
-    except (json.JSONDecodeError, KeyError, IOError) as e:
-      print(f"Error reading existing file: {e}. Overwriting with new data.")
-      with open(json_file_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=4)
-      print(f"File created/updated: {result['updated_on']}")
-  else:
+  if not os.path.exists(json_file_path):
     print("File does not exist. Creating new file.")
-    with open(json_file_path, 'w', encoding='utf-8') as f:
-      json.dump(result, f, indent=4)
+    _writeWithDelta(output, json_file_path, [], None)
     print(f"File created: {result['updated_on']}")
+    return
+
+  # Only reading the existing file is guarded: a failed write is raised, rather than
+  # retried as a reset of the delta log
+  try:
+    existing_digest = readHolidaysDigest(json_file_path)
+    if existing_digest == output['holidaysDigest']:
+      print("No changes detected. Keeping existing file.")
+      return
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+      previous_holidays = json.load(f)['holidays']
+  except (json.JSONDecodeError, KeyError, AttributeError, IOError) as e:
+    print(f"Error reading existing file: {e}. Overwriting with new data.")
+    existing_digest, previous_holidays = None, None
+  else:
+    print("Changes detected. Updating file.")
 
+  _writeWithDelta(output, json_file_path, previous_holidays, existing_digest)
+  print(f"File updated: {result['updated_on']}")
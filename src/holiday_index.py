@@ -0,0 +1,273 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+import glob
+import json
+import os
+import threading
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+# Holidays tagged with this region apply to every region of the country
+ALL_REGIONS = "All"
+
+# Day bitsets are kept in blocks of 512 days, so a lookup only shifts a small int
+BLOCK_SHIFT = 9
+BLOCK_MASK = (1 << BLOCK_SHIFT) - 1
+
+
+def toDate(value) -> date:
+  """
+  Converts a date, datetime or 'YYYY-MM-DD' string to a date.
+  """
+  if isinstance(value, datetime):
+    return value.date()
+  if isinstance(value, date):
+    return value
+  return date.fromisoformat(value)
+
+
+def loadHolidayResults(data_dir: str = DATA_DIR) -> list:
+  """
+  Loads every holiday JSON file written by the crawlers.
+
+  Args:
+    data_dir: Directory containing the '{code}.json' files
+
+  Returns:
+    List of result dictionaries (see functions.createHolidayResult)
+  """
+  results = []
+  for path in sorted(glob.glob(os.path.join(data_dir, '*.json'))):
+    with open(path, 'r', encoding='utf-8') as f:
+      data = json.load(f)
+    if isinstance(data, dict) and 'countryAlpha3Code' in data and 'holidays' in data:
+      results.append(data)
+  return results
+
+
+def appliesToRegion(holiday: dict, region: str) -> bool:
+  """
+  Whether a holiday applies to a region: it is tagged with that region, or with "All".
+  """
+  regions = holiday.get('region') or ()
+  return region in regions or (region != ALL_REGIONS and ALL_REGIONS in regions)
+
+
+def getRegions(result: dict) -> list:
+  """
+  Lists the regions of a result: its 'countryRegions', then any other region found in its holidays.
+  """
+  regions = list(result.get('countryRegions') or ())
+  for holiday in result['holidays']:
+    for region in holiday.get('region') or ():
+      if region not in regions:
+        regions.append(region)
+  return regions
+
+
+class _Calendar:
+  """
+  Holidays of one country (optionally restricted to one region).
+
+  bits splits date ordinals into 512-day blocks and maps each block number to
+  an int whose bit n is set when day n of the block is a holiday; ordinals holds the
+  sorted date ordinals of entries, for binary search.
+  """
+  __slots__ = ('bits', 'ordinals', 'entries')
+
+  def __init__(self, entries: list):
+    entries = sorted(entries, key=lambda entry: entry[0])
+    self.entries = [holiday for _, holiday in entries]
+    self.ordinals = array('i', (day.toordinal() for day, _ in entries))
+    self.bits = {}
+    for ordinal in self.ordinals:
+      block = ordinal >> BLOCK_SHIFT
+      self.bits[block] = self.bits.get(block, 0) | (1 << (ordinal & BLOCK_MASK))
+
+
+class HolidayIndex:
+  """
+  Read-only, in-memory index of the crawled holidays for fast date lookups.
+
+  The index is built once and never modified afterwards, so a single instance can be
+  shared by any number of threads.
+
+  Countries are looked up by alpha-2 or alpha-3 code, case-insensitively. Regions follow
+  the 'region' arrays of the data (e.g. GBR): a holiday tagged "All" belongs to every
+  region. Without a region, a date is a holiday if it is one in any region.
+  """
+
+  def __init__(self, results: list):
+    """
+    Args:
+      results: List of result dictionaries (see functions.createHolidayResult)
+    """
+    self._calendars = {}
+    self._regions = {}
+    self._codes = {}
+
+    for result in results:
+      code = result['countryAlpha3Code'].upper()
+      self._codes[code] = code
+      if result.get('countryAlpha2Code'):
+        self._codes[result['countryAlpha2Code'].upper()] = code
+
+      entries = [(toDate(holiday['date']), holiday) for holiday in result['holidays']]
+
+      regions = getRegions(result)
+      self._regions[code] = regions
+
+      calendars = {None: _Calendar(entries)}
+      for region in regions:
+        calendars[region] = _Calendar([entry for entry in entries if appliesToRegion(entry[1], region)])
+      self._calendars[code] = calendars
+
+  @classmethod
+  def fromDirectory(cls, data_dir: str = DATA_DIR) -> 'HolidayIndex':
+    """
+    Builds an index from the JSON files in a data directory.
+
+    Args:
+      data_dir: Directory containing the '{code}.json' files
+
+    Returns:
+      HolidayIndex
+    """
+    return cls(loadHolidayResults(data_dir))
+
+  def countries(self) -> list:
+    """
+    Returns the alpha-3 codes of the indexed countries.
+    """
+    return sorted(self._calendars)
+
+  def regions(self, country: str) -> list:
+    """
+    Returns the regions of a country (its 'countryRegions', or the regions found in its holidays).
+    """
+    return list(self._regions[self.countryCode(country)])
+
+  def countryCode(self, country: str) -> str:
+    """
+    Returns the alpha-3 code of a country given by alpha-2 or alpha-3 code.
+    """
+    try:
+      return self._codes[country.upper()]
+    except KeyError:
+      raise KeyError(f"Unknown country '{country}'") from None
+
+  def _calendar(self, country: str, region: str) -> _Calendar:
+    calendars = self._calendars[self.countryCode(country)]
+    try:
+      return calendars[region]
+    except KeyError:
+      raise KeyError(f"Unknown region '{region}' for country '{country}'") from None
+
+  def ordinals(self, country: str, region: str = None) -> array:
+    """
+    Returns the sorted date ordinals of a country's holidays (one per entry, so a date
+    may repeat). The array is shared; do not modify it.
+    """
+    return self._calendar(country, region).ordinals
+
+  def isHoliday(self, country: str, day, region: str = None) -> bool:
+    """
+    Checks whether a date is a holiday, in O(1).
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      day: date, datetime or 'YYYY-MM-DD' string
+      region: Optional region name (e.g. "Scotland")
+
+    Returns:
+      True if the date is a holiday
+    """
+    ordinal = toDate(day).toordinal()
+    return (self._calendar(country, region).bits.get(ordinal >> BLOCK_SHIFT, 0) >> (ordinal & BLOCK_MASK)) & 1 == 1
+
+  def nextHoliday(self, country: str, day, region: str = None, inclusive: bool = False) -> dict:
+    """
+    Finds the first holiday after a date, in O(log n).
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      day: date, datetime or 'YYYY-MM-DD' string
+      region: Optional region name
+      inclusive: Whether a holiday on the date itself counts
+
+    Returns:
+      Holiday dictionary as stored in the data file, or None if there is none
+    """
+    calendar = self._calendar(country, region)
+    ordinal = toDate(day).toordinal()
+    position = bisect_left(calendar.ordinals, ordinal) if inclusive else bisect_right(calendar.ordinals, ordinal)
+    return dict(calendar.entries[position]) if position < len(calendar.entries) else None
+
+  def previousHoliday(self, country: str, day, region: str = None, inclusive: bool = False) -> dict:
+    """
+    Finds the last holiday before a date, in O(log n).
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      day: date, datetime or 'YYYY-MM-DD' string
+      region: Optional region name
+      inclusive: Whether a holiday on the date itself counts
+
+    Returns:
+      Holiday dictionary as stored in the data file, or None if there is none
+    """
+    calendar = self._calendar(country, region)
+    ordinal = toDate(day).toordinal()
+    position = bisect_right(calendar.ordinals, ordinal) if inclusive else bisect_left(calendar.ordinals, ordinal)
+    return dict(calendar.entries[position - 1]) if position > 0 else None
+
+  def holidaysBetween(self, country: str, start, end, region: str = None) -> list:
+    """
+    Lists the holidays between two dates (both inclusive), in O(log n + k).
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      start: First date, as date, datetime or 'YYYY-MM-DD' string
+      end: Last date, as date, datetime or 'YYYY-MM-DD' string
+      region: Optional region name
+
+    Returns:
+      List of holiday dictionaries sorted by date
+    """
+    calendar = self._calendar(country, region)
+    first = bisect_left(calendar.ordinals, toDate(start).toordinal())
+    last = bisect_right(calendar.ordinals, toDate(end).toordinal())
+    return [dict(holiday) for holiday in calendar.entries[first:last]]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def getHolidayIndex() -> HolidayIndex:
+  """
+  Returns the shared index of the files in DATA_DIR, building it on first use.
+  """
+  global _default_index
+  if _default_index is None:
+    with _default_index_lock:
+      if _default_index is None:
+        _default_index = HolidayIndex.fromDirectory()
+  return _default_index
+
+
+def isHoliday(country: str, day, region: str = None) -> bool:
+  return getHolidayIndex().isHoliday(country, day, region)
+
+
+def nextHoliday(country: str, day, region: str = None, inclusive: bool = False) -> dict:
+  return getHolidayIndex().nextHoliday(country, day, region, inclusive)
+
+
+def previousHoliday(country: str, day, region: str = None, inclusive: bool = False) -> dict:
+  return getHolidayIndex().previousHoliday(country, day, region, inclusive)
+
+
+def holidaysBetween(country: str, start, end, region: str = None) -> list:
+  return getHolidayIndex().holidaysBetween(country, start, end, region)
@@ -0,0 +1,239 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
+import mmap
+import os
+import struct
+import tempfile
+
+from holiday_index import DATA_DIR, appliesToRegion, getRegions, loadHolidayResults, toDate
+
+STORE_PATH = os.path.join(DATA_DIR, 'holidays.bin')
+
+# File layout (little-endian), version 1:
+#
+#   header      HEADER struct
+#   directory   one DIRECTORY_ENTRY per calendar (a country, or one of its regions)
+#   bitmaps     BITMAP_SIZE bytes per calendar year; bit n-1 is set when day-of-year n is a holiday
+#   records     one RECORD per holiday (date ordinal, name offset), sorted by date within a calendar
+#   strings     u16 length + UTF-8 bytes, referenced by byte offset from the start of the section
+MAGIC = b'PHOLBIN\0'
+VERSION = 1
+HEADER = struct.Struct('<8sHHI4I')
+DIRECTORY_ENTRY = struct.Struct('<3s2s3xIIHHIII')
+RECORD = struct.Struct('<II')
+STRING_LENGTH = struct.Struct('<H')
+BITMAP_SIZE = 48
+NO_STRING = 0xFFFFFFFF
+
+
+class _StringTable:
+
+  def __init__(self):
+    self.data = bytearray()
+    self.offsets = {}
+
+  def add(self, value: str) -> int:
+    if value is None:
+      return NO_STRING
+    if value not in self.offsets:
+      encoded = value.encode('utf-8')
+      self.offsets[value] = len(self.data)
+      self.data += STRING_LENGTH.pack(len(encoded)) + encoded
+    return self.offsets[value]
+
+
+def writeHolidayStore(results: list, path: str = STORE_PATH) -> None:
+  """
+  Writes the holidays of every country into one binary file, atomically.
+
+  Args:
+    results: List of result dictionaries (see functions.createHolidayResult)
+    path: Output file path
+  """
+  strings = _StringTable()
+  directory = bytearray()
+  bitmaps = bytearray()
+  records = bytearray()
+  calendarCount = 0
+
+  for result in sorted(results, key=lambda r: r['countryAlpha3Code']):
+    holidays = sorted(
+      ((toDate(holiday['date']), holiday) for holiday in result['holidays']),
+      key=lambda entry: entry[0]
+    )
+    calendars = [(None, holidays)]
+    for region in getRegions(result):
+      calendars.append((region, [entry for entry in holidays if appliesToRegion(entry[1], region)]))
+
+    for region, entries in calendars:
+      firstYear = entries[0][0].year if entries else 0
+      yearCount = entries[-1][0].year - firstYear + 1 if entries else 0
+      bitmapIndex = len(bitmaps) // BITMAP_SIZE
+      recordStart = len(records) // RECORD.size
+
+      years = bytearray(BITMAP_SIZE * yearCount)
+      for day, holiday in entries:
+        bit = day.timetuple().tm_yday - 1
+        years[(day.year - firstYear) * BITMAP_SIZE + bit // 8] |= 1 << (bit % 8)
+        records += RECORD.pack(day.toordinal(), strings.add(holiday['holiday']))
+      bitmaps += years
+
+      directory += DIRECTORY_ENTRY.pack(
+        result['countryAlpha3Code'].upper().encode('ascii'),
+        (result.get('countryAlpha2Code') or '').upper().encode('ascii'),
+        strings.add(region),
+        strings.add(result.get('country')),
+        firstYear,
+        yearCount,
+        bitmapIndex,
+        recordStart,
+        len(entries)
+      )
+      calendarCount += 1
+
+  directoryOffset = HEADER.size
+  bitmapOffset = directoryOffset + len(directory)
+  recordOffset = bitmapOffset + len(bitmaps)
+  stringOffset = recordOffset + len(records)
+  header = HEADER.pack(MAGIC, VERSION, 0, calendarCount, directoryOffset, bitmapOffset, recordOffset, stringOffset)
+
+  fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(header + directory + bitmaps + records + strings.data)
+    os.chmod(tmpPath, 0o644)
+    os.replace(tmpPath, path)
+  except BaseException:
+    os.unlink(tmpPath)
+    raise
+
+
+class HolidayStore:
+  """
+  Reader for files written by writeHolidayStore.
+
+  The file is memory-mapped, so processes on the same host share a single page-cache
+  copy, and opening it only decodes the small calendar directory. Lookups read the
+  mapped bytes directly. Instances are read-only and can be shared between threads.
+
+  Regions behave as in holiday_index.HolidayIndex.
+  """
+
+  def __init__(self, path: str = STORE_PATH):
+    with open(path, 'rb') as f:
+      self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, calendarCount, directoryOffset, self._bitmapOffset, self._recordOffset, self._stringOffset = HEADER.unpack_from(self._map, 0)
+    if magic != MAGIC:
+      raise ValueError(f"{path} is not a holiday store")
+    if version != VERSION:
+      raise ValueError(f"Unsupported holiday store version {version} in {path}")
+
+    self._calendars = {}
+    self._codes = {}
+    self._names = {}
+    for index in range(calendarCount):
+      alpha3, alpha2, regionOffset, nameOffset, firstYear, yearCount, bitmapIndex, recordStart, recordCount = DIRECTORY_ENTRY.unpack_from(self._map, directoryOffset + index * DIRECTORY_ENTRY.size)
+      code = alpha3.decode('ascii')
+      self._codes[code] = code
+      if alpha2:
+        self._codes[alpha2.decode('ascii')] = code
+      self._names[code] = self._string(nameOffset)
+      self._calendars[(code, self._string(regionOffset))] = (firstYear, yearCount, bitmapIndex, recordStart, recordCount)
+
+  def close(self) -> None:
+    self._map.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def _string(self, offset: int) -> str:
+    if offset == NO_STRING:
+      return None
+    position = self._stringOffset + offset
+    (length,) = STRING_LENGTH.unpack_from(self._map, position)
+    start = position + STRING_LENGTH.size
+    return self._map[start:start + length].decode('utf-8')
+
+  def _calendar(self, country: str, region: str) -> tuple:
+    try:
+      code = self._codes[country.upper()]
+    except KeyError:
+      raise KeyError(f"Unknown country '{country}'") from None
+    try:
+      return self._calendars[(code, region)]
+    except KeyError:
+      raise KeyError(f"Unknown region '{region}' for country '{country}'") from None
+
+  def countries(self) -> list:
+    return sorted(self._names)
+
+  def regions(self, country: str) -> list:
+    code = self._codes[country.upper()]
+    return [region for (calendarCode, region) in self._calendars if calendarCode == code and region is not None]
+
+  def isHoliday(self, country: str, day, region: str = None) -> bool:
+    """
+    Checks whether a date is a holiday by testing one bit of the mapped file.
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      day: date, datetime or 'YYYY-MM-DD' string
+      region: Optional region name (e.g. "Scotland")
+    """
+    firstYear, yearCount, bitmapIndex, _, _ = self._calendar(country, region)
+    day = toDate(day)
+    yearIndex = day.year - firstYear
+    if yearIndex < 0 or yearIndex >= yearCount:
+      return False
+    bit = day.timetuple().tm_yday - 1
+    return (self._map[self._bitmapOffset + (bitmapIndex + yearIndex) * BITMAP_SIZE + bit // 8] >> (bit % 8)) & 1 == 1
+
+  def _ordinalAt(self, index: int) -> int:
+    return RECORD.unpack_from(self._map, self._recordOffset + index * RECORD.size)[0]
+
+  def holidaysBetween(self, country: str, start, end, region: str = None) -> list:
+    """
+    Lists the holidays between two dates (both inclusive), using binary search over the records.
+
+    Args:
+      country: Alpha-2 or alpha-3 country code
+      start: First date, as date, datetime or 'YYYY-MM-DD' string
+      end: Last date, as date, datetime or 'YYYY-MM-DD' string
+      region: Optional region name
+
+    Returns:
+      List of dictionaries with 'date' and 'holiday' fields, sorted by date
+    """
+    _, _, _, recordStart, recordCount = self._calendar(country, region)
+    ordinals = _RecordOrdinals(self, recordStart, recordCount)
+    first = bisect_left(ordinals, toDate(start).toordinal())
+    last = bisect_right(ordinals, toDate(end).toordinal())
+
+    holidays = []
+    for index in range(recordStart + first, recordStart + last):
+      ordinal, nameOffset = RECORD.unpack_from(self._map, self._recordOffset + index * RECORD.size)
+      holidays.append({"date": date.fromordinal(ordinal).isoformat(), "holiday": self._string(nameOffset)})
+    return holidays
+
+
+class _RecordOrdinals:
+  # Sequence view over the date ordinals of one calendar, for bisect
+
+  def __init__(self, store: HolidayStore, start: int, count: int):
+    self._store = store
+    self._start = start
+    self._count = count
+
+  def __len__(self) -> int:
+    return self._count
+
+  def __getitem__(self, index: int) -> int:
+    return self._store._ordinalAt(self._start + index)
+
+
+if __name__ == "__main__":
+  writeHolidayStore(loadHolidayResults())
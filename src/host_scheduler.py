@@ -0,0 +1,222 @@
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+import contextlib
+from email.utils import parsedate_to_datetime
+import threading
+import time
+from urllib.parse import urlsplit
+
+import budget
+
+# Default limits per host: sustained requests per second, requests allowed back to back,
+# and requests in progress at the same time
+HOST_RATE = 4.0
+HOST_BURST = 4
+HOST_CONCURRENCY = 4
+
+# Limits that differ from the defaults, by host name.
+# Eg, {"www.officeholidays.com": {"rate": 1.0, "burst": 2, "concurrency": 2}}
+HOST_LIMITS = {}
+
+# On 429/503 the host's rate is multiplied by RATE_BACKOFF (down to MIN_RATE); every
+# successful response then gives back RATE_RECOVERY of its configured rate
+RATE_BACKOFF = 0.5
+RATE_RECOVERY = 0.1
+MIN_RATE = 0.2
+THROTTLE_STATUSES = (429, 503)
+
+# Longest Retry-After honoured, in seconds
+MAX_RETRY_AFTER = 300
+
+
+def hostKey(url_or_host: str) -> str:
+  # Eg, "https://holidays-calendar.net/calendar_en/china_en.html" -> "holidays-calendar.net"
+  if "://" in url_or_host:
+    return (urlsplit(url_or_host).hostname or "").lower()
+  return url_or_host.lower()
+
+
+def parseRetryAfter(value: str) -> float:
+  """
+  Parses a Retry-After header, in seconds or as an HTTP date.
+
+  Returns:
+    Seconds to wait (at most MAX_RETRY_AFTER), or None if the value is missing or invalid
+  """
+  if not value:
+    return None
+  value = value.strip()
+  if value.isdigit():
+    seconds = float(value)
+  else:
+    try:
+      seconds = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+      return None
+  return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class _Host:
+  # Token bucket, concurrency slots and Retry-After deadline of one host
+  def __init__(self, rate: float, burst: int, concurrency: int):
+    self.max_rate = rate
+    self.rate = rate
+    self.burst = burst
+    self.tokens = float(burst)
+    self.updated = time.monotonic()
+    self.blocked_until = 0.0
+    self.slots = threading.BoundedSemaphore(concurrency)
+    self.lock = threading.Lock()
+
+  def takeToken(self) -> float:
+    # Takes a token and returns 0, or returns the seconds to wait before trying again
+    with self.lock:
+      now = time.monotonic()
+      if now < self.blocked_until:
+        return self.blocked_until - now
+      self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+      self.updated = now
+      if self.tokens >= 1:
+        self.tokens -= 1
+        return 0.0
+      return (1 - self.tokens) / self.rate
+
+
+class HostScheduler:
+  """
+  Paces the requests of every crawler per host, and lets concurrent callers fetching the
+  same URL share one request.
+
+  Each host gets a token bucket (HOST_RATE requests per second, bursts of HOST_BURST) and
+  at most HOST_CONCURRENCY requests in progress. A throttling response (429/503) halves the
+  host's rate and, with a Retry-After header, holds every request to the host until then;
+  successful responses bring the rate back up to its configured value.
+  """
+
+  def __init__(self, rate: float = None, burst: int = None, concurrency: int = None, limits: dict = None):
+    """
+    Args:
+      rate: Default requests per second per host (default: HOST_RATE)
+      burst: Default burst size per host (default: HOST_BURST)
+      concurrency: Default requests in progress per host (default: HOST_CONCURRENCY)
+      limits: Per-host overrides, see HOST_LIMITS
+    """
+    self.defaults = {
+      "rate": rate or HOST_RATE,
+      "burst": burst or HOST_BURST,
+      "concurrency": concurrency or HOST_CONCURRENCY
+    }
+    self.limits = {hostKey(host): values for host, values in {**HOST_LIMITS, **(limits or {})}.items()}
+    self._hosts = {}
+    self._inflight = {}
+    self._lock = threading.Lock()
+
+  def _host(self, url_or_host: str) -> _Host:
+    key = hostKey(url_or_host)
+    with self._lock:
+      host = self._hosts.get(key)
+      if host is None:
+        limits = {**self.defaults, **self.limits.get(key, {})}
+        host = self._hosts[key] = _Host(limits["rate"], limits["burst"], limits["concurrency"])
+      return host
+
+  @contextlib.contextmanager
+  def slot(self, url: str):
+    """
+    Waits for a concurrency slot and a token of the URL's host, and holds the slot
+    for the duration of the with block.
+
+    Raises:
+      budget.BudgetExceeded: If the current crawl's budget runs out before the host is ready
+    """
+    host = self._host(url)
+    left = budget.remaining()
+    if not host.slots.acquire(timeout=None if left is None else max(left, 0)):
+      raise budget.BudgetExceeded()
+    try:
+      while True:
+        delay = host.takeToken()
+        if not delay:
+          break
+        left = budget.remaining()
+        if left is not None and left < delay:
+          raise budget.BudgetExceeded()
+        time.sleep(delay)
+      yield
+    finally:
+      host.slots.release()
+
+  def observe(self, url_or_host: str, status: int, retry_after: str = None) -> None:
+    """
+    Adapts a host's pace to one of its responses.
+
+    Args:
+      url_or_host: URL or host name
+      status: HTTP status code
+      retry_after: Value of the Retry-After header, if any
+    """
+    host = self._host(url_or_host)
+    with host.lock:
+      if status in THROTTLE_STATUSES:
+        host.rate = max(MIN_RATE, host.rate * RATE_BACKOFF)
+        host.tokens = min(host.tokens, 0.0)
+        delay = parseRetryAfter(retry_after)
+        if delay:
+          host.blocked_until = max(host.blocked_until, time.monotonic() + delay)
+          print(f"Warning: {hostKey(url_or_host)} asked to retry after {delay:.0f}s, pausing its requests")
+      elif status < 400:
+        host.rate = min(host.max_rate, host.rate + host.max_rate * RATE_RECOVERY)
+
+  def coalesce(self, key: str, func) -> tuple:
+    """
+    Runs func, unless a call with the same key is already in progress, in which case its
+    result (or exception) is shared instead. When the call in progress ran out of its own
+    crawl's time budget, the waiting callers do not share that error, but try again.
+
+    Args:
+      key: Request key (Eg, the URL)
+      func: Function without arguments
+
+    Returns:
+      Tuple of (result, shared), shared being True for a result obtained by another caller
+    """
+    while True:
+      with self._lock:
+        future = self._inflight.get(key)
+        if future is None:
+          future = self._inflight[key] = Future()
+          break
+
+      try:
+        return future.result(timeout=budget.remaining()), True
+      except FutureTimeoutError:
+        raise budget.BudgetExceeded() from None
+      except budget.BudgetExceeded:
+        # The budget of the caller that made the request, not necessarily this one's
+        continue
+
+    try:
+      result = func()
+    except BaseException as e:
+      future.set_exception(e)
+      raise
+    else:
+      future.set_result(result)
+      return result, False
+    finally:
+      with self._lock:
+        del self._inflight[key]
+
+
+_scheduler = HostScheduler()
+
+
+def configure(rate: float = None, burst: int = None, concurrency: int = None, limits: dict = None) -> None:
+  """
+  Replaces the shared scheduler with one using new limits. Call before the first crawl.
+  """
+  global _scheduler
+  _scheduler = HostScheduler(rate, burst, concurrency, limits)
+
+
+def getScheduler() -> HostScheduler:
+  return _scheduler
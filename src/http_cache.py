@@ -0,0 +1,354 @@
+import contextvars
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from functions import mapConcurrently
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'http')
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+# Entries revalidated during this process are served without another request for this long
+FRESH_SECONDS = 300
+
+_enabled = True
+_lock = threading.Lock()
+_validated = {}
+_tracker = contextvars.ContextVar("http_cache_tracker", default=None)
+
+
+def configure(enabled: bool = None, directory: str = None, max_bytes: int = None) -> None:
+  """
+  Changes the cache settings for the current process.
+
+  Args:
+    enabled: False to bypass the cache entirely (e.g. for --no-cache)
+    directory: Directory holding cached responses
+    max_bytes: Total size of cached bodies above which least recently used entries are evicted
+  """
+  global _enabled, CACHE_DIR, MAX_CACHE_BYTES
+  if enabled is not None:
+    _enabled = enabled
+  if directory is not None:
+    CACHE_DIR = directory
+  if max_bytes is not None:
+    MAX_CACHE_BYTES = max_bytes
+
+
+def isEnabled() -> bool:
+  return _enabled
+
+
+def _entryPath(url: str) -> str:
+  key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+  return os.path.join(CACHE_DIR, key)
+
+
+def _writeAtomic(path: str, content: bytes) -> None:
+  fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(content)
+    os.replace(tmpPath, path)
+  except BaseException:
+    os.unlink(tmpPath)
+    raise
+
+
+def lookup(url: str) -> dict:
+  """
+  Loads the cached metadata for a URL.
+
+  Args:
+    url: Absolute URL, including any query string
+
+  Returns:
+    Metadata dictionary ('url', 'etag', 'last_modified', 'headers'), or None when not cached
+  """
+  if not _enabled:
+    return None
+  try:
+    with open(_entryPath(url) + '.json', 'r', encoding='utf-8') as f:
+      entry = json.load(f)
+  except (OSError, json.JSONDecodeError):
+    return None
+  if entry.get('url') != url or not os.path.exists(_entryPath(url) + '.body'):
+    return None
+  return entry
+
+
+def isFresh(url: str) -> bool:
+  """
+  Whether the URL was already fetched or revalidated by this process within FRESH_SECONDS.
+  """
+  validatedAt = _validated.get(url)
+  return validatedAt is not None and time.monotonic() - validatedAt < FRESH_SECONDS
+
+
+def conditionalHeaders(entry: dict) -> dict:
+  """
+  Builds the If-None-Match / If-Modified-Since headers for a cached entry.
+
+  Args:
+    entry: Metadata returned by lookup(), or None
+
+  Returns:
+    Dictionary of request headers (empty when there is nothing to revalidate)
+  """
+  headers = {}
+  if entry:
+    if entry.get('etag'):
+      headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+      headers['If-Modified-Since'] = entry['last_modified']
+  return headers
+
+
+def _newEntry(url: str, headers) -> dict:
+  # Metadata of a response to cache, or None when it cannot be revalidated (no ETag or Last-Modified)
+  etag = headers.get('ETag')
+  lastModified = headers.get('Last-Modified')
+  if not _enabled or (not etag and not lastModified):
+    return None
+  return {
+    "url": url,
+    "etag": etag,
+    "last_modified": lastModified,
+    "headers": {name: headers[name] for name in ('Content-Type',) if name in headers},
+    "stored_on": time.time()
+  }
+
+
+def store(url: str, response: requests.Response) -> None:
+  """
+  Stores a successful response body and its validators, then evicts old entries if needed.
+  Responses without an ETag or Last-Modified header are not cached.
+
+  Args:
+    url: Absolute URL, including any query string
+    response: The 200 response to cache
+  """
+  _validated[url] = time.monotonic()
+
+  entry = _newEntry(url, response.headers)
+  if entry is None:
+    return
+  path = _entryPath(url)
+  os.makedirs(CACHE_DIR, exist_ok=True)
+  _writeAtomic(path + '.body', response.content)
+  _writeAtomic(path + '.json', json.dumps(entry).encode('utf-8'))
+  evict()
+
+
+def storeStream(url: str, chunks, headers):
+  """
+  Like store(), for a body read in chunks: yields the chunks on while writing them to a
+  temporary file, moved into place once the body is complete, so the body is never
+  held in memory. Nothing is stored when the caller stops before the end.
+
+  Args:
+    url: Absolute URL, including any query string
+    chunks: Iterator of body chunks (bytes)
+    headers: Response headers
+
+  Yields:
+    The same chunks
+  """
+  entry = _newEntry(url, headers)
+  if entry is None:
+    yield from chunks
+    _validated[url] = time.monotonic()
+    return
+
+  path = _entryPath(url)
+  os.makedirs(CACHE_DIR, exist_ok=True)
+  fd, tmpPath = tempfile.mkstemp(dir=CACHE_DIR, prefix='.tmp-')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      for chunk in chunks:
+        f.write(chunk)
+        yield chunk
+    os.replace(tmpPath, path + '.body')
+  except BaseException:
+    os.unlink(tmpPath)
+    raise
+  _writeAtomic(path + '.json', json.dumps(entry).encode('utf-8'))
+  _validated[url] = time.monotonic()
+  evict()
+
+
+def load(url: str, entry: dict) -> requests.Response:
+  """
+  Rebuilds a response from a cached entry and marks it as recently used.
+
+  Args:
+    url: Absolute URL, including any query string
+    entry: Metadata returned by lookup()
+
+  Returns:
+    requests.Response with status 200, the cached body and 'from_cache' set to True
+  """
+  path = _entryPath(url)
+  with open(path + '.body', 'rb') as f:
+    content = f.read()
+
+  # The metadata file's mtime is the LRU timestamp
+  try:
+    os.utime(path + '.json')
+  except OSError:
+    pass
+  _validated[url] = time.monotonic()
+
+  response = buildResponse(url, content, entry.get('headers', {}))
+  response.from_cache = True
+  return response
+
+
+def buildResponse(url: str, content: bytes, headers: dict, status: int = 200) -> requests.Response:
+  """
+  Builds a requests.Response from stored parts.
+
+  Args:
+    url: Absolute URL the response belongs to
+    content: Response body
+    headers: Response headers
+    status: HTTP status code
+
+  Returns:
+    requests.Response
+  """
+  response = requests.Response()
+  response.status_code = status
+  response.url = url
+  response._content = content
+  response.headers.update(headers)
+  response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+  return response
+
+
+def evict() -> None:
+  """
+  Removes least recently used entries until the cached bodies fit in MAX_CACHE_BYTES.
+  """
+  with _lock:
+    try:
+      entries = []
+      total = 0
+      for item in os.scandir(CACHE_DIR):
+        if item.name.endswith('.body'):
+          path = item.path[:-len('.body')]
+          size = item.stat().st_size
+          try:
+            usedAt = os.stat(path + '.json').st_mtime
+          except OSError:
+            usedAt = 0
+          entries.append((usedAt, size, path))
+          total += size
+    except OSError:
+      return
+
+    if total <= MAX_CACHE_BYTES:
+      return
+
+    entries.sort()
+    for usedAt, size, path in entries:
+      if total <= MAX_CACHE_BYTES:
+        break
+      for suffix in ('.json', '.body'):
+        try:
+          os.unlink(path + suffix)
+        except OSError:
+          pass
+      total -= size
+
+
+def recordFetch(url: str) -> None:
+  """
+  Reports a fetched URL to the dependency tracker of the current crawl, if any.
+
+  Args:
+    url: Absolute URL, including any query string
+  """
+  tracker = _tracker.get()
+  if tracker is not None:
+    with _lock:
+      tracker.add(url)
+
+
+def _dependenciesPath(name: str) -> str:
+  return os.path.join(CACHE_DIR, 'dependencies', '{}.json'.format(name.lower()))
+
+
+@contextmanager
+def trackDependencies(name: str, scope=None):
+  """
+  Records every URL fetched inside the block (including from worker threads started
+  with functions.mapConcurrently) and, if the block succeeds, saves them as the
+  dependencies of `name` for sourcesUnchanged().
+
+  Args:
+    name: Dependency set name, usually the country alpha-3 code
+    scope: JSON-serialisable description of what the crawl covers (Eg, its year window),
+      saved with the URLs; a later crawl with another scope would fetch other URLs
+
+  Yields:
+    Set of the URLs fetched so far
+  """
+  tracker = set()
+  token = _tracker.set(tracker)
+  try:
+    yield tracker
+  finally:
+    _tracker.reset(token)
+
+  if not _enabled:
+    return
+
+  path = _dependenciesPath(name)
+  if tracker and all(lookup(url) for url in tracker):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _writeAtomic(path, json.dumps({"scope": scope, "urls": sorted(tracker)}).encode('utf-8'))
+  elif os.path.exists(path):
+    # Some source cannot be revalidated, so the crawl can never be skipped
+    os.unlink(path)
+
+
+def sourcesUnchanged(name: str, fetch, scope=None) -> bool:
+  """
+  Revalidates every URL the last successful crawl of `name` depended on.
+
+  Args:
+    name: Dependency set name, usually the country alpha-3 code
+    fetch: Function used to fetch a URL (http_client.fetch)
+    scope: Scope of the crawl about to run, see trackDependencies()
+
+  Returns:
+    True only if dependencies are known for the same scope and every one of them answered 304
+  """
+  if not _enabled:
+    return False
+  try:
+    with open(_dependenciesPath(name), 'r', encoding='utf-8') as f:
+      dependencies = json.load(f)
+  except (OSError, json.JSONDecodeError):
+    return False
+
+  # Lists saved without a scope, or for another one (Eg, last year's window), do not
+  # include every URL this crawl would fetch
+  if not isinstance(dependencies, dict) or dependencies.get("scope") != scope:
+    return False
+  urls = dependencies.get("urls")
+  if not urls:
+    return False
+
+  try:
+    responses = mapConcurrently(fetch, urls)
+  except requests.RequestException:
+    return False
+  return all(getattr(response, 'from_cache', False) for response in responses)
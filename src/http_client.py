@@ -0,0 +1,294 @@
+import contextlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util import Retry, make_headers
+
+import budget
+import host_scheduler
+import http_cache
+import http_replay
+import metrics
+
+# Timeouts in seconds: (connect, read)
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+# Retry policy for transient failures
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+BACKOFF_JITTER = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Connection pool sizing
+POOL_CONNECTIONS = 10  # number of hosts to keep a pool for
+POOL_MAXSIZE = 10      # keep-alive connections per host
+
+# Bytes per chunk yielded by fetchChunks
+CHUNK_SIZE = 16 * 1024
+
+USER_AGENT = "public-holidays-crawler (+https://github.com/monsterdenny/public-holidays)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class HostAwareRetry(Retry):
+  """
+  Retry policy that reports every retried response to the host scheduler, so a 429/503 or a
+  Retry-After header seen by one request also paces the other requests to that host.
+  It also stops retrying once the current crawl's time budget is used up.
+  """
+
+  def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+    if response is not None and _pool is not None:
+      host_scheduler.getScheduler().observe(_pool.host, response.status, response.headers.get("Retry-After"))
+    budget.checkBudget()
+    return super().increment(method, url, response, error, _pool, _stacktrace)
+
+  def sleep(self, response=None):
+    left = budget.remaining()
+    if left is not None:
+      retryAfter = self.get_retry_after(response) if response is not None and self.respect_retry_after_header else None
+      if (retryAfter or self.get_backoff_time()) >= left:
+        raise budget.BudgetExceeded()
+    super().sleep(response)
+
+
+def createSession() -> requests.Session:
+  """
+  Creates a requests session with pooled keep-alive connections and a retry policy.
+
+  Retries are bounded and use exponential backoff with jitter on connection errors
+  and on 429/5xx responses, honouring any Retry-After header.
+
+  Returns:
+    Configured requests.Session
+  """
+  retry = HostAwareRetry(
+    total=MAX_RETRIES,
+    backoff_factor=BACKOFF_FACTOR,
+    backoff_jitter=BACKOFF_JITTER,
+    status_forcelist=RETRY_STATUSES,
+    allowed_methods=["GET", "HEAD"],
+    respect_retry_after_header=True,
+    raise_on_status=False
+  )
+  adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+  session = requests.Session()
+  session.mount("https://", adapter)
+  session.mount("http://", adapter)
+
+  # Advertises brotli only when a brotli decoder is installed
+  session.headers.update(make_headers(accept_encoding=True))
+  session.headers["User-Agent"] = USER_AGENT
+
+  return session
+
+
+def getSession() -> requests.Session:
+  """
+  Returns the process-wide shared session, creating it on first use.
+
+  Returns:
+    Shared requests.Session
+  """
+  global _session
+  if _session is None:
+    with _session_lock:
+      if _session is None:
+        _session = createSession()
+  return _session
+
+
+def fetch(url: str, params: dict = None, timeout: tuple = None) -> requests.Response:
+  """
+  Performs a GET request through the shared session.
+
+  Responses carrying an ETag or Last-Modified header are kept in the on-disk HTTP cache
+  and revalidated with a conditional request next time; on 304 the cached body is
+  returned with 'from_cache' set to True.
+
+  In http_replay "replay" mode responses come from recorded fixtures and the network
+  is never used; in "record" mode every response is also saved as a fixture.
+
+  Network requests are paced per host by host_scheduler, whichever crawler makes them,
+  and callers asking for a URL that is already being fetched share that response.
+
+  Args:
+    url: URL to fetch
+    params: Optional query string parameters
+    timeout: Optional (connect, read) timeout in seconds, defaults to (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+  Returns:
+    requests.Response for a successful (2xx) request
+
+  Raises:
+    requests.RequestException: If the request fails or still returns an error status after retries
+  """
+  if params:
+    url = requests.Request('GET', url, params=params).prepare().url
+
+  started = time.perf_counter()
+  with metrics.stage("fetch"):
+    (response, source), shared = host_scheduler.getScheduler().coalesce(url, lambda: _fetch(url, timeout))
+  metrics.recordFetch(url, time.perf_counter() - started, len(response.content), "shared" if shared else source, response.status_code)
+
+  http_cache.recordFetch(url)
+  return response
+
+
+def fetchChunks(url: str, params: dict = None, timeout: tuple = None, chunk_size: int = CHUNK_SIZE):
+  """
+  Performs a GET request like fetch(), yielding the body in chunks as they arrive,
+  so a parser can start before the download ends.
+
+  Downloaded bodies are written to the HTTP cache (and fixtures, when recording) as
+  they arrive rather than buffered, so memory use does not grow with the page size.
+  Cached and replayed bodies are yielded in chunks too. The fetch stage only counts
+  the time spent waiting for chunks, not the time the caller spends between them.
+  Requests are paced per host like fetch(), and hold one of the host's concurrency slots
+  until the body is read or the stream is closed. A stream is never shared between callers.
+
+  Args:
+    url: URL to fetch
+    params: Optional query string parameters
+    timeout: Optional (connect, read) timeout in seconds, defaults to (CONNECT_TIMEOUT, READ_TIMEOUT)
+    chunk_size: Maximum bytes per chunk
+
+  Yields:
+    Body chunks (bytes), already decompressed
+
+  Raises:
+    requests.RequestException: If the request fails or still returns an error status after retries
+  """
+  if params:
+    url = requests.Request('GET', url, params=params).prepare().url
+
+  started = time.perf_counter()
+  hold = contextlib.ExitStack()
+  with metrics.stage("fetch"):
+    response, source = _fetch(url, timeout, hold)
+
+  size = 0
+  fetchSeconds = 0.0
+  try:
+    if source == "network":
+      # The HTTP cache and fixtures are written chunk by chunk, so the body is never held in memory
+      iterator = http_cache.storeStream(url, _iterBody(response, chunk_size), response.headers)
+      if http_replay.getMode() == "record":
+        iterator = http_replay.recordStream(url, iterator, response.headers)
+      try:
+        while True:
+          waited = time.perf_counter()
+          chunk = next(iterator, None)
+          fetchSeconds += time.perf_counter() - waited
+          if chunk is None:
+            break
+          size += len(chunk)
+          yield chunk
+      finally:
+        # Discards a partly written cache entry when the caller stops early
+        iterator.close()
+    else:
+      content = response.content
+      size = len(content)
+      for offset in range(0, size, chunk_size):
+        yield content[offset:offset + chunk_size]
+  finally:
+    response.close()
+    # Frees the host's concurrency slot, held since the request was sent
+    hold.close()
+
+  metrics.recordStageTime("fetch", fetchSeconds)
+  metrics.recordFetch(url, time.perf_counter() - started, size, source, response.status_code)
+
+  http_cache.recordFetch(url)
+
+
+def _fetch(url: str, timeout: tuple, hold: contextlib.ExitStack = None) -> tuple:
+  # Returns (response, source), where source is "replay", "cache" or "network".
+  # With hold, a network response is returned unread, for the caller to read and store, and
+  # its host's concurrency slot stays held until hold is closed.
+  stream = hold is not None
+  if http_replay.getMode() == "replay":
+    return http_replay.load(url), "replay"
+
+  entry = http_cache.lookup(url)
+
+  if entry and http_cache.isFresh(url):
+    # Already revalidated by this process
+    response, source = http_cache.load(url, entry), "cache"
+  else:
+    scheduler = host_scheduler.getScheduler()
+    with contextlib.ExitStack() as slot:
+      slot.enter_context(scheduler.slot(url))
+      timeout = budget.clampTimeout(timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+      limited = budget.remaining() is not None
+      try:
+        response = getSession().get(url, headers=http_cache.conditionalHeaders(entry), timeout=timeout, stream=stream or limited)
+        if limited and not stream:
+          _readWithinBudget(response)
+      except requests.RequestException:
+        # Reported as out of time when the budget cut the request short
+        budget.checkBudget()
+        raise
+      if response.status_code not in RETRY_STATUSES:
+        # Retry statuses, including the last one once retries run out, were already observed by HostAwareRetry
+        scheduler.observe(url, response.status_code, response.headers.get("Retry-After"))
+      if response.status_code == 304 and entry:
+        response.close()
+        response, source = http_cache.load(url, entry), "cache"
+      else:
+        response.raise_for_status()
+        source = "network"
+        if stream:
+          # The body is still to be downloaded, so the slot moves to the caller
+          hold.enter_context(slot.pop_all())
+          return response, source
+
+  _keep(url, response, source)
+  return response, source
+
+
+def _iterBody(response: requests.Response, chunk_size: int):
+  # Yields a streamed body as iter_content does. Within a time budget, each chunk is what
+  # a single read returns instead, and the budget is checked between chunks: the read
+  # timeout applies to each read, so it does not stop a server that sends slowly.
+  read1 = getattr(response.raw, 'read1', None)
+  if budget.remaining() is None or read1 is None:
+    yield from response.iter_content(chunk_size)
+    return
+
+  while True:
+    budget.checkBudget()
+    try:
+      chunk = read1(chunk_size, decode_content=True)
+    except urllib3.exceptions.HTTPError as e:
+      raise requests.ConnectionError(e, response=response) from e
+    if not chunk:
+      return
+    yield chunk
+
+
+def _readWithinBudget(response: requests.Response) -> None:
+  # Reads a streamed body the way response.content does, within the crawl's budget
+  try:
+    response._content = b"".join(_iterBody(response, CHUNK_SIZE))
+  except BaseException:
+    response.close()
+    raise
+  response._content_consumed = True
+
+
+def _keep(url: str, response: requests.Response, source: str) -> None:
+  # Stores a downloaded response in the HTTP cache, and any response as a fixture when recording
+  if source == "network":
+    http_cache.store(url, response)
+
+  if http_replay.getMode() == "record":
+    http_replay.record(url, response)
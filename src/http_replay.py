@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+
+import requests
+
+from http_cache import buildResponse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'test', 'fixtures')
+
+# "record" saves every response fetched, "replay" serves saved responses without network access
+_mode = os.environ.get('HOLIDAYS_HTTP_MODE') or None
+if os.environ.get('HOLIDAYS_FIXTURES_DIR'):
+  FIXTURES_DIR = os.environ['HOLIDAYS_FIXTURES_DIR']
+
+SAVED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def configure(mode: str = None, directory: str = None) -> None:
+  """
+  Switches record/replay mode for the current process.
+  The HOLIDAYS_HTTP_MODE and HOLIDAYS_FIXTURES_DIR environment variables set the same options.
+
+  Args:
+    mode: "record", "replay", or None to use the network normally
+    directory: Fixtures directory
+  """
+  global _mode, FIXTURES_DIR
+  if mode not in (None, "record", "replay"):
+    raise ValueError(f"Unknown HTTP mode '{mode}', expected 'record' or 'replay'")
+  _mode = mode
+  if directory is not None:
+    FIXTURES_DIR = directory
+
+
+def getMode() -> str:
+  return _mode
+
+
+def _fixturePath(url: str) -> str:
+  key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:24]
+  return os.path.join(FIXTURES_DIR, key)
+
+
+def save(url: str, content: bytes, headers: dict = None) -> None:
+  """
+  Saves a response body and its main headers as a fixture.
+
+  Args:
+    url: Absolute URL, including any query string
+    content: Response body, or None when the body file is already written
+    headers: Response headers (only SAVED_HEADERS are kept)
+  """
+  headers = headers or {}
+  meta = {
+    "url": url,
+    "status": 200,
+    "headers": {name: headers[name] for name in SAVED_HEADERS if name in headers}
+  }
+  path = _fixturePath(url)
+  os.makedirs(FIXTURES_DIR, exist_ok=True)
+  if content is not None:
+    with open(path + '.body', 'wb') as f:
+      f.write(content)
+  with open(path + '.json', 'w', encoding='utf-8') as f:
+    json.dump(meta, f, indent=4)
+
+
+def record(url: str, response: requests.Response) -> None:
+  save(url, response.content, response.headers)
+
+
+def recordStream(url: str, chunks, headers: dict):
+  """
+  Like save(), for a body read in chunks: yields the chunks on while writing them to
+  the fixture, whose metadata is written once the body is complete.
+
+  Args:
+    url: Absolute URL, including any query string
+    chunks: Iterator of body chunks (bytes)
+    headers: Response headers (only SAVED_HEADERS are kept)
+
+  Yields:
+    The same chunks
+  """
+  path = _fixturePath(url)
+  os.makedirs(FIXTURES_DIR, exist_ok=True)
+  with open(path + '.body', 'wb') as f:
+    for chunk in chunks:
+      f.write(chunk)
+      yield chunk
+  save(url, None, headers)
+
+
+def load(url: str) -> requests.Response:
+  """
+  Serves a recorded response.
+
+  Args:
+    url: Absolute URL, including any query string
+
+  Returns:
+    requests.Response rebuilt from the fixture
+
+  Raises:
+    requests.ConnectionError: If no response was recorded for the URL
+  """
+  path = _fixturePath(url)
+  try:
+    with open(path + '.json', 'r', encoding='utf-8') as f:
+      meta = json.load(f)
+    with open(path + '.body', 'rb') as f:
+      content = f.read()
+  except OSError:
+    raise requests.ConnectionError(f"No recorded response for {url} in {FIXTURES_DIR}")
+
+  return buildResponse(url, content, meta.get("headers", {}), meta.get("status", 200))
+
+
+def listRecordedUrls(directory: str = None) -> list:
+  """
+  Lists the URLs recorded in a fixtures directory.
+
+  Args:
+    directory: Fixtures directory, defaults to FIXTURES_DIR
+
+  Returns:
+    Sorted list of URLs
+  """
+  directory = directory or FIXTURES_DIR
+  urls = []
+  if not os.path.isdir(directory):
+    return urls
+  for name in os.listdir(directory):
+    if name.endswith('.json'):
+      with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+        urls.append(json.load(f)["url"])
+  return sorted(urls)
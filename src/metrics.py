@@ -0,0 +1,252 @@
+from contextlib import contextmanager
+from datetime import datetime
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+METRICS_DIR = os.environ.get(
+  "HOLIDAYS_METRICS_DIR",
+  os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'metrics')
+)
+
+# Comma-separated list of "cprofile" and/or "tracemalloc"
+PROFILE_ENV = "HOLIDAYS_PROFILE"
+
+# Pipeline stages, in order
+STAGES = ("fetch", "parse", "normalize", "write")
+
+# Allocation sites listed in the report when tracemalloc is on
+TRACEMALLOC_TOP = 15
+
+_current = contextvars.ContextVar("metrics_current", default=None)
+
+
+class CrawlMetrics:
+  """
+  Measurements of one crawler run. Stage times are summed over every thread
+  working for the crawler, so they can add up to more than the wall-clock time.
+  """
+
+  def __init__(self, name: str):
+    self.name = name
+    self._lock = threading.Lock()
+    self.stages = {stage: 0.0 for stage in STAGES}
+    self.records = 0
+    self.fetches = []
+
+  def addStageTime(self, stage: str, seconds: float) -> None:
+    with self._lock:
+      self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+  def addRecords(self, count: int) -> None:
+    with self._lock:
+      self.records += count
+
+  def addFetch(self, fetch: dict) -> None:
+    with self._lock:
+      self.fetches.append(fetch)
+
+  def toDict(self) -> dict:
+    with self._lock:
+      fetches = list(self.fetches)
+      return {
+        "stages": {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+        "records": self.records,
+        "requests": len(fetches),
+        "cache_hits": sum(1 for fetch in fetches if fetch["source"] == "cache"),
+        "bytes_downloaded": sum(fetch["bytes"] for fetch in fetches if fetch["source"] == "network"),
+        "replayed": sum(1 for fetch in fetches if fetch["source"] == "replay"),
+        "shared": sum(1 for fetch in fetches if fetch["source"] == "shared"),
+        "fetches": fetches
+      }
+
+
+@contextmanager
+def collect(name: str):
+  """
+  Collects the metrics of everything run inside the block, including worker threads
+  started with functions.mapConcurrently.
+
+  Args:
+    name: Name of the run (Eg, an alpha-3 country code)
+
+  Yields:
+    CrawlMetrics
+  """
+  metrics = CrawlMetrics(name)
+  token = _current.set(metrics)
+  try:
+    yield metrics
+  finally:
+    _current.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+  """
+  Adds the time spent in the block to a stage of the current metrics.
+  Does nothing outside collect().
+  """
+  metrics = _current.get()
+  if metrics is None:
+    yield
+    return
+
+  started = time.perf_counter()
+  try:
+    yield
+  finally:
+    metrics.addStageTime(name, time.perf_counter() - started)
+
+
+def recordStageTime(name: str, seconds: float) -> None:
+  """
+  Adds time measured elsewhere (Eg, in another process) to a stage of the current metrics.
+  """
+  metrics = _current.get()
+  if metrics is not None:
+    metrics.addStageTime(name, seconds)
+
+
+def timed(stage_name: str):
+  """
+  Decorator adding the time spent in a function to a stage, see stage().
+  """
+  def decorator(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+      with stage(stage_name):
+        return func(*args, **kwargs)
+    return wrapper
+  return decorator
+
+
+def recordParsed(count: int) -> None:
+  """
+  Adds parsed records to the current metrics.
+  """
+  metrics = _current.get()
+  if metrics is not None:
+    metrics.addRecords(count)
+
+
+def recordFetch(url: str, elapsed: float, size: int, source: str, status: int = None) -> None:
+  """
+  Records one fetched URL in the current metrics.
+
+  Args:
+    url: Fetched URL
+    elapsed: Seconds spent fetching it
+    size: Body size in bytes
+    source: "network", "cache" (fresh or 304 Not Modified), "replay", or "shared" (the
+      response of an identical request already in progress)
+    status: HTTP status of the network response
+  """
+  metrics = _current.get()
+  if metrics is not None:
+    metrics.addFetch({"url": url, "elapsed": round(elapsed, 6), "bytes": size, "source": source, "status": status})
+
+
+def peakRss() -> int:
+  """
+  Returns the peak resident set size of the process, in bytes.
+  """
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # Kilobytes on Linux, bytes on macOS
+  return peak if sys.platform == "darwin" else peak * 1024
+
+
+def profilers() -> set:
+  """
+  Returns the profilers enabled with the HOLIDAYS_PROFILE environment variable.
+  """
+  return {name.strip().lower() for name in os.environ.get(PROFILE_ENV, "").split(",") if name.strip()}
+
+
+@contextmanager
+def profile(name: str, directory: str):
+  """
+  Runs the block under cProfile when HOLIDAYS_PROFILE contains "cprofile", and
+  saves the statistics to '{directory}/{name}.prof' (open with pstats or snakeviz).
+
+  cProfile only sees the calling thread; pages fetched on mapConcurrently
+  worker threads are not included. From Python 3.12, only one profiler can be
+  active at a time, so when crawlers run concurrently the block runs unprofiled
+  if another crawler's profiler is already active.
+  """
+  if "cprofile" not in profilers():
+    yield
+    return
+
+  profiler = cProfile.Profile()
+  try:
+    profiler.enable()
+  except ValueError:
+    # Another profiling tool is already active
+    profiler = None
+  if profiler is None:
+    yield
+    return
+
+  try:
+    yield
+  finally:
+    profiler.disable()
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(os.path.join(directory, f"{name}.prof"))
+
+
+def startTracemalloc() -> bool:
+  """
+  Starts tracemalloc when HOLIDAYS_PROFILE contains "tracemalloc".
+
+  Returns:
+    True if tracing was started
+  """
+  if "tracemalloc" not in profilers():
+    return False
+  tracemalloc.start()
+  return True
+
+
+def stopTracemalloc() -> dict:
+  """
+  Stops tracemalloc and summarises the traced allocations.
+
+  Returns:
+    Dictionary with 'peak_bytes' and the 'top' allocation sites by size
+  """
+  snapshot = tracemalloc.take_snapshot()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return {
+    "peak_bytes": peak,
+    "top": [
+      {"location": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+      for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+    ]
+  }
+
+
+def runDirectory(started_on: datetime, directory: str = METRICS_DIR) -> str:
+  return os.path.join(directory, started_on.strftime("%Y%m%dT%H%M%S"))
+
+
+def writeRunMetrics(report: dict, path: str) -> None:
+  """
+  Writes a run report as JSON.
+
+  Args:
+    report: Run report (see crawl.runCheck)
+    path: Output file path
+  """
+  os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+  with open(path, 'w', encoding='utf-8') as f:
+    json.dump(report, f, indent=4)
@@ -0,0 +1,133 @@
+from datetime import date
+import functools
+import gc
+
+import metrics
+
+# Batches from this size are normalised with the cyclic garbage collector paused: they
+# allocate many small objects, each allocation burst triggering a pointless collection
+GC_PAUSE_MIN_ENTRIES = 10000
+
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# English month names, independent of the locale (unlike strptime's %B)
+MONTH_NUMBERS = {
+  name: number
+  for number, name in enumerate(
+    ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+     'august', 'september', 'october', 'november', 'december'),
+    start=1
+  )
+}
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def dayName(iso_date: str) -> str:
+  """
+  Returns the English day of the week of an ISO date, memoised per date.
+
+  Args:
+    iso_date: Date string (format: YYYY-MM-DD)
+
+  Raises:
+    ValueError: If the date is invalid
+  """
+  return DAY_NAMES[date.fromisoformat(iso_date).weekday()]
+
+
+@functools.lru_cache(maxsize=1 << 12)
+def parseDayMonth(text: str, year) -> date:
+  """
+  Parses a day and a full English month name, in either order (Eg, "3 April" or "April 3").
+
+  Args:
+    text: Day and month
+    year: Year, as an int or a string of digits
+
+  Returns:
+    datetime.date
+
+  Raises:
+    ValueError: If the text or the year cannot be parsed, or the date does not exist
+  """
+  parts = text.split()
+  if len(parts) != 2:
+    raise ValueError(f"Expected a day and a month, got '{text}'")
+
+  day, month = parts if parts[0].isdigit() else reversed(parts)
+  if month.lower() not in MONTH_NUMBERS or not day.isdigit():
+    raise ValueError(f"Expected a day and a month, got '{text}'")
+
+  return date(int(year), MONTH_NUMBERS[month.lower()], int(day))
+
+
+@metrics.timed("normalize")
+def normalizeHolidays(holidays: list, add_day: bool = True, dedupe: bool = True, sort: bool = True) -> list:
+  """
+  Normalises a batch of holiday entries in a single pass, in place:
+  date/datetime values become ISO date strings, text fields and region names are
+  trimmed, repeated (date, holiday, region) entries are dropped (keeping the first),
+  and missing 'day' fields are filled in. The result is then sorted by date (stable).
+
+  Each step can be turned off, so parsers can run the parts they need before their
+  results are merged, and crawlCountry() runs all of them on the final list.
+
+  Args:
+    holidays: List of holiday dictionaries
+    add_day: Whether to add missing 'day' fields
+    dedupe: Whether to drop repeated entries
+    sort: Whether to sort by date
+
+  Returns:
+    List of normalised holiday dictionaries
+  """
+  pauseGc = len(holidays) >= GC_PAUSE_MIN_ENTRIES and gc.isenabled()
+  if pauseGc:
+    gc.disable()
+  try:
+    return _normalizeHolidays(holidays, add_day, dedupe, sort)
+  finally:
+    if pauseGc:
+      gc.enable()
+
+
+def _normalizeHolidays(holidays: list, add_day: bool, dedupe: bool, sort: bool) -> list:
+  seen = set()
+  datas = []
+  append = datas.append
+
+  # The fields are handled one by one rather than in a loop, this runs once per entry of decades of data
+  for holiday in holidays:
+    isoDate = holiday.get('date')
+    if isoDate is not None:
+      isoDate = holiday['date'] = isoDate.strip() if type(isoDate) is str else date.isoformat(isoDate)
+
+    name = holiday.get('holiday')
+    if name is not None:
+      name = holiday['holiday'] = name.strip()
+
+    if 'day' in holiday:
+      holiday['day'] = holiday['day'].strip()
+
+    region = holiday.get('region')
+    if type(region) is list:
+      region = holiday['region'] = [regionName.strip() for regionName in region]
+
+    if dedupe:
+      key = (isoDate, name, tuple(region) if type(region) is list else region)
+      if key in seen:
+        continue
+      seen.add(key)
+
+    if add_day and isoDate is not None and 'day' not in holiday:
+      try:
+        holiday['day'] = dayName(isoDate)
+      except ValueError as e:
+        print(f"Warning: Could not parse date '{isoDate}': {e}")
+
+    append(holiday)
+
+  if sort:
+    datas.sort(key=lambda holiday: holiday.get('date', ''))
+
+  return datas
@@ -0,0 +1,149 @@
+from crawl_state import getCountryState, loadStoredHolidays, mergeWithStored, reusableSources, sourceEntry, updateCountryState
+from functions import getOutputPath, mapConcurrently
+from http_client import fetch
+import metrics
+from normalize import normalizeHolidays
+
+DATASTORE_SEARCH_URL = "https://data.gov.sg/api/action/datastore_search"
+
+# Records requested per datastore_search call
+PAGE_SIZE = 1000
+
+# Only the fields written to the output file are requested, so records need no clean-up of '_id'
+FIELDS = ("date", "day", "holiday")
+
+# Datasets fetched at the same time
+MAX_WORKERS = 4
+
+
+def getDatasetRecords(dataset_id: str) -> list:
+    """
+    Fetches every record of a dataset, following datastore_search pagination.
+
+    Args:
+        dataset_id: data.gov.sg dataset (resource) id
+
+    Returns:
+        List of records with the FIELDS fields
+    """
+    records = []
+    offset = 0
+    while True:
+        response = fetch(DATASTORE_SEARCH_URL, params={
+            "resource_id": dataset_id,
+            "fields": ",".join(FIELDS),
+            "limit": PAGE_SIZE,
+            "offset": offset
+        })
+        with metrics.stage("parse"):
+            result = response.json()['result']
+
+        page = result['records']
+        records.extend(page)
+        offset += len(page)
+
+        # 'total' counts every record of the dataset, when the API includes it. The API may
+        # return fewer than PAGE_SIZE records per page, so a short page only ends the dataset
+        # when there is no total; an empty page always does
+        total = result.get('total')
+        if not page:
+            break
+        if total is not None:
+            if offset >= total:
+                break
+        elif len(page) < PAGE_SIZE:
+            break
+
+    metrics.recordParsed(len(records))
+    return records
+
+
+def getCollectionMetadata(url: str) -> dict:
+    response = fetch(url)
+
+    datasets = response.json()
+
+    return datasets['data']['collectionMetadata']
+
+
+def getDatasetHolidays(child_datasets: list, skip_datasets: set = None, max_workers: int = MAX_WORKERS) -> dict:
+    """
+    Fetches the child datasets of a collection concurrently.
+
+    Args:
+        child_datasets: Dataset ids listed by the collection metadata
+        skip_datasets: Optional dataset ids not to fetch
+        max_workers: Maximum number of datasets fetched at the same time
+
+    Returns:
+        Dictionary mapping dataset id to its trimmed holiday records, in collection order
+    """
+    skip_datasets = skip_datasets or set()
+    datasetIds = [datasetId for datasetId in child_datasets if datasetId not in skip_datasets]
+    # Records are trimmed before their digests go into the crawl state; the rest of the
+    # normalisation runs once on the merged list
+    records = mapConcurrently(
+        lambda datasetId: normalizeHolidays(getDatasetRecords(datasetId), add_day=False, dedupe=False, sort=False),
+        datasetIds,
+        max_workers
+    )
+    return dict(zip(datasetIds, records))
+
+
+def getCollectionHolidays(url: str) -> list:
+    """
+    Fetches every holiday of a data.gov.sg collection.
+
+    Args:
+        url: Collection metadata URL (Eg, https://api-production.data.gov.sg/v2/public/api/collections/691/metadata)
+
+    Returns:
+        List of holiday dictionaries, sorted by date
+    """
+    childDatasets = getCollectionMetadata(url)['childDatasets']
+
+    datas = [item for records in getDatasetHolidays(childDatasets).values() for item in records]
+
+    #sort by date string
+    datas.sort(key=lambda row: row['date'])
+
+    return datas
+
+
+def crawlHolidays(country: dict) -> list:
+    """
+    Fetches the collection of a country, reusing stored datasets of past years while
+    the collection metadata reports no update since the last crawl.
+
+    Args:
+        country: Registry entry (see countries.COUNTRIES)
+
+    Returns:
+        List of holiday dictionaries, sorted by date
+    """
+    code = country['countryAlpha3Code']
+    collection = getCollectionMetadata(country['source'])
+    lastUpdatedAt = collection.get('lastUpdatedAt')
+    stored = loadStoredHolidays(getOutputPath(code))
+
+    # An update may amend any dataset, so nothing is reused after one. Datasets that left
+    # the collection are not reused either, so their holidays are dropped
+    reusable = {}
+    if lastUpdatedAt and getCountryState(code).get('collectionLastUpdatedAt') == lastUpdatedAt:
+        reusable = {
+            datasetId: entry for datasetId, entry in reusableSources(code, stored).items()
+            if datasetId in collection['childDatasets']
+        }
+    if reusable:
+        print(f"{code}: reusing stored datasets {', '.join(sorted(reusable))}")
+
+    fetched = getDatasetHolidays(collection['childDatasets'], set(reusable))
+
+    updateCountryState(
+        code,
+        {datasetId: sourceEntry(records) for datasetId, records in fetched.items()},
+        extra={'collectionLastUpdatedAt': lastUpdatedAt}
+    )
+
+    fresh = [item for records in fetched.values() for item in records]
+    return mergeWithStored(stored, fresh, reusable)
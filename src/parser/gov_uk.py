@@ -1,10 +1,107 @@
 from datetime import datetime
-from lxml import html
-import requests
+from lxml import etree, html
+from http_client import fetch
+import metrics
+from normalize import parseDayMonth
+from pipeline import parseInProcess
 import re
 
-def output_format() -> str:
-    return "%Y-%m-%d"
+# Bank holiday tables have headers with "Date", "Day of the week", "Bank holiday"
+IS_HOLIDAY_TABLE = etree.XPath("boolean(.//th[contains(text(), 'Date')] and .//th[contains(text(), 'Bank holiday')])")
+TABLE_ROWS = etree.XPath(".//tr[position() > 1]")
+ROW_DATE_CELLS = etree.XPath(".//th")
+ROW_DATA_CELLS = etree.XPath(".//td")
+
+HEADING_TAGS = ("h2", "h3", "strong")
+YEAR_PATTERN = re.compile(r'\b(20\d{2})\b')
+
+# Regions as bits, in alphabetical order so that walking the bits yields sorted names
+REGION_BITS = {
+    "All": 1,
+    "England and Wales": 2,
+    "Northern Ireland": 4,
+    "Scotland": 8
+}
+
+
+def _regionNames(mask: int) -> list:
+    names = [name for name, bit in REGION_BITS.items() if mask & bit]
+    # If holiday appears in all 3 regions, use ["All"]
+    return ["All"] if len(names) == 3 else names
+
+
+def _resolveRegionAndYear(headings: list):
+    # Take the region and the year from the first heading (in document order) that mentions one
+    year = None
+    region = None
+
+    for heading in headings:
+        heading_text = heading.text_content()
+
+        # Extract region from heading
+        if not region:
+            if "england and wales" in heading_text.lower():
+                region = "England and Wales"
+            elif "scotland" in heading_text.lower():
+                region = "Scotland"
+            elif "northern ireland" in heading_text.lower():
+                region = "Northern Ireland"
+
+        # Extract 4-digit year from heading
+        if not year:
+            year_match = YEAR_PATTERN.search(heading_text)
+            if year_match:
+                year = int(year_match.group(1))
+
+        if year and region:
+            break
+
+    return region, year
+
+
+def _firstYearInText(element, cache: dict):
+    # First year mentioned in any text node below element, memoised per element
+    if element not in cache:
+        cache[element] = None
+        for text in element.itertext():
+            year_match = YEAR_PATTERN.search(text)
+            if year_match:
+                cache[element] = int(year_match.group(1))
+                break
+    return cache[element]
+
+
+def _tableRows(table, region: str, year: int):
+    for row in TABLE_ROWS(table):
+        # The date is in a th element, day and holiday are in td elements
+        date_cell = ROW_DATE_CELLS(row)
+        data_cells = ROW_DATA_CELLS(row)
+
+        if len(date_cell) > 0 and len(data_cells) >= 2:
+            # Extract date and holiday name
+            date_text = date_cell[0].text_content().strip()
+            holiday_name = data_cells[1].text_content().strip()
+
+            # Skip empty rows
+            if not date_text or not holiday_name:
+                continue
+
+            # Parse the date - format is like "3 April", "1 January", etc.
+            try:
+                # Try parsing with the extracted year
+                yield parseDayMonth(date_text, year).isoformat(), holiday_name, region
+            except ValueError:
+                # If parsing fails, try alternative formats or skip
+                print(f"Warning: Could not parse date '{date_text} {year}'")
+                continue
+
+
+def crawlHolidays(country: dict) -> list:
+    """
+    Fetches the bank holidays of a registered country (see countries.COUNTRIES).
+    """
+    return getGovUkBankHolidays(country['source'])
+
 
 def getGovUkBankHolidays(url: str) -> list:
     """
@@ -15,141 +112,104 @@ def getGovUkBankHolidays(url: str) -> list:
         url: The gov.uk bank holidays URL (https://www.gov.uk/bank-holidays)
     
     Returns:
-        List of holiday dictionaries with 'date' and 'holiday' fields
+        List of holiday dictionaries with 'date', 'holiday' and 'region' fields
     """
     # Get HTML content
-    response = requests.get(url)
-    tree = html.fromstring(response.content)
-    
-    datas = []
+    response = fetch(url)
+
+    # Parsed on the shared process pool, so concurrent crawlers parse on several cores
+    return parseInProcess(parseGovUkBankHolidays, response.content)
+
+
+@metrics.timed("parse")
+def parseGovUkBankHolidays(content: bytes) -> list:
+    """
+    Extracts the bank holidays of every region from a gov.uk bank holidays page.
+
+    The page is walked once in document order, keeping track of the latest h2, h3 and
+    strong headings and of any enclosing heading, so each bank holiday table is
+    labelled with its region and year as soon as it is reached.
     
-    # Find all tables with bank holidays
-    # Tables have headers with "Date", "Day of the week", "Bank holiday"
-    tables = tree.xpath("//table[.//th[contains(text(), 'Date')] and .//th[contains(text(), 'Bank holiday')]]")
+    Args:
+        content: Page HTML
     
-    for table in tables:
-        # Find the region and year from the preceding heading
-        # Look for headings like "Upcoming bank holidays in England and Wales 2026"
-        year = None
-        region = None
-        
-        # Try to find region and year in preceding headings (h2, h3, or strong tags)
-        headings = table.xpath("./preceding::h2[1] | ./preceding::h3[1] | ./preceding::strong[1] | ./ancestor::*[self::h2 or self::h3 or self::strong][1]")
-        
-        for heading in headings:
-            heading_text = heading.text_content()
-            
-            # Extract region from heading
-            if not region:
-                if "england and wales" in heading_text.lower():
-                    region = "England and Wales"
-                elif "scotland" in heading_text.lower():
-                    region = "Scotland"
-                elif "northern ireland" in heading_text.lower():
-                    region = "Northern Ireland"
-            
-            # Extract 4-digit year from heading
-            if not year:
-                year_match = re.search(r'\b(20\d{2})\b', heading_text)
-                if year_match:
-                    year = int(year_match.group(1))
-            
-            if year and region:
-                break
-        
-        # If no year found, try to find it from table caption or nearby text
+    Returns:
+        List of holiday dictionaries with 'date', 'holiday' and 'region' fields
+    """
+    tree = html.fromstring(content)
+
+    # Group holidays by date and holiday name, combining regions as a bitmask
+    holiday_map = {}
+
+    # Latest h2/h3/strong that has closed, as (start position, element)
+    last_heading = {tag: (-1, None) for tag in HEADING_TAGS}
+    # Headings that are still open, i.e. ancestors of the current element
+    open_headings = []
+    start_positions = {}
+    year_cache = {}
+    position = 0
+
+    for event, element in etree.iterwalk(tree, events=("start", "end")):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+
+        if event == "end":
+            if tag in HEADING_TAGS:
+                open_headings.pop()
+                start = start_positions[element]
+                if start > last_heading[tag][0]:
+                    last_heading[tag] = (start, element)
+            continue
+
+        position += 1
+
+        if tag in HEADING_TAGS:
+            start_positions[element] = position
+            open_headings.append(element)
+            continue
+
+        if tag != "table" or not IS_HOLIDAY_TABLE(element):
+            continue
+
+        # Candidate headings in document order: the latest closed h2, h3, strong and the nearest enclosing heading
+        candidates = [entry for entry in last_heading.values() if entry[1] is not None]
+        if open_headings:
+            candidates.append((start_positions[open_headings[-1]], open_headings[-1]))
+        headings = [heading for _, heading in sorted(set(candidates), key=lambda entry: entry[0])]
+
+        region, year = _resolveRegionAndYear(headings)
+
+        # If no year found, try to find it from nearby text (the table's 4 nearest ancestors)
         if not year:
-            # Look for year in table's parent or sibling elements
-            parent_text = table.xpath("./ancestor::*[position() < 5]//text()")
-            for text in parent_text:
-                year_match = re.search(r'\b(20\d{2})\b', text)
-                if year_match:
-                    year = int(year_match.group(1))
-                    break
-        
+            ancestors = list(element.iterancestors())[:4]
+            if ancestors:
+                year = _firstYearInText(ancestors[-1], year_cache)
+
         # If still no year, use current year as fallback
         if not year:
             year = datetime.now().year
             print(f"Warning: Could not determine year for table, using {year}")
-        
+
         # If no region found, default to "All" (shouldn't happen, but safety check)
         if not region:
             region = "All"
             print(f"Warning: Could not determine region for table, using 'All'")
-        
-        # Get all rows except header
-        rows = table.xpath(".//tr[position() > 1]")
-        
-        for row in rows:
-            # The date is in a th element, day and holiday are in td elements
-            date_cell = row.xpath(".//th")
-            data_cells = row.xpath(".//td")
-            
-            if len(date_cell) > 0 and len(data_cells) >= 2:
-                # Extract date, day, and holiday name
-                date_text = date_cell[0].text_content().strip()
-                day_text = data_cells[0].text_content().strip() if len(data_cells) > 0 else ""
-                holiday_name = data_cells[1].text_content().strip() if len(data_cells) > 1 else ""
-                
-                # Skip empty rows
-                if not date_text or not holiday_name:
-                    continue
-                
-                # Parse the date - format is like "3 April", "1 January", etc.
-                try:
-                    # Try parsing with the extracted year
-                    date_str = f"{date_text} {year}"
-                    date_obj = datetime.strptime(date_str, "%d %B %Y")
-                    
-                    # Format date and add to results
-                    datas.append({
-                        "date": date_obj.strftime(output_format()),
-                        "holiday": holiday_name,
-                        "region": region
-                    })
-                except ValueError:
-                    # If parsing fails, try alternative formats or skip
-                    print(f"Warning: Could not parse date '{date_text} {year}'")
-                    continue
-    
-    # Group holidays by date and holiday name, combining regions
-    # If same holiday appears in multiple regions, combine them
-    holiday_map = {}
-    for item in datas:
-        key = (item["date"], item["holiday"])
-        if key not in holiday_map:
-            holiday_map[key] = {
-                "date": item["date"],
-                "holiday": item["holiday"],
-                "region": [item["region"]]
-            }
-        else:
-            # Add region if not already present
-            if item["region"] not in holiday_map[key]["region"]:
-                holiday_map[key]["region"].append(item["region"])
-    
+
+        for date, holiday, row_region in _tableRows(element, region, year):
+            key = (date, holiday)
+            holiday_map[key] = holiday_map.get(key, 0) | REGION_BITS[row_region]
+
     # Convert to final format - keep regions as array
-    unique_datas = []
-    for key, value in holiday_map.items():
-        # Sort regions and keep as array
-        regions = sorted(value["region"])
-        # If holiday appears in all 3 regions, use ["All"]
-        # Otherwise, use the list of regions
-        if len(regions) == 3:
-            region_array = ["All"]
-        else:
-            region_array = regions
-        
-        unique_datas.append({
-            "date": value["date"],
-            "holiday": value["holiday"],
-            "region": region_array
-        })
-    
+    unique_datas = [
+        {"date": date, "holiday": holiday, "region": _regionNames(mask)}
+        for (date, holiday), mask in holiday_map.items()
+    ]
+
     # Sort by date
     unique_datas.sort(key=lambda r: r["date"])
     
     print(f"Total records => {len(unique_datas)}\n")
+    metrics.recordParsed(len(unique_datas))
     
     return unique_datas
-
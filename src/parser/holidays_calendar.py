@@ -1,36 +1,89 @@
-from datetime import datetime
-
-from lxml import html
 from datetime import datetime, timedelta
-import requests
+import time
+
+from lxml import etree, html
+
+from crawl_state import crawlYearsIncrementally
+from functions import getOutputPath
+from http_client import fetch, fetchChunks
+import metrics
+from normalize import normalizeHolidays, parseDayMonth
+from pipeline import fetchAndParse
+
+def getHolidaysCalendarData(url: str, max_workers: int = 4, from_year: int = None, to_year: int = None, skip_years: set = None) -> list:
+    """
+    Fetches holidays for every year listed on a holidays-calendar.net country page.
+    Year pages are downloaded concurrently and parsed on the shared process pool, or
+    parsed while they download with pipeline.STREAM_PARSE or without the pool (see
+    pipeline.fetchAndParse).
+
+    Args:
+        url: The country page URL (e.g. https://holidays-calendar.net/calendar_en/china_en.html)
+        max_workers: Maximum number of year pages fetched at the same time
+        from_year: Optional first year to crawl (inclusive)
+        to_year: Optional last year to crawl (inclusive)
+        skip_years: Optional years not to fetch (Eg, past years that are already stored)
+
+    Returns:
+        List of holiday dictionaries with 'date' and 'holiday' fields, sorted by date
+    """
+    skip_years = skip_years or set()
+    yearLinks = [link for year, link in getYearLinksByYear(url, from_year, to_year) if year not in skip_years]
 
-def output_format() -> str:
-    return "%Y-%m-%d"
+    for link in yearLinks:
+        print("\n\nworking on ", link);
 
-def getHolidaysCalendarData(url: str) -> list:
+    datas = []
 
-    yearLinks = getYearLinks(url)
+    # Results come back in link order, so the stable sort below sees the same input as a serial crawl
+    for data in fetchAndParse(yearLinks, parseHolidayData, stream_parse=parseHolidayDataStream, fetch_workers=max_workers):
+        datas.extend(data)
 
-    datas = [];
+    # ISO dates, sorted by date; day fields are added when the result is normalised again in crawlCountry
+    return normalizeHolidays(datas, add_day=False)
 
-    for link in yearLinks:
-    # grab the data
-        print("\n\nworking on ", link);
-        data = getHolidayData(link)
-        datas = datas + data
 
-    # sort by dates
-    datas.sort(key=lambda r: r["date"])
+def crawlHolidays(country: dict) -> list:
+    """
+    Fetches the holidays of a registered country; past years already stored unchanged are not fetched again.
+
+    Registry options:
+        yearsBack: Past years to fetch (default: every past year the page lists)
+        yearsAhead: Future years to fetch (default: every future year the page lists)
+
+    Args:
+        country: Registry entry (see countries.COUNTRIES)
 
-    for item in datas:
-        item["date"] = item["date"].strftime(output_format())
-    
-    return datas;
+    Returns:
+        List of holiday dictionaries with 'date' and 'holiday' fields, sorted by date
+    """
+    code = country['countryAlpha3Code']
+    currentYear = datetime.now().year
+    fromYear = currentYear - country['yearsBack'] if 'yearsBack' in country else None
+    toYear = currentYear + country['yearsAhead'] if 'yearsAhead' in country else None
 
+    return crawlYearsIncrementally(
+        code,
+        getOutputPath(code),
+        lambda skip_years: getHolidaysCalendarData(country['source'], from_year=fromYear, to_year=toYear, skip_years=skip_years),
+        fromYear,
+        toYear
+    )
 
-def getYearLinks(url: str) -> list:
+
+def getYearLinks(url: str, from_year: int = None, to_year: int = None) -> list:
+  return [link for _, link in getYearLinksByYear(url, from_year, to_year)]
+
+
+def getYearLinksByYear(url: str, from_year: int = None, to_year: int = None) -> list:
+  """
+  Lists the year pages of a country page.
+
+  Returns:
+    List of (year, link) tuples; year is None when the link text is not a year
+  """
   # Get html content from source
-  response = requests.get(url)
+  response = fetch(url)
 
   # Parse using lxml
   tree = html.fromstring(response.content)
@@ -41,95 +94,182 @@ def getYearLinks(url: str) -> list:
 
 
   # Determine number of years to scrape
-  yearLinks = tree.xpath("//div[contains(@class, 'year-menu')]/ul/li[not(contains(@class, 'holTBD'))]/a/@href")
+  anchors = tree.xpath("//div[contains(@class, 'year-menu')]/ul/li[not(contains(@class, 'holTBD'))]/a")
+
+  yearLinks = []
+  for anchor in anchors:
+    # The link text is the year (Eg, "2025"), the current year's link has no year in its URL
+    yearText = anchor.text_content().strip()
+    year = int(yearText) if yearText.isdigit() else None
+    if year is not None:
+      if from_year is not None and year < from_year:
+        continue
+      if to_year is not None and year > to_year:
+        continue
+    yearLinks.append((year, anchor.get("href")))
 
   return yearLinks
 
 
 
 def getHolidayData(url: str) -> list:
-  # Date formats
-  input_format = "%B %d %Y"
-  
+  # Parse the page while it downloads
+  return parseHolidayDataStream(fetchChunks(url))
 
-  # Get html content from source
-  response = requests.get(url)
 
-  # Parse using lxml
-  tree = html.fromstring(response.content)
-  
-  br_elements = tree.xpath("//br")
+# Page title (Eg, "France Public Holidays 2025")
+TITLE_XPATH = etree.XPath("//title/text()", smart_strings=False)
 
-  # Iterate and drop each <br> tag
-  for br in br_elements:
-    br.drop_tag()
+# One holiday item per matching 'details' block, regional holidays excluded.
+# Each item holds a date span followed by a holiday name span.
+HOLIDAY_ITEM_XPATH = etree.XPath("//div[ contains(@class, 'details') and not(.//span/span[contains(., 'Regional')]) ]/div/span")
+DATE_TEXT_XPATH = etree.XPath("span[1]/text()", smart_strings=False)
+NAME_TEXT_XPATH = etree.XPath("span[2]/text()", smart_strings=False)
 
-  # Grab the page title
-  title = tree.xpath('//title/text()')[0] if tree.xpath('//title/text()') else "No title found"
+# The same selection, relative to one closed 'details' block
+IS_REGIONAL_XPATH = etree.XPath("boolean(.//span/span[contains(., 'Regional')])")
+DETAILS_ITEM_XPATH = etree.XPath("div/span")
 
-  # extract year from title (Eg, "France Publich Holidays 2025")
-  year = "".join([char for char in title if char.isdigit()])
 
-  # Grab the holiday data
-  selector = "//div[ contains(@class, 'details') and not(.//span/span[contains(text(), 'Regional')]) ]"
+def _isDetails(element) -> bool:
+  return element.tag == "div" and "details" in (element.get("class") or "")
 
-  holidays = tree.xpath(selector + "/div/span/span[1]/text()")
 
-  holidayText = tree.xpath(selector + "/div/span/span[2]/text()")
+def _itemRow(item):
+  # (date text, holiday name) of a holiday item, or None when either is missing
+  dateString = "".join(DATE_TEXT_XPATH(item)).strip()
+  holidayName = "".join(NAME_TEXT_XPATH(item)).strip()
 
-  if len(holidays) != len(holidayText):
-    print("Exception array length does not match")
-    exit(1)
+  if not dateString or not holidayName:
+    print(f"Warning: Skipping holiday item with missing date or name (date='{dateString}', name='{holidayName}')")
+    return None
 
-  datas = []
-  for i in range(len(holidays)):
-    dateString = holidays[i].strip()
+  return dateString, holidayName
 
-    holidayName = holidayText[i].strip()
 
-    
+def iterHolidayRows(tree):
+  """
+  Yields the (date text, holiday name) pair of every holiday item, in document order.
 
-    # check if holiday span across few days
-    if "–" in dateString:
-      dates = dateString.split("–")
-      if len(dates) != 2:
-        print("Error unable to parse date range ",dateString)
-        exit(1)
-    
-      startDate = dates[0].strip()
-      endDate = dates[1].strip()
+  Text split by <br> tags is joined back together, so the tree does not need to be
+  rewritten first. Items without a date or a name are reported and skipped.
 
-      if not(" " in endDate):
-        #no month
-        month = startDate.split(" ")[0]
-        endDate = month + " " + endDate
-    
-      #Loop from start date till end date, append to array
-      start = datetime.strptime(startDate + " " + year, input_format)
-      end = datetime.strptime(endDate + " " + year, input_format)
+  Args:
+    tree: Parsed holidays-calendar.net year page
 
-      currentDate  = start
-      while currentDate <= end:
-        datas.append({"date": currentDate,"holiday":holidayName})
+  Yields:
+    Tuple of (date text, holiday name), both stripped
+  """
+  for item in HOLIDAY_ITEM_XPATH(tree):
+    row = _itemRow(item)
+    if row is not None:
+      yield row
 
-        currentDate += timedelta(days=1)
 
-    else:
+def _holidayRecords(title: str, rows) -> list:
+  # Turns (date text, holiday name) pairs into holiday dictionaries, one per day of a range
+  # extract year from title (Eg, "France Publich Holidays 2025")
+  year = "".join([char for char in title if char.isdigit()])
 
-      # not date range
-      datas.append({"date":datetime.strptime(dateString + " " + year, input_format),"holiday":holidayName})
+  datas = []
+  for dateString, holidayName in rows:
+    try:
+      # check if holiday span across few days
+      if "–" in dateString:
+        dates = dateString.split("–")
+        if len(dates) != 2:
+          print("Error unable to parse date range ",dateString)
+          continue
+
+        startDate = dates[0].strip()
+        endDate = dates[1].strip()
 
+        if not(" " in endDate):
+          #no month
+          month = startDate.split(" ")[0]
+          endDate = month + " " + endDate
 
+        #Loop from start date till end date, append to array
+        start = parseDayMonth(startDate, year)
+        end = parseDayMonth(endDate, year)
 
-    
-  
+        currentDate  = start
+        while currentDate <= end:
+          datas.append({"date": currentDate,"holiday":holidayName})
 
+          currentDate += timedelta(days=1)
 
+      else:
 
-  # dates = [{"holiday": datetime.strptime(holidays[i].strip() + " " + year, input_format).strftime(output_format) ,"holidayName": holidayText[i].strip()} for i in range(len(holidays))]
+        # not date range
+        datas.append({"date":parseDayMonth(dateString, year),"holiday":holidayName})
+    except ValueError as e:
+      print(f"Warning: Could not parse date '{dateString} {year}': {e}")
+      continue
 
   print(f"Total records => {len(datas)}\n")
+  metrics.recordParsed(len(datas))
+
+  return datas
 
-  #print("Dates\n",dates)
 
-  return datas
\ No newline at end of file
+@metrics.timed("parse")
+def parseHolidayData(content: bytes) -> list:
+  # Parse using lxml
+  tree = html.fromstring(content)
+
+  # Grab the page title
+  titles = TITLE_XPATH(tree)
+  title = titles[0] if titles else "No title found"
+
+  return _holidayRecords(title, iterHolidayRows(tree))
+
+
+def parseHolidayDataStream(chunks) -> list:
+  """
+  Same as parseHolidayData(), but parses the page while it arrives.
+
+  Each 'details' block is read as soon as it closes, then every closed div outside a
+  block is cleared along with its earlier siblings, so the full tree is never built
+  and memory stays flat.
+
+  Only the time spent parsing is added to the parse stage, not the time spent
+  waiting for chunks.
+
+  Args:
+    chunks: Iterable of page body chunks (Eg, http_client.fetchChunks(url))
+
+  Returns:
+    List of holiday dictionaries with date 'date' and 'holiday' fields
+  """
+  # Only closing title and div tags are reported, which keeps the per-event Python work small
+  parser = etree.HTMLPullParser(events=("end",), tag=("title", "div"))
+  title = None
+  rows = []
+  parseSeconds = 0.0
+
+  for chunk in chunks:
+    started = time.perf_counter()
+    parser.feed(chunk)
+    for _, element in parser.read_events():
+      if element.tag == "title":
+        if title is None:
+          title = element.text or ""
+        continue
+
+      if _isDetails(element) and not IS_REGIONAL_XPATH(element):
+        rows.extend(row for row in map(_itemRow, DETAILS_ITEM_XPATH(element)) if row is not None)
+
+      # Drop the finished subtree, unless it is part of a block that is still open
+      if not any(_isDetails(ancestor) for ancestor in element.iterancestors("div")):
+        element.clear()
+        while element.getprevious() is not None:
+          del element.getparent()[0]
+    parseSeconds += time.perf_counter() - started
+
+  started = time.perf_counter()
+  parser.close()
+  datas = _holidayRecords(title if title is not None else "No title found", rows)
+  metrics.recordStageTime("parse", parseSeconds + time.perf_counter() - started)
+
+  return datas
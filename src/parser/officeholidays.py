@@ -0,0 +1,171 @@
+from datetime import datetime
+
+from lxml import etree, html
+
+from crawl_state import crawlYearsIncrementally
+from functions import getOutputPath, mapConcurrently
+from http_client import fetch
+import metrics
+
+# Holiday types, as written in the 4th column of the country table
+NATIONAL_HOLIDAY = "National Holiday"
+REGIONAL_HOLIDAY = "Regional Holiday"
+
+# Region of national holidays when regional holidays are included
+ALL_REGIONS = "All"
+
+# Upper bound on the years of one crawl, so a misconfigured range cannot run unbounded
+MAX_YEARS = 50
+
+# Year pages fetched at the same time
+MAX_WORKERS = 4
+
+# Rows of the officeholidays.com country table, read in a single pass
+ROW_XPATH = etree.XPath("//table[contains(@class,'country-table')]/tbody/tr")
+TYPE_XPATH = etree.XPath("td[4]/text()", smart_strings=False)
+DATE_XPATH = etree.XPath("td[2]/time/@datetime", smart_strings=False)
+NAME_XPATH = etree.XPath("td[3]/*/text()", smart_strings=False)
+COMMENTS_XPATH = etree.XPath("normalize-space(td[5])", smart_strings=False)
+
+
+def getYearUrl(url: str, year: int) -> str:
+    # Eg, https://www.officeholidays.com/countries/malaysia/2025
+    return "{}/{}".format(url.rstrip('/'), year)
+
+
+def getYearRange(from_year: int, to_year: int) -> list:
+    """
+    Lists the years from from_year to to_year (both inclusive).
+
+    Raises:
+        ValueError: If the range is empty or longer than MAX_YEARS
+    """
+    if to_year < from_year:
+        raise ValueError(f"Invalid year range {from_year}-{to_year}")
+    if to_year - from_year + 1 > MAX_YEARS:
+        raise ValueError(f"Year range {from_year}-{to_year} is longer than {MAX_YEARS} years")
+    return list(range(from_year, to_year + 1))
+
+
+def getHolidayData(url: str, year: int, include_regional: bool = False) -> list:
+    crawlURL = getYearUrl(url, year)
+    response = fetch(crawlURL)
+
+    return parseHolidayData(response.content, crawlURL, include_regional)
+
+
+def getOfficeHolidays(url: str, years: list, include_regional: bool = False, max_workers: int = MAX_WORKERS) -> list:
+    """
+    Fetches several year pages of a country concurrently.
+
+    Args:
+        url: Country page URL (Eg, https://www.officeholidays.com/countries/malaysia)
+        years: Years to fetch
+        include_regional: Whether to include regional holidays, see parseHolidayData()
+        max_workers: Maximum number of year pages fetched at the same time
+
+    Returns:
+        List of holiday dictionaries, in year order
+    """
+    pages = mapConcurrently(lambda year: getHolidayData(url, year, include_regional), years, max_workers)
+    return [row for page in pages for row in page]
+
+
+def _regionNames(comments: str) -> list:
+    # Eg, "Johor, Kedah, Kelantan and Terengganu" or "Regional Holiday in Sabah"
+    comments = comments.split(" in ", 1)[1] if comments.lower().startswith("regional holiday in ") else comments
+    names = []
+    for part in comments.replace(" and ", ",").split(","):
+        name = part.strip().rstrip(".")
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+@metrics.timed("parse")
+def parseHolidayData(content: bytes, source_url: str, include_regional: bool = False) -> list:
+    """
+    Extracts the holidays of an officeholidays.com year page.
+
+    Args:
+        content: Page HTML
+        source_url: Page URL, for warnings
+        include_regional: False to keep national holidays only, as 'date' and 'holiday'.
+            True to also keep regional holidays; every row then gets a 'region' list,
+            ["All"] for national holidays and the states named in the comments column
+            for regional ones. Rows sharing a date and name are merged.
+
+    Returns:
+        List of holiday dictionaries, in page order
+    """
+    # Parse using lxml
+    tree = html.fromstring(content)
+
+    # Read type, date and name from each row, so a malformed row only loses that row
+    data = []
+    merged = {}
+    for row in ROW_XPATH(tree):
+        types = TYPE_XPATH(row)
+        if NATIONAL_HOLIDAY in types:
+            regions = [ALL_REGIONS]
+        elif include_regional and REGIONAL_HOLIDAY in types:
+            regions = _regionNames(COMMENTS_XPATH(row))
+            if not regions:
+                print(f"Warning: Skipping regional holiday without regions in {source_url}")
+                continue
+        else:
+            continue
+
+        dates = DATE_XPATH(row)
+        names = NAME_XPATH(row)
+
+        if len(dates) != 1 or len(names) != 1:
+            print(f"Warning: Skipping row with {len(dates)} date(s) and {len(names)} name(s) in {source_url}")
+            continue
+
+        if not include_regional:
+            data.append({'date': dates[0], 'holiday': names[0]})
+            continue
+
+        key = (dates[0], names[0])
+        if key in merged:
+            merged[key]['region'] += [region for region in regions if region not in merged[key]['region']]
+        else:
+            merged[key] = {'date': dates[0], 'holiday': names[0], 'region': regions}
+            data.append(merged[key])
+
+    metrics.recordParsed(len(data))
+    return data
+
+
+def crawlHolidays(country: dict) -> list:
+    """
+    Fetches the configured years of a country; past years already stored unchanged are
+    not fetched again.
+
+    Registry options:
+        yearsBack: Past years to fetch (default: 0)
+        yearsAhead: Future years to fetch (default: 1)
+        includeRegional: Whether to include regional holidays (default: False)
+
+    Args:
+        country: Registry entry (see countries.COUNTRIES)
+
+    Returns:
+        List of holiday dictionaries, sorted by date
+    """
+    currentYear = datetime.now().year
+    dataYears = getYearRange(currentYear - country.get('yearsBack', 0), currentYear + country.get('yearsAhead', 1))
+    includeRegional = country.get('includeRegional', False)
+
+    return crawlYearsIncrementally(
+        country['countryAlpha3Code'],
+        getOutputPath(country['countryAlpha3Code']),
+        lambda skip_years: getOfficeHolidays(
+            country['source'],
+            [year for year in dataYears if year not in skip_years],
+            includeRegional
+        ),
+        dataYears[0],
+        dataYears[-1]
+    )
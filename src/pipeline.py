@@ -0,0 +1,195 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+import contextvars
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+import budget
+from functions import mapConcurrently
+from http_client import fetch, fetchChunks
+import metrics
+
+# Parser processes shared by every crawler; 0 parses on the fetching threads instead
+PARSE_PROCESSES = int(os.environ.get("HOLIDAYS_PARSE_PROCESSES", os.cpu_count() or 1))
+
+# Parse pages while they download, on the fetching threads, wherever a streaming parser
+# exists (see fetchAndParse), even when the process pool is enabled
+STREAM_PARSE = os.environ.get("HOLIDAYS_STREAM_PARSE", "") not in ("", "0")
+
+# Downloaded pages waiting for a parser; fetching pauses while the queue is full
+QUEUE_SIZE = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure(processes: int = None, stream: bool = None) -> None:
+  """
+  Sets how pages are parsed. Call before the first crawl.
+
+  Args:
+    processes: Number of parser processes, 0 to parse in the calling process
+    stream: Whether to parse pages while they download where possible, see STREAM_PARSE
+  """
+  global PARSE_PROCESSES, STREAM_PARSE
+  if processes is not None:
+    PARSE_PROCESSES = max(0, processes)
+  if stream is not None:
+    STREAM_PARSE = stream
+
+
+def getProcessPool() -> ProcessPoolExecutor:
+  """
+  Returns the process-wide parser pool, starting it on first use, or None when
+  parsing in processes is disabled.
+
+  Workers are spawned rather than forked, as the crawler process runs threads.
+  """
+  global _pool
+  if PARSE_PROCESSES <= 0:
+    return None
+  if _pool is None:
+    with _pool_lock:
+      if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+  return _pool
+
+
+def _timedParse(parse, content: bytes, args: tuple) -> tuple:
+  # Runs in a parser process, where the caller's metrics are not available
+  started = time.perf_counter()
+  rows = parse(content, *args)
+  return rows, time.perf_counter() - started
+
+
+def _fetchPages(urls: list, pages: queue.Queue, next_index, stop: threading.Event) -> None:
+  # Fetching thread: downloads the next URL until none is left, putting (index, content or exception)
+  while not stop.is_set():
+    with next_index["lock"]:
+      index = next_index["value"]
+      next_index["value"] += 1
+    if index >= len(urls):
+      return
+    try:
+      item = (index, fetch(urls[index]).content)
+    except BaseException as e:
+      item = (index, e)
+    while not stop.is_set():
+      try:
+        pages.put(item, timeout=0.1)
+        break
+      except queue.Full:
+        continue
+
+
+def fetchAndParse(urls: list, parse, *args, stream_parse=None, fetch_workers: int = 4, queue_size: int = QUEUE_SIZE) -> list:
+  """
+  Downloads pages on threads and parses them on the shared process pool, so
+  downloads and parsing overlap and parsing is not limited by the GIL.
+
+  Fetching threads put page bodies into a bounded queue, so they wait when the
+  parsers fall behind, and at most twice as many pages as there are parser
+  processes are being parsed at any time.
+
+  Pages are parsed on the fetching threads instead when the pool is disabled, or
+  when a stream_parse function is given and STREAM_PARSE is set. With stream_parse,
+  they are then parsed while they download, so the whole body is never buffered;
+  with the default settings, pages go to the pool whole.
+
+  Args:
+    urls: Page URLs
+    parse: Module-level (picklable) function called as parse(content, *args)
+    *args: Other picklable arguments for parse
+    stream_parse: Optional function called as stream_parse(chunks, *args), used instead of parse without a pool or with STREAM_PARSE
+    fetch_workers: Maximum number of pages downloaded at the same time
+    queue_size: Maximum number of downloaded pages waiting for a parser
+
+  Returns:
+    List of parse results, in the order of urls
+
+  Raises:
+    The first exception raised by a download or a parse
+  """
+  pool = None if STREAM_PARSE and stream_parse is not None else getProcessPool()
+  if pool is None or not urls:
+    if stream_parse is not None:
+      return mapConcurrently(lambda url: stream_parse(fetchChunks(url), *args), urls, fetch_workers)
+    return mapConcurrently(lambda url: parse(fetch(url).content, *args), urls, fetch_workers)
+
+  pages = queue.Queue(maxsize=max(1, queue_size))
+  stop = threading.Event()
+  nextIndex = {"value": 0, "lock": threading.Lock()}
+  fetchers = [
+    threading.Thread(target=contextvars.copy_context().run, args=(_fetchPages, urls, pages, nextIndex, stop), daemon=True)
+    for _ in range(max(1, min(fetch_workers, len(urls))))
+  ]
+  for fetcher in fetchers:
+    fetcher.start()
+
+  results = [None] * len(urls)
+  pending = {}
+  received = 0
+  maxPending = 2 * PARSE_PROCESSES
+  try:
+    while received < len(urls) or pending:
+      # Polls, so a crawl out of time stops even while a download hangs
+      budget.checkBudget()
+
+      # Hand downloaded pages to the parsers while there is room
+      while received < len(urls) and len(pending) < maxPending:
+        try:
+          index, content = pages.get(timeout=0.05)
+        except queue.Empty:
+          break
+        received += 1
+        if isinstance(content, BaseException):
+          raise content
+        pending[pool.submit(_timedParse, parse, content, args)] = index
+
+      if not pending:
+        continue
+
+      done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+      for future in done:
+        index = pending.pop(future)
+        rows, elapsed = future.result()
+        metrics.recordStageTime("parse", elapsed)
+        if isinstance(rows, list):
+          metrics.recordParsed(len(rows))
+        results[index] = rows
+  finally:
+    stop.set()
+    for future in pending:
+      future.cancel()
+    for fetcher in fetchers:
+      fetcher.join()
+
+  return results
+
+
+def parseInProcess(parse, content: bytes, *args):
+  """
+  Parses one downloaded page on the shared process pool (or inline when disabled).
+
+  Args:
+    parse: Module-level (picklable) function called as parse(content, *args)
+    content: Page body
+    *args: Other picklable arguments for parse
+
+  Returns:
+    Result of parse
+  """
+  pool = getProcessPool()
+  if pool is None:
+    return parse(content, *args)
+
+  try:
+    rows, elapsed = pool.submit(_timedParse, parse, content, args).result(timeout=budget.remaining())
+  except FutureTimeoutError:
+    raise budget.BudgetExceeded() from None
+  metrics.recordStageTime("parse", elapsed)
+  if isinstance(rows, list):
+    metrics.recordParsed(len(rows))
+  return rows
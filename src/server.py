@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+from collections import OrderedDict
+from datetime import date
+import hashlib
+import json
+import os
+import sys
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from delta_log import changesSince, getDeltasDir
+from holiday_index import DATA_DIR, HolidayIndex, getRegions, loadHolidayResults
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Seconds between checks of the data files' modification times
+RELOAD_INTERVAL = 1.0
+
+# Encoded responses kept per data generation, by request target
+RESPONSE_CACHE_SIZE = 4096
+
+MAX_HEADER_BYTES = 16384
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 431: "Request Header Fields Too Large"}
+
+
+class _Generation:
+  # One consistent load of the data files, with the responses encoded from it
+  __slots__ = ('results', 'index', 'responses')
+
+  def __init__(self, results: list):
+    self.results = {result['countryAlpha3Code'].upper(): result for result in results}
+    self.index = HolidayIndex(results)
+    self.responses = OrderedDict()
+
+
+class HolidayData:
+  """
+  In-memory holidays of every data file, with the encoded responses served from them.
+
+  reloadIfChanged() swaps in a new generation when a file is added, removed or its
+  size or mtime changes; each request is answered from a single generation.
+  """
+
+  def __init__(self, data_dir: str = DATA_DIR):
+    self.data_dir = data_dir
+    self.deltas_dir = getDeltasDir(data_dir)
+    self._signature = None
+    self._generation = _Generation([])
+
+  def countries(self) -> list:
+    return sorted(self._generation.results)
+
+  def _fileSignature(self) -> tuple:
+    signature = []
+    with os.scandir(self.data_dir) as entries:
+      for entry in entries:
+        if entry.name.endswith('.json'):
+          stat = entry.stat()
+          signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+  def reloadIfChanged(self) -> bool:
+    """
+    Reloads the data files if any of them was added, removed or modified.
+
+    Returns:
+      True if the data was reloaded
+    """
+    signature = self._fileSignature()
+    if signature == self._signature:
+      return False
+
+    self._generation = _Generation(loadHolidayResults(self.data_dir))
+    self._signature = signature
+    return True
+
+  def respond(self, target: str) -> tuple:
+    """
+    Answers a GET request, from the response cache when possible.
+
+    Args:
+      target: Request target (path and query string)
+
+    Returns:
+      Tuple of (status, body bytes, strong ETag or None)
+    """
+    generation = self._generation
+    cached = generation.responses.get(target)
+    if cached is not None:
+      generation.responses.move_to_end(target)
+      return cached
+
+    try:
+      body = encodeJson(_route(generation, target, self.deltas_dir))
+    except KeyError as e:
+      return 404, encodeJson({"error": e.args[0] if e.args else "Not found"}), None
+    except ValueError as e:
+      return 400, encodeJson({"error": str(e)}), None
+
+    # Strong ETag: identical bytes, identical tag
+    cached = (200, body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+    generation.responses[target] = cached
+    if len(generation.responses) > RESPONSE_CACHE_SIZE:
+      generation.responses.popitem(last=False)
+    return cached
+
+
+def _route(generation: _Generation, target: str, deltas_dir: str):
+  parts = urlsplit(target)
+  path = [unquote(part) for part in parts.path.strip('/').split('/') if part]
+  query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+  if path == ['countries']:
+    return [_countrySummary(result) for _, result in sorted(generation.results.items())]
+
+  if path == ['holidays']:
+    countries = [code for code in query.get('countries', '').split(',') if code]
+    if not countries:
+      raise ValueError("Missing 'countries' parameter (e.g. ?countries=SGP,MYR)")
+    return {generation.index.countryCode(country): _holidays(generation.index, country, query) for country in countries}
+
+  if len(path) == 2 and path[0] == 'holidays':
+    country = path[1]
+    return {
+      "countryAlpha3Code": generation.index.countryCode(country),
+      "deltaSequence": generation.results[generation.index.countryCode(country)].get('deltaSequence', 0),
+      "region": query.get('region'),
+      "from": query.get('from'),
+      "to": query.get('to'),
+      "holidays": _holidays(generation.index, country, query)
+    }
+
+  if len(path) == 2 and path[0] == 'changes':
+    # Delta logs are appended just before their data file is replaced, so they are
+    # never behind the generation that serves them
+    return changesSince(generation.index.countryCode(path[1]), _parseSequence(query, 'since'), deltas_dir)
+
+  raise KeyError(f"Unknown path '{parts.path}'")
+
+
+def _holidays(index: HolidayIndex, country: str, query: dict) -> list:
+  start = _parseDate(query, 'from', date.min)
+  end = _parseDate(query, 'to', date.max)
+  return index.holidaysBetween(country, start, end, query.get('region'))
+
+
+def _countrySummary(result: dict) -> dict:
+  return {
+    "countryAlpha3Code": result['countryAlpha3Code'],
+    "countryAlpha2Code": result.get('countryAlpha2Code'),
+    "country": result.get('country'),
+    "regions": getRegions(result),
+    "holidaysDigest": result.get('holidaysDigest'),
+    "deltaSequence": result.get('deltaSequence', 0),
+    "updated_on": result.get('updated_on')
+  }
+
+
+def _parseDate(query: dict, name: str, default: date) -> date:
+  if name not in query:
+    return default
+  try:
+    return date.fromisoformat(query[name])
+  except ValueError:
+    raise ValueError(f"Invalid '{name}' date '{query[name]}', expected YYYY-MM-DD") from None
+
+
+def _parseSequence(query: dict, name: str) -> int:
+  if name not in query:
+    raise ValueError(f"Missing '{name}' parameter (e.g. ?{name}=0)")
+  if not query[name].isdigit():
+    raise ValueError(f"Invalid '{name}' sequence number '{query[name]}'")
+  return int(query[name])
+
+
+def encodeJson(data) -> bytes:
+  return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class HolidayProtocol(asyncio.Protocol):
+  """
+  Minimal HTTP/1.1 server protocol: GET and HEAD only, keep-alive and pipelining,
+  request bodies are not supported.
+  """
+
+  def __init__(self, data: HolidayData):
+    self._data = data
+    self._buffer = b""
+    self._transport = None
+
+  def connection_made(self, transport):
+    self._transport = transport
+
+  def data_received(self, chunk: bytes):
+    self._buffer += chunk
+    while True:
+      end = self._buffer.find(b"\r\n\r\n")
+      if end == -1:
+        if len(self._buffer) > MAX_HEADER_BYTES:
+          self._send(431, b"", None, False, keep_alive=False)
+        return
+
+      head = self._buffer[:end].decode('latin-1')
+      self._buffer = self._buffer[end + 4:]
+      if not self._handle(head):
+        return
+
+  def _handle(self, head: str) -> bool:
+    # Returns False when the connection was closed
+    lines = head.split("\r\n")
+    try:
+      method, target, version = lines[0].split(" ")
+    except ValueError:
+      self._send(400, encodeJson({"error": "Malformed request line"}), None, False, keep_alive=False)
+      return False
+
+    headers = {}
+    for line in lines[1:]:
+      name, _, value = line.partition(":")
+      headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    keepAlive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+    if method not in ("GET", "HEAD"):
+      self._send(405, encodeJson({"error": f"Method {method} not allowed"}), None, False, keep_alive=False, extra=b"Allow: GET, HEAD\r\n")
+      return False
+
+    status, body, etag = self._data.respond(target)
+    if etag is not None and etag in _parseEtags(headers.get("if-none-match", "")):
+      self._send(304, b"", etag, True, keep_alive=keepAlive)
+    else:
+      self._send(status, body, etag, method == "HEAD", keep_alive=keepAlive)
+    return keepAlive
+
+  def _send(self, status: int, body: bytes, etag: str, head_only: bool, keep_alive: bool, extra: bytes = b""):
+    header = f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+    if status != 304:
+      header += f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+    if etag is not None:
+      header += f"ETag: {etag}\r\nCache-Control: no-cache\r\n"
+    if not keep_alive:
+      header += "Connection: close\r\n"
+    payload = header.encode('latin-1') + extra + b"\r\n"
+    if not head_only and status != 304:
+      payload += body
+    self._transport.write(payload)
+    if not keep_alive:
+      self._transport.close()
+
+
+def _parseEtags(value: str) -> set:
+  if value.strip() == "*":
+    return _AnyEtag()
+  return {tag.strip() for tag in value.split(",") if tag.strip()}
+
+
+class _AnyEtag:
+  # "If-None-Match: *" matches any current representation
+
+  def __contains__(self, etag) -> bool:
+    return True
+
+
+async def reloadPeriodically(data: HolidayData, interval: float = RELOAD_INTERVAL) -> None:
+  """
+  Checks the data files every interval seconds and reloads them in a worker thread when they change.
+  """
+  loop = asyncio.get_running_loop()
+  while True:
+    await asyncio.sleep(interval)
+    try:
+      if await loop.run_in_executor(None, data.reloadIfChanged):
+        print("Data files changed, reloaded")
+    except (OSError, ValueError, KeyError) as e:
+      print(f"Warning: Could not reload data files: {e}")
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, data_dir: str = DATA_DIR) -> None:
+  data = HolidayData(data_dir)
+  data.reloadIfChanged()
+
+  loop = asyncio.get_running_loop()
+  server = await loop.create_server(lambda: HolidayProtocol(data), host, port, reuse_address=True)
+  reloader = asyncio.create_task(reloadPeriodically(data))
+
+  print(f"Serving {len(data.countries())} countries from {os.path.abspath(data_dir)} on http://{host}:{port}")
+  try:
+    async with server:
+      await server.serve_forever()
+  finally:
+    reloader.cancel()
+
+
+def main(argv: list = None) -> int:
+  argParser = argparse.ArgumentParser(description="Serve the crawled public holidays over HTTP.")
+  argParser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+  argParser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+  argParser.add_argument("--data-dir", default=DATA_DIR, help="directory containing the '{code}.json' files (default: data/)")
+  args = argParser.parse_args(argv)
+
+  try:
+    asyncio.run(serve(args.host, args.port, args.data_dir))
+  except KeyboardInterrupt:
+    pass
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
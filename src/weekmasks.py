@@ -0,0 +1,9 @@
+# Working days of each country, shared by business_days and date_index. Kept free of
+# dependencies, so importing them does not load numpy.
+
+# Mon..Sun, 1 = working day
+DEFAULT_WEEKMASK = "1111100"
+
+# Weekend masks that differ from Saturday/Sunday, by alpha-3 code.
+# Countries whose weekend differs only in some states (e.g. Malaysia) keep the default.
+WEEKMASKS = {}
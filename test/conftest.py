@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+import http_cache
+import http_replay
+
+
+@pytest.fixture
+def replay(tmp_path):
+  """
+  Serves HTTP responses from a fixtures directory under tmp_path, bypassing the HTTP cache.
+
+  Yields:
+    Function saving a fixture: save(url, content, headers=None)
+  """
+  mode, directory, cacheEnabled = http_replay.getMode(), http_replay.FIXTURES_DIR, http_cache.isEnabled()
+  http_replay.configure("replay", str(tmp_path / "fixtures"))
+  http_cache.configure(enabled=False)
+  try:
+    yield http_replay.save
+  finally:
+    http_replay.configure(mode, directory)
+    http_cache.configure(enabled=cacheEnabled)
+
+
+@pytest.fixture(scope="session")
+def holidayResults():
+  """
+  The published data/*.json results, to check the query modules against.
+  """
+  from holiday_index import loadHolidayResults
+  return loadHolidayResults()
+
+
+@pytest.fixture(scope="session")
+def naiveCalendars(holidayResults):
+  """
+  Every calendar of the published data, worked out by a plain scan of the holidays.
+
+  Returns:
+    Dictionary mapping (alpha-3 code, region or None) to the calendar's holidays sorted by date
+  """
+  calendars = {}
+  for result in holidayResults:
+    regions = list(result.get('countryRegions') or [])
+    for holiday in result['holidays']:
+      regions += [region for region in holiday.get('region') or () if region not in regions]
+    for region in [None] + regions:
+      calendars[(result['countryAlpha3Code'], region)] = sorted(
+        (
+          holiday for holiday in result['holidays']
+          # A holiday tagged "All" belongs to every region
+          if region is None or region in (holiday.get('region') or ()) or (region != "All" and "All" in (holiday.get('region') or ()))
+        ),
+        key=lambda holiday: holiday['date']
+      )
+  return calendars
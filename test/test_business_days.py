@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from business_days import BusinessCalendars
+
+
+@pytest.fixture(scope="module")
+def calendars(holidayResults):
+  return BusinessCalendars(holidayResults)
+
+
+def isBusinessDay(day: date, dates: set, weekmask: str = "1111100") -> bool:
+  return weekmask[day.weekday()] == "1" and day.isoformat() not in dates
+
+
+def yearsOf(holidays: list) -> list:
+  first = date(int(holidays[0]['date'][:4]), 1, 1)
+  return [first + timedelta(days=offset) for offset in range((date(int(holidays[-1]['date'][:4]), 12, 31) - first).days + 1)]
+
+
+def test_is_business_day_matches_scan(calendars, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    dates = {holiday['date'] for holiday in holidays}
+    days = yearsOf(holidays)
+    expected = [isBusinessDay(day, dates) for day in days]
+    assert calendars.isBusinessDay(code, [day.isoformat() for day in days], region).tolist() == expected, (code, region)
+
+
+def test_add_and_count_business_days_match_scan(calendars, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    dates = {holiday['date'] for holiday in holidays}
+    businessDays = [day for day in yearsOf(holidays) if isBusinessDay(day, dates)]
+    starts = businessDays[:-10:7]
+
+    moved = calendars.addBusinessDays(code, [day.isoformat() for day in starts], 10, region)
+    assert moved.tolist() == [businessDays[businessDays.index(day) + 10] for day in starts], (code, region)
+
+    counts = calendars.businessDaysBetween(code, businessDays[0].isoformat(), [day.isoformat() for day in starts], region)
+    assert counts.tolist() == [businessDays.index(day) for day in starts], (code, region)
+
+
+def test_weekmask_override():
+  results = [{"countryAlpha3Code": "XYZ", "holidays": [{"date": "2026-01-04", "holiday": "Sunday holiday"}]}]
+  # Friday and Saturday off
+  calendars = BusinessCalendars(results, weekmasks={"XYZ": "1111001"})
+
+  days = [date(2026, 1, 1) + timedelta(days=offset) for offset in range(14)]
+  assert calendars.isBusinessDay("XYZ", np.array(days, dtype='datetime64[D]')).tolist() == [isBusinessDay(day, {"2026-01-04"}, "1111001") for day in days]
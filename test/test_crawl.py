@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import countries
+import crawl
+import crawl_state
+import http_cache
+import http_replay
+import metrics
+import pipeline
+
+SOURCE_URL = "https://example.com/holidays.json"
+
+
+@pytest.fixture
+def published(replay, tmp_path, monkeypatch):
+  """
+  Registers a test country 'XYZ' (parsed by test_http_cache) with a recorded source,
+  keeping the settings crawl.main changes and the run metrics out of the real tree.
+
+  Returns:
+    Fixtures directory holding the recorded source
+  """
+  monkeypatch.setitem(countries.PARSERS, "test", "test_http_cache")
+  monkeypatch.setitem(countries._countries, "XYZ", {
+    "countryAlpha3Code": "XYZ",
+    "countryAlpha2Code": "XY",
+    "country": "Xyz",
+    "source": SOURCE_URL,
+    "parser": "test",
+    "yearsBack": 1
+  })
+  monkeypatch.setitem(countries._codes, "XYZ", "XYZ")
+  monkeypatch.setattr(crawl_state, "STATE_PATH", crawl_state.STATE_PATH)
+  monkeypatch.setattr(http_cache, "CACHE_DIR", http_cache.CACHE_DIR)
+  monkeypatch.setattr(metrics, "runDirectory", lambda started_on: str(tmp_path / "metrics"))
+  monkeypatch.chdir(tmp_path)
+  monkeypatch.setattr(pipeline, "PARSE_PROCESSES", 0)
+
+  replay(SOURCE_URL, json.dumps([{"date": "2025-01-01", "holiday": "New Year"}]).encode('utf-8'), {"Content-Type": "application/json"})
+  return http_replay.FIXTURES_DIR
+
+
+def test_replay_leaves_the_published_tree_alone(published, capsys):
+  publishedPath = os.path.join(crawl.SRC_DIR, '..', 'data', 'xyz.json')
+  statePath = crawl_state.STATE_PATH
+
+  assert crawl.main(["XYZ", "--replay", published]) == 0
+
+  scratch = capsys.readouterr().out.split("writing the output under ")[1].splitlines()[0]
+  with open(os.path.join(scratch, 'data', 'xyz.json'), 'r', encoding='utf-8') as f:
+    assert json.load(f)["holidays"][0]["holiday"] == "New Year"
+  assert os.path.exists(os.path.join(scratch, 'data', 'holidays.bin'))
+  assert crawl_state.STATE_PATH == os.path.join(scratch, 'state', 'crawl-state.json') != statePath
+  assert not os.path.exists(publishedPath)
+  shutil.rmtree(scratch)
+
+
+def test_daemon_cannot_replay(published):
+  with pytest.raises(SystemExit):
+    crawl.main(["XYZ", "--daemon", "--replay", published])
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+import requests
+
+import crawl_state
+from crawl_state import crawlYearsIncrementally, deferUpdates, getCountryState, mergeWithStored, reusableSources, sourceDigest, sourceEntry, updateCountryState
+from parser import data_gov_sg
+
+COLLECTION_URL = "https://api-production.data.gov.sg/v2/public/api/collections/691/metadata"
+
+
+def holiday(date: str, name: str) -> dict:
+  return {"date": date, "holiday": name}
+
+
+def writeStored(path, holidays: list) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  path.write_text(json.dumps({"holidays": holidays}), encoding='utf-8')
+
+
+@pytest.fixture(autouse=True)
+def statePath(tmp_path, monkeypatch):
+  path = tmp_path / "state" / "crawl-state.json"
+  monkeypatch.setattr(crawl_state, "STATE_PATH", str(path))
+  return path
+
+
+def test_source_digest_ignores_order_and_day():
+  fetched = [holiday("2025-01-01", "B"), holiday("2025-01-01", "A"), {**holiday("2025-02-01", "C"), "region": ["North"]}]
+  stored = [{**entry, "day": "Wednesday"} for entry in reversed(fetched)]
+
+  assert sourceDigest(fetched) == sourceDigest(stored)
+  assert sourceDigest(fetched) != sourceDigest(fetched[:2])
+
+
+def test_reusable_sources_are_unchanged_past_years():
+  stored = [holiday("2019-01-01", "A"), holiday("2020-01-01", "B"), holiday("2030-01-01", "C")]
+  updateCountryState("XYZ", {
+    "2019": sourceEntry([holiday("2019-01-01", "A")]),
+    # Amended by hand since it was fetched
+    "2020": sourceEntry([holiday("2020-01-01", "Old B")]),
+    # Not a past year
+    "2030": sourceEntry([holiday("2030-01-01", "C")])
+  })
+
+  assert list(reusableSources("XYZ", stored, current_year=2025)) == ["2019"]
+
+
+def test_merge_keeps_only_years_of_reused_sources():
+  stored = [holiday("2018-01-01", "Dropped"), holiday("2019-01-01", "Kept"), holiday("2024-01-01", "Replaced")]
+  fresh = [holiday("2024-01-02", "Fresh")]
+
+  merged = mergeWithStored(stored, fresh, {"2019": {"years": [2019]}})
+
+  assert merged == [holiday("2019-01-01", "Kept"), holiday("2024-01-02", "Fresh")]
+
+
+def test_merge_drops_years_outside_window():
+  stored = [holiday("2018-01-01", "Old"), holiday("2019-01-01", "Kept")]
+  fresh = [holiday("2024-01-01", "Fresh"), holiday("2031-01-01", "Too late")]
+
+  merged = mergeWithStored(stored, fresh, {"2018": {"years": [2018]}, "2019": {"years": [2019]}}, 2019, 2030)
+
+  assert merged == [holiday("2019-01-01", "Kept"), holiday("2024-01-01", "Fresh")]
+
+
+def test_incremental_crawl_skips_reused_years(tmp_path):
+  output = tmp_path / "data" / "xyz.json"
+  past = [holiday("2019-05-01", "Labour Day")]
+  writeStored(output, past + [holiday("2010-01-01", "Outside window")])
+  updateCountryState("XYZ", {"2019": sourceEntry(past), "2010": sourceEntry([holiday("2010-01-01", "Outside window")])})
+
+  skipped = []
+  def fetchYears(skip_years):
+    skipped.append(skip_years)
+    return [holiday("2020-01-01", " New Year ")]
+
+  merged = crawlYearsIncrementally("XYZ", str(output), fetchYears, 2019, 2020)
+
+  assert skipped == [{2019}]
+  assert merged == past + [holiday("2020-01-01", "New Year")]
+  assert set(getCountryState("XYZ")["sources"]) == {"2010", "2019", "2020"}
+
+
+def test_deferred_updates_apply_when_block_completes(statePath):
+  with deferUpdates():
+    updateCountryState("XYZ", {"2020": sourceEntry([holiday("2020-01-01", "A")])})
+    assert not statePath.exists()
+
+  assert list(getCountryState("XYZ")["sources"]) == ["2020"]
+
+
+def test_deferred_updates_are_dropped_on_error(statePath):
+  with pytest.raises(RuntimeError):
+    with deferUpdates():
+      updateCountryState("XYZ", {"2020": sourceEntry([holiday("2020-01-01", "A")])})
+      raise RuntimeError("crawl failed")
+
+  assert not statePath.exists()
+
+
+def saveCollection(replay, child_datasets: list, records_by_dataset: dict, last_updated_at: str) -> None:
+  replay(COLLECTION_URL, json.dumps({
+    "data": {"collectionMetadata": {"childDatasets": child_datasets, "lastUpdatedAt": last_updated_at}}
+  }).encode('utf-8'))
+  for datasetId, records in records_by_dataset.items():
+    url = requests.Request('GET', data_gov_sg.DATASTORE_SEARCH_URL, params={
+      "resource_id": datasetId,
+      "fields": ",".join(data_gov_sg.FIELDS),
+      "limit": data_gov_sg.PAGE_SIZE,
+      "offset": 0
+    }).prepare().url
+    replay(url, json.dumps({"result": {"records": records, "total": len(records)}}).encode('utf-8'))
+
+
+def test_singapore_keeps_reused_dataset_sharing_a_year(replay, tmp_path, monkeypatch):
+  # getOutputPath() is relative to src/
+  (tmp_path / "src").mkdir()
+  monkeypatch.chdir(tmp_path / "src")
+  country = {"countryAlpha3Code": "SGP", "source": COLLECTION_URL}
+
+  reused = [holiday("2019-01-01", "New Year's Day"), holiday("2019-05-01", "Labour Day")]
+  fetched = [holiday("2019-12-25", "Christmas Day"), holiday("2020-01-01", "New Year's Day")]
+  writeStored(tmp_path / "data" / "sgp.json", reused + [holiday("2018-01-01", "Dataset left the collection")])
+  updateCountryState("SGP", {
+    "reused": sourceEntry(reused),
+    "removed": sourceEntry([holiday("2018-01-01", "Dataset left the collection")])
+  }, extra={"collectionLastUpdatedAt": "2025-01-01"})
+  # Only 'fetched' has records, so fetching 'reused' again would fail
+  saveCollection(replay, ["reused", "fetched"], {"fetched": fetched}, "2025-01-01")
+
+  assert data_gov_sg.crawlHolidays(country) == sorted(reused + fetched, key=lambda row: row["date"])
@@ -0,0 +1,44 @@
+import threading
+
+import daemon
+from daemon import RefreshSchedule
+
+
+def test_unchanged_checks_back_off_and_changes_reset():
+  schedule = RefreshSchedule(["XYZ"], 0, min_interval=60, max_interval=1000)
+  schedule._random.uniform = lambda low, high: 0
+
+  assert [schedule.reschedule("XYZ", False, 0) for _ in range(3)] == [1000, 1000, 1000]
+  assert schedule.reschedule("XYZ", True, 0) == 60
+  assert schedule.reschedule("XYZ", False, 0) == 120
+
+
+def test_failed_checks_retry_at_min_interval():
+  schedule = RefreshSchedule(["XYZ"], 0, min_interval=60, max_interval=100000)
+  schedule._random.uniform = lambda low, high: 0
+  schedule.reschedule("XYZ", False, 0)
+
+  assert [schedule.reschedule("XYZ", False, 0, failed=True) for _ in range(3)] == [60, 60, 60]
+  # The interval reached before the failures is kept
+  assert schedule.reschedule("XYZ", False, 0) == 14400
+
+
+def test_due_countries_come_out_in_order():
+  schedule = RefreshSchedule(["AAA", "BBB"], 0)
+
+  assert schedule.popDue(0) == ["AAA", "BBB"]
+  assert schedule.popDue(10 ** 9) == []
+  assert schedule.nextDue() is None
+
+
+def test_daemon_passes_budget_and_deadline_to_each_check():
+  stop = threading.Event()
+  calls = []
+
+  def runCheck(country_codes, jobs, time_budget, deadline):
+    calls.append((country_codes, jobs, time_budget, deadline))
+    stop.set()
+    return [{"code": code, "success": False, "unchanged": False} for code in country_codes]
+
+  assert daemon.runDaemon(["XYZ"], 2, runCheck, time_budget=30, deadline=60, stop=stop) == 0
+  assert calls == [(["XYZ"], 2, 30, 60)]
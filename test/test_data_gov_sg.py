@@ -0,0 +1,57 @@
+import json
+
+import pytest
+import requests
+
+from parser import data_gov_sg
+
+
+def pageUrl(dataset_id: str, offset: int) -> str:
+  return requests.Request('GET', data_gov_sg.DATASTORE_SEARCH_URL, params={
+    "resource_id": dataset_id,
+    "fields": ",".join(data_gov_sg.FIELDS),
+    "limit": data_gov_sg.PAGE_SIZE,
+    "offset": offset
+  }).prepare().url
+
+
+def record(index: int) -> dict:
+  return {"date": f"2025-01-{index + 1:02d}", "day": "", "holiday": f"Holiday {index}"}
+
+
+@pytest.fixture
+def savePages(replay, monkeypatch):
+  monkeypatch.setattr(data_gov_sg, "PAGE_SIZE", 5)
+
+  def save(dataset_id: str, pages: list, total: int = None) -> None:
+    offset = 0
+    for page in pages:
+      result = {"records": page}
+      if total is not None:
+        result["total"] = total
+      replay(pageUrl(dataset_id, offset), json.dumps({"result": result}).encode('utf-8'))
+      offset += len(page)
+  return save
+
+
+def test_pages_until_total_when_limit_is_capped(savePages):
+  # The API returns 2 records per page, fewer than the 5 requested
+  records = [record(index) for index in range(5)]
+  savePages("capped", [records[0:2], records[2:4], records[4:5]], total=5)
+
+  assert data_gov_sg.getDatasetRecords("capped") == records
+
+
+def test_empty_page_ends_dataset_short_of_total(savePages):
+  records = [record(index) for index in range(2)]
+  savePages("shrunk", [records, []], total=9)
+
+  assert data_gov_sg.getDatasetRecords("shrunk") == records
+
+
+def test_short_page_ends_dataset_without_total(savePages):
+  records = [record(index) for index in range(7)]
+  # No fixture for offset 7: fetching it would fail
+  savePages("untotalled", [records[0:5], records[5:7]])
+
+  assert data_gov_sg.getDatasetRecords("untotalled") == records
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from itertools import combinations
+
+import pytest
+
+from date_index import DateIndex
+
+# Mon..Sun, 1 = working day; Friday and Saturday off, to catch weekday off-by-one errors
+FRI_SAT_WEEKEND = "1111001"
+
+
+@pytest.fixture(scope="module")
+def index(holidayResults):
+  return DateIndex(holidayResults, weekmasks={"SGP": FRI_SAT_WEEKEND})
+
+
+@pytest.fixture(scope="module")
+def calendarDates(naiveCalendars):
+  # Holiday dates by calendar name, as DateIndex names them
+  return {
+    code if region is None else f"{code}:{region}": {date.fromisoformat(holiday['date']) for holiday in holidays}
+    for (code, region), holidays in naiveCalendars.items()
+  }
+
+
+def selections(index) -> list:
+  # Every pair of countries, and a few sets mixing countries and regions
+  countries = [name for name in index.calendars() if ":" not in name]
+  return [list(pair) for pair in combinations(countries, 2)] + [
+    countries,
+    ["GBR:Scotland", "GBR:England and Wales"],
+    ["GBR:Northern Ireland", "SGP", "MYR"]
+  ]
+
+
+def weekmaskOf(name: str) -> str:
+  return FRI_SAT_WEEKEND if name.startswith("SGP") else "1111100"
+
+
+def test_calendars_match_data(index, calendarDates):
+  assert set(index.calendars()) == set(calendarDates)
+
+
+def test_holidays_in_all_matches_scan(index, calendarDates):
+  for names in selections(index):
+    expected = sorted(set.intersection(*(calendarDates[name] for name in names)))
+    assert index.holidaysInAll(names, "2020-01-01", "2026-12-31") == expected, names
+    assert index.holidaysInAll(names, "2026-01-01", "2026-06-30") == [day for day in expected if date(2026, 1, 1) <= day <= date(2026, 6, 30)], names
+
+
+def test_holidays_in_any_matches_scan(index, calendarDates):
+  order = index.calendars()
+  for names in selections(index):
+    days = sorted(set.union(*(calendarDates[name] for name in names)))
+    expected = [(day, [name for name in order if name in names and day in calendarDates[name]]) for day in days]
+    assert index.holidaysInAny(names, "2020-01-01", "2026-12-31") == expected, names
+
+
+def test_next_business_days_matches_scan(index, calendarDates):
+  for names in selections(index):
+    day = date(2025, 12, 20)
+    expected = []
+    while len(expected) < 60:
+      if all(weekmaskOf(name)[day.weekday()] == "1" and day not in calendarDates[name] for name in names):
+        expected.append(day)
+      day += timedelta(days=1)
+    assert index.nextBusinessDays(names, "2025-12-20", 60) == expected, names
+
+
+def test_closed_on_weekends_follows_weekmasks(index, calendarDates):
+  countries = [name for name in index.calendars() if ":" not in name]
+  for offset in range(14):
+    day = date(2026, 3, 2) + timedelta(days=offset)
+    closed = [name for name in countries if day in calendarDates[name] or weekmaskOf(name)[day.weekday()] == "0"]
+    assert index.closedOn(day, weekends=True) == closed, day
+    assert index.closedOn(day) == [name for name in countries if day in calendarDates[name]], day
+
+
+def test_no_common_working_weekday():
+  index = DateIndex([{"countryAlpha3Code": "AAA", "holidays": []}, {"countryAlpha3Code": "BBB", "holidays": []}], weekmasks={"AAA": "1110000", "BBB": "0001111"})
+
+  with pytest.raises(ValueError):
+    index.nextBusinessDays(["AAA", "BBB"], "2026-01-01", 1)
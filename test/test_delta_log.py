@@ -0,0 +1,90 @@
+import json
+
+from delta_log import appendDelta, changesSince, diffHolidays, getDeltaLogPath, readDeltas
+from functions import createHolidayResult, writeJsonIfChanged
+
+
+def holiday(date: str, name: str, region: list = None) -> dict:
+  entry = {"date": date, "holiday": name}
+  if region is not None:
+    entry["region"] = region
+  return entry
+
+
+def test_diff_reports_added_removed_and_renamed():
+  old = [holiday("2025-01-01", "New Year"), holiday("2025-05-01", "Labour Day"), holiday("2025-06-01", "Region Day", ["North"])]
+  new = [holiday("2025-01-01", "New Year's Day"), holiday("2025-06-01", "Region Day", ["South"]), holiday("2025-12-25", "Christmas")]
+
+  assert diffHolidays(old, new) == {
+    "added": [holiday("2025-06-01", "Region Day", ["South"]), holiday("2025-12-25", "Christmas")],
+    "removed": [holiday("2025-05-01", "Labour Day"), holiday("2025-06-01", "Region Day", ["North"])],
+    "renamed": [{"from": holiday("2025-01-01", "New Year"), "to": holiday("2025-01-01", "New Year's Day")}]
+  }
+
+
+def test_sequence_numbers_follow_digests(tmp_path):
+  log = str(tmp_path / "deltas" / "xyz.jsonl")
+
+  assert appendDelta(log, {"added": [], "removed": [], "renamed": []}, "a", None, "t1") == 1
+  assert appendDelta(log, {"added": [], "removed": [], "renamed": []}, "b", "a", "t2") == 2
+  # The same transition again: a retry after a failed file write
+  assert appendDelta(log, {"added": [], "removed": [], "renamed": []}, "b", "a", "t3") == 2
+
+  records = readDeltas(log)
+  assert [(record["sequence"], record["previousDigest"], record["holidaysDigest"]) for record in records] == [(1, None, "a"), (2, "a", "b")]
+
+
+def test_log_not_ending_at_previous_digest_is_reset(tmp_path):
+  log = str(tmp_path / "deltas" / "xyz.jsonl")
+  appendDelta(log, {"added": [], "removed": [], "renamed": []}, "a", None, "t1")
+
+  # The file was replaced by hand with data of digest "x"
+  assert appendDelta(log, {"added": [holiday("2025-01-01", "New Year")], "removed": [], "renamed": []}, "b", "x", "t2") == 2
+
+  assert readDeltas(log)[-1]["reset"] is True
+  assert changesSince("xyz", 1, str(tmp_path / "deltas"))["reset"] is True
+
+
+def test_partial_last_line_is_ignored_and_not_continued(tmp_path):
+  log = tmp_path / "deltas" / "xyz.jsonl"
+  appendDelta(str(log), {"added": [], "removed": [], "renamed": []}, "a", None, "t1")
+  with open(log, 'a', encoding='utf-8') as f:
+    f.write('{"sequence":2,"upd')
+
+  assert appendDelta(str(log), {"added": [], "removed": [], "renamed": []}, "b", "a", "t2") == 2
+  assert [record["sequence"] for record in readDeltas(str(log))] == [1, 2]
+
+
+def test_changes_since(tmp_path):
+  deltas = str(tmp_path / "deltas")
+  log = str(tmp_path / "deltas" / "xyz.jsonl")
+  appendDelta(log, {"added": [holiday("2025-01-01", "New Year")], "removed": [], "renamed": []}, "a", None, "t1")
+  appendDelta(log, {"added": [holiday("2025-12-25", "Christmas")], "removed": [], "renamed": []}, "b", "a", "t2")
+
+  since = changesSince("XYZ", 1, deltas)
+  assert (since["sequence"], since["reset"]) == (2, False)
+  assert [record["added"] for record in since["changes"]] == [[holiday("2025-12-25", "Christmas")]]
+
+  assert changesSince("xyz", 2, deltas)["changes"] == []
+  # A client ahead of the log reloads
+  assert changesSince("xyz", 5, deltas)["reset"] is True
+  assert changesSince("abc", 0, deltas) == {"countryAlpha3Code": "ABC", "sequence": 0, "reset": False, "changes": []}
+
+
+def test_write_appends_delta_and_stores_sequence(tmp_path):
+  path = tmp_path / "data" / "xyz.json"
+  path.parent.mkdir()
+  first = [holiday("2025-01-01", "New Year")]
+  second = [holiday("2025-01-01", "New Year's Day"), holiday("2025-12-25", "Christmas")]
+
+  writeJsonIfChanged(createHolidayResult("", "Xyz", "XY", "XYZ", first), str(path))
+  writeJsonIfChanged(createHolidayResult("", "Xyz", "XY", "XYZ", second), str(path))
+  # Unchanged: no new record
+  writeJsonIfChanged(createHolidayResult("", "Xyz", "XY", "XYZ", second), str(path))
+
+  with open(path, 'r', encoding='utf-8') as f:
+    assert json.load(f)["deltaSequence"] == 2
+  records = readDeltas(getDeltaLogPath(str(path)))
+  assert [record["sequence"] for record in records] == [1, 2]
+  assert records[1]["added"] == [holiday("2025-12-25", "Christmas")]
+  assert records[1]["renamed"] == [{"from": first[0], "to": second[0]}]
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+import pytest
+
+from holiday_index import HolidayIndex
+
+
+@pytest.fixture(scope="module")
+def index(holidayResults):
+  return HolidayIndex(holidayResults)
+
+
+def daysAround(holidays: list):
+  # Every day from a week before the first holiday to a week after the last
+  day = date.fromisoformat(holidays[0]['date']) - timedelta(days=7)
+  last = date.fromisoformat(holidays[-1]['date']) + timedelta(days=7)
+  while day <= last:
+    yield day
+    day += timedelta(days=1)
+
+
+def test_regions_match_data(index, naiveCalendars):
+  assert {(code, region) for code in index.countries() for region in [None] + index.regions(code)} == set(naiveCalendars)
+
+
+def test_is_holiday_matches_scan(index, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    dates = {holiday['date'] for holiday in holidays}
+    for day in daysAround(holidays):
+      assert index.isHoliday(code, day, region) == (day.isoformat() in dates), (code, region, day)
+
+
+def test_next_and_previous_holiday_match_scan(index, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    for day in daysAround(holidays):
+      key = day.isoformat()
+      after = [holiday for holiday in holidays if holiday['date'] > key]
+      before = [holiday for holiday in holidays if holiday['date'] < key]
+      assert index.nextHoliday(code, day, region) == (after[0] if after else None)
+      assert index.previousHoliday(code, day, region) == (before[-1] if before else None)
+      onOrAfter = [holiday for holiday in holidays if holiday['date'] >= key]
+      assert index.nextHoliday(code, day, region, inclusive=True) == (onOrAfter[0] if onOrAfter else None)
+
+
+def test_holidays_between_matches_scan(index, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    start, end = holidays[0]['date'], holidays[len(holidays) // 2]['date']
+    assert index.holidaysBetween(code, start, end, region) == [holiday for holiday in holidays if start <= holiday['date'] <= end]
+
+
+def test_alpha2_codes_and_unknown_calendars(index):
+  assert index.isHoliday("gb", "2026-01-01") == index.isHoliday("GBR", "2026-01-01")
+  with pytest.raises(KeyError):
+    index.isHoliday("ZZZ", "2026-01-01")
+  with pytest.raises(KeyError):
+    index.isHoliday("GBR", "2026-01-01", "Atlantis")
+
+
+def test_blocks_cover_leap_years_and_block_edges():
+  # Ordinals either side of a 512-day block edge, and 29 February
+  edge = (date(2024, 1, 1).toordinal() | 511) + 1
+  days = [date.fromordinal(edge - 1), date.fromordinal(edge), date(2024, 2, 29), date(2024, 12, 31)]
+  index = HolidayIndex([{"countryAlpha3Code": "XYZ", "holidays": [{"date": day.isoformat(), "holiday": "H"} for day in days]}])
+
+  for day in days:
+    assert index.isHoliday("XYZ", day)
+    assert not index.isHoliday("XYZ", day + timedelta(days=1)) or day + timedelta(days=1) in days
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import pytest
+
+from holiday_index import HolidayIndex
+from holiday_store import HolidayStore, writeHolidayStore
+
+
+@pytest.fixture(scope="module")
+def index(holidayResults):
+  return HolidayIndex(holidayResults)
+
+
+@pytest.fixture(scope="module")
+def store(holidayResults, tmp_path_factory):
+  path = str(tmp_path_factory.mktemp("store") / "holidays.bin")
+  writeHolidayStore(holidayResults, path)
+  with HolidayStore(path) as store:
+    yield store
+
+
+def test_calendars_round_trip(store, index):
+  assert store.countries() == index.countries()
+  for code in index.countries():
+    assert store.regions(code) == index.regions(code)
+
+
+def test_is_holiday_matches_index(store, index, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    # Whole years, so every bit of the first and last bitmaps is read
+    day = date(int(holidays[0]['date'][:4]) - 1, 1, 1)
+    last = date(int(holidays[-1]['date'][:4]) + 1, 12, 31)
+    while day <= last:
+      assert store.isHoliday(code, day, region) == index.isHoliday(code, day, region), (code, region, day)
+      day += timedelta(days=1)
+
+
+def test_holidays_between_matches_index(store, index, naiveCalendars):
+  for (code, region), holidays in naiveCalendars.items():
+    for start, end in [(holidays[0]['date'], holidays[-1]['date']), ("2000-01-01", "2100-12-31"), (holidays[-1]['date'], holidays[-1]['date'])]:
+      expected = [{"date": holiday['date'], "holiday": holiday['holiday']} for holiday in index.holidaysBetween(code, start, end, region)]
+      assert store.holidaysBetween(code, start, end, region) == expected, (code, region, start, end)
+
+
+def test_leap_days_and_year_ends(tmp_path):
+  days = ["2023-12-31", "2024-01-01", "2024-02-29", "2024-12-31", "2026-07-04"]
+  results = [{
+    "countryAlpha3Code": "XYZ",
+    "countryAlpha2Code": "XY",
+    "country": "Xyz",
+    "holidays": [{"date": day, "holiday": f"Holiday {day}", "region": ["North"]} for day in days]
+  }]
+  path = str(tmp_path / "holidays.bin")
+  writeHolidayStore(results, path)
+
+  with HolidayStore(path) as store:
+    assert [day for day in (date(2023, 1, 1) + timedelta(days=offset) for offset in range(4 * 366)) if store.isHoliday("XY", day, "North")] == [date.fromisoformat(day) for day in days]
+    assert store.holidaysBetween("XYZ", "2024-02-29", "2024-12-31") == [{"date": "2024-02-29", "holiday": "Holiday 2024-02-29"}, {"date": "2024-12-31", "holiday": "Holiday 2024-12-31"}]
+    assert store.holidaysBetween("XYZ", "2025-01-01", "2025-12-31") == []
+    with pytest.raises(KeyError):
+      store.isHoliday("XYZ", "2024-01-01", "South")
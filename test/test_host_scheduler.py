@@ -0,0 +1,172 @@
+import threading
+
+import pytest
+
+import budget
+import host_scheduler
+from host_scheduler import HostScheduler, parseRetryAfter
+
+URL = "https://holidays-calendar.net/calendar_en/china_en.html"
+
+
+class FakeClock:
+  # Stands in for the time module: sleeping moves the clock forward
+  def __init__(self):
+    self.now = 1000.0
+    self.slept = []
+
+  def monotonic(self) -> float:
+    return self.now
+
+  def time(self) -> float:
+    return self.now
+
+  def sleep(self, seconds: float) -> None:
+    self.slept.append(seconds)
+    self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  clock = FakeClock()
+  monkeypatch.setattr(host_scheduler, "time", clock)
+  return clock
+
+
+def test_token_bucket_allows_burst_then_paces(clock):
+  host = HostScheduler(rate=2.0, burst=3)._host(URL)
+
+  assert [host.takeToken() for _ in range(3)] == [0.0, 0.0, 0.0]
+  assert host.takeToken() == pytest.approx(0.5)
+
+  clock.now += 0.25
+  assert host.takeToken() == pytest.approx(0.25)
+  clock.now += 0.25
+  assert host.takeToken() == 0.0
+
+
+def test_tokens_refill_up_to_burst(clock):
+  host = HostScheduler(rate=1.0, burst=2)._host(URL)
+  host.takeToken()
+  host.takeToken()
+
+  clock.now += 60
+  assert [host.takeToken() for _ in range(3)] == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_slot_waits_for_token(clock):
+  scheduler = HostScheduler(rate=4.0, burst=1)
+  for _ in range(3):
+    with scheduler.slot(URL):
+      pass
+
+  assert clock.slept == [pytest.approx(0.25), pytest.approx(0.25)]
+
+
+def test_hosts_are_paced_separately(clock):
+  scheduler = HostScheduler(rate=1.0, burst=1, limits={"www.gov.uk": {"burst": 2}})
+
+  assert scheduler._host(URL).takeToken() == 0.0
+  assert scheduler._host("https://www.gov.uk/bank-holidays").takeToken() == 0.0
+  assert scheduler._host("https://WWW.GOV.UK/other").takeToken() == 0.0
+  assert scheduler._host(URL).takeToken() == pytest.approx(1.0)
+
+
+def test_throttling_slows_host_and_success_recovers(clock):
+  scheduler = HostScheduler(rate=4.0, burst=4)
+  host = scheduler._host(URL)
+
+  scheduler.observe(URL, 429)
+  assert host.rate == 2.0
+  # The bucket is emptied, and refills at the lower rate
+  assert host.takeToken() == pytest.approx(0.5)
+
+  scheduler.observe(URL, 503, "30")
+  assert host.rate == 1.0
+  assert host.takeToken() == pytest.approx(30.0)
+  clock.now += 30
+  assert host.takeToken() == 0.0
+
+  for _ in range(20):
+    scheduler.observe(URL, 200)
+  assert host.rate == 4.0
+
+
+def test_slot_raises_when_wait_exceeds_budget(clock):
+  scheduler = HostScheduler(rate=1.0, burst=1)
+  scheduler.observe(URL, 503, "120")
+
+  with pytest.raises(budget.BudgetExceeded):
+    with budget.limit(5):
+      with scheduler.slot(URL):
+        pass
+
+
+def test_parse_retry_after():
+  assert parseRetryAfter("12") == 12.0
+  assert parseRetryAfter("100000") == host_scheduler.MAX_RETRY_AFTER
+  assert parseRetryAfter("Mon, 01 Jan 2001 00:00:00 GMT") == 0.0
+  assert parseRetryAfter("soon") is None
+  assert parseRetryAfter(None) is None
+
+
+def runWhileLeaderFetches(scheduler: HostScheduler, leader, follower) -> list:
+  # Runs leader in a thread, and follower once leader is inside its request
+  started, release = threading.Event(), threading.Event()
+  results = []
+
+  def lead():
+    def request():
+      started.set()
+      release.wait(5)
+      return leader()
+    try:
+      results.append(("leader", scheduler.coalesce("key", request)))
+    except BaseException as e:
+      results.append(("leader", e))
+
+  thread = threading.Thread(target=lead)
+  thread.start()
+  started.wait(5)
+  threading.Timer(0.1, release.set).start()
+  try:
+    results.append(("follower", scheduler.coalesce("key", follower)))
+  except BaseException as e:
+    results.append(("follower", e))
+  thread.join(5)
+  return sorted(results, key=lambda result: result[0])
+
+
+def test_identical_requests_share_one_call():
+  calls = []
+
+  results = runWhileLeaderFetches(HostScheduler(), lambda: calls.append("leader") or "body", lambda: calls.append("follower") or "other")
+
+  assert calls == ["leader"]
+  assert results == [("follower", ("body", True)), ("leader", ("body", False))]
+
+
+def test_shared_request_error_is_raised_to_every_caller():
+  def fail():
+    raise ValueError("bad page")
+
+  results = runWhileLeaderFetches(HostScheduler(), fail, lambda: "other")
+
+  assert [type(result) for _, result in results] == [ValueError, ValueError]
+
+
+def test_leader_budget_error_is_not_shared():
+  def outOfTime():
+    raise budget.BudgetExceeded("leader ran out of time")
+
+  results = runWhileLeaderFetches(HostScheduler(), outOfTime, lambda: "own body")
+
+  assert isinstance(results[1][1], budget.BudgetExceeded)
+  assert results[0] == ("follower", ("own body", False))
+
+
+def test_finished_requests_are_not_shared():
+  scheduler = HostScheduler()
+
+  assert scheduler.coalesce("key", lambda: "first") == ("first", False)
+  assert scheduler.coalesce("key", lambda: "second") == ("second", False)
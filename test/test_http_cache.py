@@ -0,0 +1,155 @@
+from datetime import datetime
+import json
+
+import pytest
+
+import countries
+import crawl
+import crawl_state
+import http_cache
+import http_client
+import http_replay
+from http_cache import buildResponse
+
+SOURCE_URL = "https://example.com/holidays.json"
+
+
+def crawlHolidays(country: dict) -> list:
+  # Parser of the test country: the source is a JSON list of holidays
+  return http_client.fetch(country["source"]).json()
+
+
+class ConditionalOrigin:
+  """
+  Stands in for the HTTP session, serving the recorded fixtures like a server that
+  answers 304 Not Modified to a request whose If-None-Match matches the fixture's ETag.
+  """
+
+  def __init__(self):
+    self.requests = []
+
+  def get(self, url, headers=None, timeout=None, stream=False):
+    recorded = http_replay.load(url)
+    notModified = (headers or {}).get("If-None-Match") == recorded.headers.get("ETag")
+    self.requests.append((url, 304 if notModified else 200))
+    response = buildResponse(url, b"" if notModified else recorded.content, dict(recorded.headers), 304 if notModified else 200)
+    response._content_consumed = True
+    return response
+
+
+@pytest.fixture
+def origin(replay, tmp_path, monkeypatch):
+  """
+  Runs crawls of a test country 'XYZ' against a ConditionalOrigin, with the HTTP cache,
+  crawl state and output files under tmp_path.
+
+  Yields:
+    Tuple of (ConditionalOrigin, function publishing the source holidays under an ETag)
+  """
+  # Fixtures are only the origin's content: requests go through the normal network path
+  http_replay.configure(None)
+  http_cache.configure(enabled=True, directory=str(tmp_path / "cache"))
+  monkeypatch.setattr(http_cache, "_validated", {})
+  monkeypatch.setattr(crawl_state, "STATE_PATH", str(tmp_path / "state" / "crawl-state.json"))
+
+  server = ConditionalOrigin()
+  monkeypatch.setattr(http_client, "getSession", lambda: server)
+
+  country = {
+    "countryAlpha3Code": "XYZ",
+    "countryAlpha2Code": "XY",
+    "country": "Xyz",
+    "source": SOURCE_URL,
+    "parser": "test",
+    "yearsBack": 1
+  }
+  monkeypatch.setitem(countries.PARSERS, "test", __name__)
+  monkeypatch.setitem(countries._countries, "XYZ", country)
+  monkeypatch.setitem(countries._codes, "XYZ", "XYZ")
+
+  # getOutputPath() is relative to src/
+  (tmp_path / "src").mkdir()
+  (tmp_path / "data").mkdir()
+  monkeypatch.chdir(tmp_path / "src")
+
+  def publish(holidays: list, etag: str) -> None:
+    replay(SOURCE_URL, json.dumps(holidays).encode('utf-8'), {"Content-Type": "application/json", "ETag": etag})
+
+  try:
+    yield server, publish
+  finally:
+    http_cache.configure(directory=http_cache.CACHE_DIR)
+
+
+def newProcess(monkeypatch) -> None:
+  # Forgets the URLs revalidated by this process, as a later run would
+  monkeypatch.setattr(http_cache, "_validated", {})
+
+
+def test_crawl_skipped_when_every_source_is_not_modified(origin, monkeypatch):
+  server, publish = origin
+  publish([{"date": "2025-01-01", "holiday": "New Year"}], '"v1"')
+  assert crawl.runCrawler("XYZ")["unchanged"] is False
+
+  newProcess(monkeypatch)
+  result = crawl.runCrawler("XYZ")
+
+  assert (result["success"], result["unchanged"]) == (True, True)
+  assert server.requests == [(SOURCE_URL, 200), (SOURCE_URL, 304)]
+
+
+def test_crawl_runs_when_a_source_changed(origin, monkeypatch, tmp_path):
+  server, publish = origin
+  publish([{"date": "2025-01-01", "holiday": "New Year"}], '"v1"')
+  crawl.runCrawler("XYZ")
+
+  publish([{"date": "2025-01-01", "holiday": "New Year's Day"}], '"v2"')
+  newProcess(monkeypatch)
+  result = crawl.runCrawler("XYZ")
+
+  assert (result["success"], result["unchanged"]) == (True, False)
+  with open(tmp_path / "data" / "xyz.json", 'r', encoding='utf-8') as f:
+    assert json.load(f)["holidays"][0]["holiday"] == "New Year's Day"
+
+
+def test_crawl_runs_after_year_rollover(origin, monkeypatch):
+  server, publish = origin
+  publish([{"date": "2025-01-01", "holiday": "New Year"}], '"v1"')
+  crawl.runCrawler("XYZ")
+
+  class NextYear(datetime):
+    @classmethod
+    def now(cls, tz=None):
+      return datetime.now(tz).replace(year=datetime.now().year + 1)
+
+  monkeypatch.setattr(countries, "datetime", NextYear)
+  newProcess(monkeypatch)
+  result = crawl.runCrawler("XYZ")
+
+  assert (result["success"], result["unchanged"]) == (True, False)
+
+
+def test_crawl_runs_after_registry_window_change(origin, monkeypatch):
+  server, publish = origin
+  publish([{"date": "2025-01-01", "holiday": "New Year"}], '"v1"')
+  crawl.runCrawler("XYZ")
+
+  monkeypatch.setitem(countries._countries["XYZ"], "yearsAhead", 3)
+  newProcess(monkeypatch)
+  result = crawl.runCrawler("XYZ")
+
+  assert (result["success"], result["unchanged"]) == (True, False)
+
+
+def test_crawl_always_runs_without_cache(origin, monkeypatch):
+  server, publish = origin
+  publish([{"date": "2025-01-01", "holiday": "New Year"}], '"v1"')
+  crawl.runCrawler("XYZ")
+
+  http_cache.configure(enabled=False)
+  newProcess(monkeypatch)
+  result = crawl.runCrawler("XYZ")
+
+  assert (result["success"], result["unchanged"]) == (True, False)
+  # Not even revalidated: the request carries no If-None-Match
+  assert server.requests[-1] == (SOURCE_URL, 200)
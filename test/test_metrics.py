@@ -0,0 +1,14 @@
+import metrics
+
+
+def test_fetch_counters_by_source():
+  with metrics.collect("XYZ") as crawlMetrics:
+    metrics.recordFetch("https://example.com/a", 0.1, 100, "network", 200)
+    metrics.recordFetch("https://example.com/b", 0.1, 200, "cache", 304)
+    metrics.recordFetch("https://example.com/c", 0.1, 300, "replay")
+    metrics.recordFetch("https://example.com/c", 0.1, 300, "shared")
+
+  report = crawlMetrics.toDict()
+
+  assert (report["requests"], report["cache_hits"], report["replayed"], report["shared"]) == (4, 1, 1, 1)
+  assert report["bytes_downloaded"] == 100
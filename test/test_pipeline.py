@@ -0,0 +1,60 @@
+import os
+
+import pytest
+import requests
+
+import pipeline
+from parser.holidays_calendar import parseHolidayData
+
+TEST_HTML = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test.html')
+BASE_URL = "https://example.com/pages/"
+
+
+def parseText(content: bytes, suffix: str) -> str:
+  # Module-level, so that the parser processes can unpickle it
+  return content.decode('utf-8') + suffix
+
+
+@pytest.fixture(params=[0, 2], ids=["inline", "pool"])
+def parseProcesses(request):
+  processes, stream = pipeline.PARSE_PROCESSES, pipeline.STREAM_PARSE
+  pipeline.configure(request.param, stream=False)
+  try:
+    yield request.param
+  finally:
+    if pipeline._pool is not None:
+      pipeline._pool.shutdown()
+      pipeline._pool = None
+    pipeline.configure(processes, stream=stream)
+
+
+def test_results_follow_url_order(replay, parseProcesses):
+  urls = [f"{BASE_URL}{index}" for index in range(12)]
+  for index, url in enumerate(urls):
+    # Pages of very different sizes finish parsing out of order
+    replay(url, (str(index) * (index % 3 * 50000 + 1)).encode('utf-8'))
+
+  results = pipeline.fetchAndParse(urls, parseText, "!", fetch_workers=3, queue_size=2)
+
+  assert results == [str(index) * (index % 3 * 50000 + 1) + "!" for index in range(12)]
+
+
+def test_download_error_is_raised(replay, parseProcesses):
+  replay(BASE_URL + "0", b"page")
+
+  with pytest.raises(requests.ConnectionError):
+    pipeline.fetchAndParse([BASE_URL + "0", BASE_URL + "missing"], parseText, "")
+
+
+def test_pool_parses_like_inline(replay, parseProcesses):
+  with open(TEST_HTML, 'rb') as f:
+    replay(BASE_URL + "china.html", f.read())
+
+  with open(TEST_HTML, 'rb') as f:
+    expected = parseHolidayData(f.read())
+
+  assert pipeline.fetchAndParse([BASE_URL + "china.html"], parseHolidayData) == [expected]
+
+
+def test_no_urls(parseProcesses):
+  assert pipeline.fetchAndParse([], parseText, "") == []